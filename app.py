@@ -3,12 +3,26 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from io import BytesIO
+import os
 import re
-import json
-import hashlib
+import time
+from streamlit.errors import StreamlitAPIException
 from copy import deepcopy
 
+import simulador
+from simulador import (
+    MONEY_COLS,
+    COUNT_COLS,
+    get_default_config,
+    compute_cache_key,
+    compute_initial_investment_total,
+    calculate_summary_metrics,
+    load_events_csv,
+)
+
+# Colunas monetárias dos resultados em float32 (SIMULADOR_FLOAT32=1): só exibição, metade da memória por sessão
+FLOAT32_FRAMES = os.environ.get("SIMULADOR_FLOAT32") == "1"
+
 # --- ESTADO DA SESSÃO ---
 if 'config' not in st.session_state:
     st.session_state.config = {
@@ -35,6 +49,9 @@ if 'config' not in st.session_state:
             'land_down_payment_pct': 0.0, 
             'land_installments': 1, 
             'land_interest_rate': 8.0,
+            'land_loan_type': 'sac',
+            'land_grace_months': 0,
+            'land_balloon_pct': 0.0,
             'monthly_land_plot_parcel': 0.0,
         },
         'strategy': {
@@ -43,8 +60,8 @@ if 'config' not in st.session_state:
     }
 if 'simulation_df' not in st.session_state:
     st.session_state.simulation_df = pd.DataFrame()
-if 'comparison_df' not in st.session_state:
-    st.session_state.comparison_df = pd.DataFrame()
+if 'comparison' not in st.session_state:
+    st.session_state.comparison = simulador.ComparisonStore(float32=FLOAT32_FRAMES)
 if 'selected_strategy' not in st.session_state:
     st.session_state.selected_strategy = 'buy'
 if 'config_changed' not in st.session_state:
@@ -64,19 +81,6 @@ MUTED_TEXT_COLOR= "#6C757D"      # Texto cinza secundário
 TABLE_BORDER_COLOR = "#E9ECEF"
 CHART_GRID_COLOR  = "#E9ECEF"
 
-# --- COLUNAS PARA FORMATAÇÃO ---
-MONEY_COLS = {
-    "Receita","Manutenção","Aluguel","Parcela Terreno Inicial","Parcelas Terrenos (Novos)","Gastos",
-    "Aporte","Fundo (Mês)","Retirada (Mês)","Caixa (Final Mês)","Investimento Total Acumulado",
-    "Fundo Acumulado","Retiradas Acumuladas","Patrimônio Líquido","Juros Terreno Inicial",
-    "Amortização Terreno Inicial","Equity Terreno Inicial","Valor de Mercado Terreno",
-    "Patrimônio Terreno","Juros Acumulados","Amortização Acumulada","Desembolso Total",
-    "Aluguel Acumulado","Parcelas Novas Acumuladas",
-    # Novos KPIs
-    "Dívida Futura Total", "Investimento em Terrenos", "Valor de Mercado Total"
-}
-COUNT_COLS = {"Mês","Ano","Módulos Ativos","Módulos Alugados","Módulos Próprios","Módulos Comprados no Ano", "Terrenos Adquiridos"}
-
 # ---------------------------
 # Helpers
 # ---------------------------
@@ -90,6 +94,13 @@ def fmt_brl(v):
     except (ValueError, TypeError):
         return "R$ 0,00"
 
+_BRL_TABLE = str.maketrans(",.", ".,")
+
+def fmt_brl_array(values):
+    # Ainda formata célula a célula (f-string), mas numa única passada sobre a lista de floats,
+    # sem a chamada de função, o try/except e os três replace de fmt_brl (mesma saída; NaN vira "-")
+    return np.array(["-" if v != v else f"R$ {v:,.2f}".translate(_BRL_TABLE) for v in np.asarray(values, dtype=float).tolist()], dtype=object)
+
 def render_kpi_card(title, value, bg_color=PRIMARY_COLOR, icon=None, subtitle=None, dark_text=False):
     icon_html = f"<div style='font-size: 2rem; margin-bottom: 0.5rem;'>{icon}</div>" if icon else ""
     subtitle_html = f"<div class='kpi-card-subtitle'>{subtitle}</div>" if subtitle else ""
@@ -116,42 +127,30 @@ def render_report_metric(title, value):
         </div>
     """, unsafe_allow_html=True)
 
-def calculate_summary_metrics(df):
-    summary = {"roi_pct": 0, "break_even_month": "N/A", "total_investment": 0, "net_profit": 0}
-    if df.empty:
-        return summary
-    final = df.iloc[-1]
-    total_investment = final['Investimento Total Acumulado']
-    summary["total_investment"] = total_investment
-    if total_investment > 0:
-        # Patrimônio Líquido Final deve ser a soma do tatal investido em módulos com o total investido em terrenos.
-        # PL = Ativos (Módulos + Caixa + Fundo + Valor de Mercado Total) - Passivos (Dívida Futura Total)
-        net_profit = final['Patrimônio Líquido'] - total_investment
-        summary["roi_pct"] = (net_profit / total_investment) * 100
-        summary["net_profit"] = net_profit
-    break_even_df = df[df['Patrimônio Líquido'] >= df['Investimento Total Acumulado']]
-    if not break_even_df.empty:
-        break_even_month = int(break_even_df.iloc[0]['Mês'])
-        summary["break_even_month"] = f"Mês {break_even_month}"
-    return summary
-
-def df_to_excel_bytes(df: pd.DataFrame):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Simulacao_Mensal")
-        wb, ws = writer.book, writer.sheets["Simulacao_Mensal"]
-        money_fmt = wb.add_format({"num_format": "R$ #,##0.00"})
-        for i, col in enumerate(df.columns):
-            width = max(df[col].astype(str).map(len).max(), len(col)) + 2
-            fmt = money_fmt if col in MONEY_COLS else None
-            ws.set_column(i, i, width, fmt)
-    return output.getvalue()
-
 def slug(s: str) -> str:
     s = s.lower()
     s = re.sub(r"[^a-z0-9]+", "_", s).strip("_")
     return s[:60]
 
+def rerun_fragment():
+    # Reexecuta só o fragmento atual; na execução completa da página o escopo "fragment" não é aceito
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def chart_window(n_months: int, key: str):
+    # Janela de meses exibida nos gráficos: reduzir o período devolve o detalhe mês a mês
+    if n_months <= 24:
+        return 0, n_months
+    start, stop = st.slider("Período exibido (meses)", min_value=1, max_value=n_months, value=(1, n_months), key=key)
+    return start - 1, stop
+
+def line_trace(x, y, n_points=simulador.charts.MAX_POINTS_PER_SERIES, webgl=False, **kwargs):
+    # Série reduzida por LTTB ao orçamento de pontos; WebGL nos gráficos muito densos
+    x, y = simulador.charts.decimate(x, y, n_points)
+    return (go.Scattergl if webgl else go.Scatter)(x=x, y=y, **kwargs)
+
 def apply_plot_theme(fig, title=None, h=420):
     fig.update_layout(
         title=dict(text=title or fig.layout.title.text, x=0.5, xanchor='center', font=dict(size=16, color=TEXT_COLOR)),
@@ -165,428 +164,158 @@ def apply_plot_theme(fig, title=None, h=420):
     )
     return fig
 
-def compute_cache_key(cfg: dict) -> str:
-    payload = json.dumps(cfg, sort_keys=True, ensure_ascii=False, default=str)
-    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+@st.cache_data(max_entries=16, ttl=3600)
+def build_result_figures(result_key: str, w0: int, w1: int, _df: pd.DataFrame):
+    # Figuras da simulação única; só são refeitas quando o resultado ou o período mudam
+    df = _df
+    dfw = df.iloc[w0:w1]
+    figs = {}
+    fig = go.Figure()
+    fig.add_trace(line_trace(dfw['Mês'], dfw['Patrimônio Líquido'], mode='lines', name='Patrimônio Líquido', line=dict(color=SUCCESS_COLOR, width=3)))
+    fig.add_trace(line_trace(dfw['Mês'], dfw['Investimento Total Acumulado'], mode='lines', name='Investimento Total', line=dict(color=SECONDARY_COLOR, width=2, dash='dash')))
+    figs['evolucao'] = apply_plot_theme(fig, "Evolução do Investimento")
+    
+    fig = go.Figure()
+    fig.add_trace(line_trace(dfw['Mês'], dfw['Receita'], mode='lines', name='Receita', line=dict(color=SUCCESS_COLOR, width=2)))
+    fig.add_trace(line_trace(dfw['Mês'], dfw['Gastos'], mode='lines', name='Gastos', line=dict(color=DANGER_COLOR, width=2)))
+    figs['receita'] = apply_plot_theme(fig, "Receita vs Gastos")
+    
+    # Módulos por ano (barras)
+    gp = df.groupby('Ano', as_index=False).agg({
+        'Módulos Próprios':'last',
+        'Módulos Alugados':'last',
+        'Módulos Ativos':'last'
+    })
+    fig_bar = go.Figure()
+    fig_bar.add_trace(go.Bar(x=gp['Ano'], y=gp['Módulos Ativos'], name='Módulos Ativos', marker_color=PRIMARY_COLOR))
+    figs['modulos'] = apply_plot_theme(fig_bar, "Evolução de Módulos por Ano", h=380)
+    
+    # Fluxo de Caixa Mensal (área empilhada)
+    flow = dfw[['Mês','Aporte','Fundo (Mês)','Retirada (Mês)']].copy()
+    flow['Retirada (Mês)'] = -flow['Retirada (Mês)']  # saída como negativo p/ visual
+    # Áreas empilhadas precisam do mesmo eixo x: índices comuns às três séries
+    flow = flow.iloc[simulador.charts.shared_indices(flow['Mês'], [flow[c] for c in ('Aporte', 'Fundo (Mês)', 'Retirada (Mês)')],
+                                                     simulador.charts.MAX_POINTS_PER_SERIES)]
+    flow_melt = flow.melt(id_vars='Mês', var_name='Tipo', value_name='Valor')
+    fig_area = px.area(flow_melt, x='Mês', y='Valor', color='Tipo',
+                       color_discrete_map={"Aporte":SECONDARY_COLOR,"Fundo (Mês)":WARNING_COLOR,"Retirada (Mês)":"#9333EA"})
+    figs['fluxo'] = apply_plot_theme(fig_area, "Fluxo de Caixa Mensal", h=380)
+    
+    # Performance (ROI% + Investimento/ Caixa)
+    perf = dfw.copy()
+    perf['ROI %'] = np.where(perf['Investimento Total Acumulado']>0,
+                             (perf['Patrimônio Líquido']-perf['Investimento Total Acumulado'])/perf['Investimento Total Acumulado']*100, 0)
+    fig_perf = go.Figure()
+    fig_perf.add_trace(line_trace(perf['Mês'], perf['Investimento Total Acumulado'], name='Investimento Total', line=dict(color=SECONDARY_COLOR)))
+    fig_perf.add_trace(line_trace(perf['Mês'], perf['Caixa (Final Mês)'], name='Caixa', line=dict(color=PRIMARY_COLOR)))
+    fig_perf.add_trace(line_trace(perf['Mês'], perf['ROI %'], name='ROI %', yaxis='y2', line=dict(color=INFO_COLOR, width=3)))
+    fig_perf.update_layout(
+        yaxis=dict(title='Valores (R$)'),
+        yaxis2=dict(title='ROI (%)', overlaying='y', side='right', showgrid=False)
+    )
+    figs['performance'] = apply_plot_theme(fig_perf, "Performance do Investimento", h=420)
+    return figs
 
-def compute_initial_investment_total(cfg):
-    g = cfg['global']; o = cfg['owned']
-    # Investimento inicial = (Modulos iniciais * Custo por modulo) + Entrada do terreno para TODOS os modulos iniciais (se comprado)
-    total = g['modules_init'] * g['cost_per_module']
-    if cfg['strategy']['land_strategy'] in ['owned', 'alternate'] and o.get('land_total_value', 0) > 0:
-        # Valor total do terreno para TODOS os modulos iniciais
-        valor_total_terreno = o['land_total_value'] * g['modules_init']
-        total += valor_total_terreno * (o.get('land_down_payment_pct', 0) / 100.0)
-    return total
+@st.cache_data(max_entries=16, ttl=3600)
+def build_comparison_figure(comparison_key: tuple, metric: str, w0: int, w1: int, _store):
+    # Uma série por estratégia, dividindo o orçamento de pontos entre elas
+    n_points = simulador.charts.series_budget(len(_store))
+    webgl = simulador.charts.use_webgl(len(_store) * min(w1 - w0, n_points))
+    palette = px.colors.qualitative.Plotly
+    color_map = {'Comprado': PRIMARY_COLOR, 'Alugado': INFO_COLOR, 'Intercalado': WARNING_COLOR}
+    fig_comp = go.Figure()
+    for i, strategy in enumerate(_store):
+        cols_s = _store.columns(strategy)
+        fig_comp.add_trace(line_trace(cols_s['Mês'][w0:w1], cols_s[metric][w0:w1], n_points, webgl,
+                                      mode='lines', name=strategy, line=dict(color=color_map.get(strategy, palette[i % len(palette)]))))
+    fig_comp.update_layout(legend_title_text='Estratégia')
+    return apply_plot_theme(fig_comp, f"Comparativo de {metric}", h=450)
 
 # ---------------------------
 # Funções de Simulação
 # ---------------------------
+@st.cache_resource
+def get_result_cache():
+    # Cache em disco compartilhado entre sessões, réplicas e reinícios
+    return simulador.ResultCache()
+
+@st.cache_resource
+def get_scenario_library():
+    # Cenários salvos em SQLite ($SIMULADOR_LIBRARY ou ~/.simulador/cenarios.sqlite)
+    return simulador.ScenarioLibrary()
+
+@st.cache_data(max_entries=32, ttl=3600)
+def format_table_page(result_key: str, columns: tuple, start: int, stop: int, _df: pd.DataFrame):
+    # Só as linhas da página e as colunas visíveis são formatadas; cacheado por resultado
+    page = _df.iloc[start:stop]
+    return pd.DataFrame({c: fmt_brl_array(page[c]) if c in MONEY_COLS else page[c].to_numpy() for c in columns})
+
+@st.cache_resource
+def get_export_cache():
+    # Arquivos de exportação já gerados, por hash da config e formato
+    return simulador.ExportCache()
+
+@st.cache_resource
+def get_incremental_simulator():
+    # Checkpoints anuais das execuções recentes: edições tardias retomam do último ano válido
+    return simulador.IncrementalSimulator()
+
 @st.cache_data(show_spinner="Calculando simulação...", max_entries=10, ttl=3600)
 def run_simulation(cfg: dict):
-    cfg_global = cfg['global']
-    cfg_owned = cfg['owned']
-    cfg_rented = cfg['rented']
-    cfg_strategy = cfg['strategy']
-
-    # Parâmetros Globais
-    months = cfg_global['years'] * 12
-    correction_rate_pct = cfg_global['general_correction_rate'] / 100.0
-    land_appreciation_rate_pct = cfg_global['land_appreciation_rate'] / 100.0
-    reinvestment_strategy = cfg_global['reinvestment_strategy']
-    
-    # Valores por Módulo (Globais)
-    custo_modulo_atual = cfg_global['cost_per_module']
-    receita_p_mod = cfg_global['revenue_per_module']
-    manut_p_mod = cfg_global['maintenance_per_module']
-    
-    # Parâmetros de Terreno Alugado
-    aluguel_p_mod = cfg_rented['rent_value']
-    aluguel_p_novo_mod = cfg_rented['rent_per_new_module']
-    
-    # Parâmetros de Terreno Comprado
-    valor_compra_terreno = cfg_owned.get('land_total_value', 0.0)
-    parcela_p_novo_terreno = cfg_owned.get('monthly_land_plot_parcel', 0.0)
-    taxa_juros_anual = cfg_owned.get('land_interest_rate', 8.0) / 100.0
-    taxa_juros_mensal = taxa_juros_anual / 12
-    
-    # Estado Inicial
-    modules_init = cfg_global['modules_init']
-    
-    # Inicialização de variáveis
-    modules_owned = 0
-    modules_rented = 0
-    
-    # Variáveis para Terrenos Adquiridos (Novos KPIs)
-    terrenos_adquiridos = 0 # Contagem total de terrenos (inicial + novos)
-    investimento_em_terrenos = 0.0 # Soma das entradas + amortização
-    
-    # Lista para gerenciar os financiamentos de terrenos (inicial + novos)
-    # Cada item é um dicionário: {'valor_total', 'saldo_devedor', 'parcelas_restantes', 'parcela_mensal', 'taxa_juros_mensal', 'amortizacao_mensal', 'mes_aquisicao', 'valor_original_terreno'}
-    financiamentos_ativos = []
-    
-    # Distribuição inicial dos módulos baseada na estratégia
-    land_strategy = cfg_strategy['land_strategy']
-    if land_strategy == 'owned':
-        modules_owned = modules_init
-    elif land_strategy == 'rented':
-        modules_rented = modules_init
-    elif land_strategy == 'alternate':
-        if valor_compra_terreno > 0:
-            modules_owned = modules_init
-        else:
-            modules_rented = modules_init
-    
-    # A quantidade de terrenos deve ser igual à quantidade de módulos próprios
-    terrenos_adquiridos = modules_owned
-    
-    caixa = 0.0
-    investimento_total = 0.0
-    historical_value_owned = modules_owned * custo_modulo_atual
-    historical_value_rented = modules_rented * custo_modulo_atual
-    
-    investimento_total += historical_value_owned + historical_value_rented
-    
-    # Armazena o investimento inicial para cálculo da Riqueza Gerada
-    investimento_inicial = investimento_total
-    
-    # Financiamento Terreno Inicial (apenas se a estratégia inicial for 'owned' ou 'alternate' e houver valor de terreno)
-    juros_acumulados = 0.0
-    amortizacao_acumulada = 0.0
-    aluguel_acumulado = 0.0
-    parcelas_novas_acumuladas = 0.0
-    
-    aluguel_mensal_corrente = modules_rented * aluguel_p_mod
-    
-    # A parcela por módulo próprio é a parcela calculada na interface
-    parcelas_terrenos_novos_mensal_corrente = modules_owned * parcela_p_novo_terreno
-
-    if land_strategy in ['owned', 'alternate'] and valor_compra_terreno > 0:
-        # Valor total do terreno para TODOS os módulos iniciais
-        valor_total_terreno_inicial = valor_compra_terreno * modules_init
-        valor_entrada_terreno = valor_total_terreno_inicial * (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0)
-        valor_financiado = valor_total_terreno_inicial - valor_entrada_terreno
-        
-        amortizacao_mensal = 0.0
-        
-        if cfg_owned['land_installments'] > 0:
-            amortizacao_mensal = valor_financiado / cfg_owned['land_installments']
-            
-            # Adiciona UM ÚNICO financiamento para todos os módulos iniciais
-            financiamentos_ativos.append({
-                'valor_total': valor_total_terreno_inicial,
-                'saldo_devedor': valor_financiado,
-                'parcelas_restantes': cfg_owned['land_installments'],
-                'parcela_mensal': amortizacao_mensal + (valor_financiado * taxa_juros_mensal), # Parcela inicial (Amortização + Juros)
-                'taxa_juros_mensal': taxa_juros_mensal,
-                'amortizacao_mensal': amortizacao_mensal,
-                'mes_aquisicao': 0, # Mês 0 para o inicial
-                'valor_original_terreno': valor_total_terreno_inicial,
-                'quantidade_modulos': modules_init  # Rastreia quantos módulos estão associados a este financiamento
-            })
-            
-        investimento_total += valor_entrada_terreno
-        investimento_em_terrenos += valor_entrada_terreno
-    
-    fundo_ac = 0.0
-    retiradas_ac = 0.0
-    rows = []
-    
-    # Variáveis anuais para correção
-    custo_modulo_atual_corrigido = custo_modulo_atual
-    receita_p_mod_corrigida = receita_p_mod
-    manut_p_mod_corrigida = manut_p_mod
-    aluguel_p_mod_corrigido = aluguel_p_mod
-    aluguel_p_novo_mod_corrigido = aluguel_p_novo_mod
-    parcela_p_novo_terreno_corrigido = parcela_p_novo_terreno
-    
-    # Variável para acumular o lucro anual para o reinvestimento
-    lucro_acumulado_anual = 0.0
-
-    for m in range(1, months + 1):
-        # Receita e Manutenção usam os valores corrigidos e são aplicados a TODOS os módulos
-        receita = (modules_owned + modules_rented) * receita_p_mod_corrigida
-        manut   = (modules_owned + modules_rented) * manut_p_mod_corrigida
-        novos_modulos_comprados = 0
-        
-        # Aportes
-        aporte_mes = sum(a.get('valor', 0.0) for a in cfg_global['contributions'] if a.get('mes') == m)
-        caixa += aporte_mes
-        investimento_total += aporte_mes
-        
-        # --- Pagamento dos Financiamentos Ativos ---
-        parcela_terreno_mensal_total = 0.0
-        juros_terreno_mensal_total = 0.0
-        amortizacao_terreno_mensal_total = 0.0
-        
-        # Gastos Operacionais (Aluguel + Parcelas de Terrenos Novos)
-        # parcelas_terrenos_novos_mensal_corrente representa o custo do terreno para os módulos próprios (owned)
-        gastos_operacionais = aluguel_mensal_corrente + parcelas_terrenos_novos_mensal_corrente
-        lucro_operacional = receita - manut - gastos_operacionais
-        
-        # Processa todos os financiamentos ativos
-        for fin in financiamentos_ativos:
-            if fin['saldo_devedor'] > 0 and fin['parcelas_restantes'] > 0:
-                juros_terreno_mes = fin['saldo_devedor'] * fin['taxa_juros_mensal']
-                amortizacao_terreno_mes = fin['amortizacao_mensal']
-                parcela_terreno_mes = juros_terreno_mes + amortizacao_terreno_mes
-                
-                # Acumula os totais do mês
-                parcela_terreno_mensal_total += parcela_terreno_mes
-                juros_terreno_mensal_total += juros_terreno_mes
-                amortizacao_terreno_mensal_total += amortizacao_terreno_mes
-                
-                # Atualiza o saldo e parcelas
-                fin['saldo_devedor'] -= amortizacao_terreno_mes
-                fin['parcelas_restantes'] -= 1
-                
-                # Acumuladores globais
-                juros_acumulados += juros_terreno_mes
-                amortizacao_acumulada += amortizacao_terreno_mes
-                
-                # Investimento em terrenos (apenas a amortização)
-                investimento_em_terrenos += amortizacao_terreno_mes
-        
-        # O equity do terreno inicial é a amortização acumulada
-        equity_terreno_inicial = amortizacao_acumulada
-        
-        # Remove os financiamentos quitados (não é necessário, mas é bom para limpeza)
-        financiamentos_ativos = [fin for fin in financiamentos_ativos if fin['saldo_devedor'] > 0 and fin['parcelas_restantes'] > 0]
+    columns = get_result_cache().get_or_compute(simulador.canonical_config(cfg), compute=get_incremental_simulator().run)
+    return simulador.result_frame(columns, float32=FLOAT32_FRAMES)
 
-        caixa += lucro_operacional
-        
-        # O pagamento das parcelas do terreno é um gasto, já subtraído do caixa
-        caixa -= parcela_terreno_mensal_total
-        
-        # Distribuição (Retiradas + Fundo) limitada ao lucro e ao caixa
-        fundo_mes_total = 0.0
-        retirada_mes_efetiva = 0.0
-        
-        # 1. Calcular a base de lucro para distribuição (Lucro Operacional - Parcela Terreno Total)
-        lucro_distribuivel = lucro_operacional - parcela_terreno_mensal_total
-        lucro_acumulado_anual += lucro_distribuivel # Acumula o lucro para o reinvestimento anual
-        
-        if lucro_distribuivel > 0:
-            base = lucro_distribuivel
-            
-            # Calcular retiradas e fundo potenciais
-            retirada_potencial = sum(base * (r['percentual'] / 100.0) for r in cfg_global['withdrawals'] if m >= r['mes'])
-            fundo_potencial    = sum(base * (f['percentual'] / 100.0) for f in cfg_global['reserve_funds'] if m >= f['mes'])
-            
-            # Aplicar limite máximo de retirada
-            if cfg_global['max_withdraw_value'] > 0 and retirada_potencial > cfg_global['max_withdraw_value']:
-                retirada_mes_efetiva = cfg_global['max_withdraw_value']
-                fundo_mes_total = fundo_potencial
-            else:
-                retirada_mes_efetiva = retirada_potencial
-                fundo_mes_total = fundo_potencial
-            
-            total_distrib = retirada_mes_efetiva + fundo_mes_total
-            
-            # 2. Limitar a distribuição ao caixa disponível (após todas as entradas e saídas)
-            caixa_apos_operacional = caixa 
-            
-            if total_distrib > caixa_apos_operacional:
-                if caixa_apos_operacional > 0:
-                    proporcao = caixa_apos_operacional / total_distrib
-                    retirada_mes_efetiva *= proporcao
-                    fundo_mes_total *= proporcao
-                else:
-                    retirada_mes_efetiva = 0.0
-                    fundo_mes_total = 0.0
-        
-        # 3. Atualizar o caixa e acumuladores
-        # Verifica se há caixa suficiente antes de descontar retiradas e fundo
-        total_a_descontar = retirada_mes_efetiva + fundo_mes_total
-        if caixa >= total_a_descontar:
-            caixa -= total_a_descontar
-            retiradas_ac += retirada_mes_efetiva
-            fundo_ac += fundo_mes_total
-        else:
-            # Se não há caixa suficiente, não desconta nada
-            retirada_mes_efetiva = 0.0
-            fundo_mes_total = 0.0
-        
-        # Acumuladores de desembolso corrente
-        aluguel_acumulado += aluguel_mensal_corrente
-        parcelas_novas_acumuladas += parcelas_terrenos_novos_mensal_corrente
-        
-        # Reinvestimento anual (baseado no caixa disponível e lucro acumulado anual)
-        if m % 12 == 0:
-            
-            # Usa o caixa disponível para reinvestimento, mas apenas se for positivo
-            caixa_para_reinvestir = max(0, caixa) if lucro_acumulado_anual > 0 else 0
-            lucro_acumulado_anual = 0.0 # Reseta o lucro acumulado
-            
-            alvo = land_strategy
-            if land_strategy == 'alternate':
-                alvo = 'owned' if ((m // 12) % 2 == 0) else 'rented'
-                
-            custo_modulo = custo_modulo_atual_corrigido
-            
-            # Custo total para comprar 1 módulo + 1 terreno (entrada)
-            custo_total_owned_unitario = custo_modulo + (valor_compra_terreno * (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0) / modules_init)
-            
-            if alvo == 'owned' and custo_total_owned_unitario > 0:
-                # Quantidade de módulos que podem ser comprados
-                novos_modulos_comprados = int(caixa_para_reinvestir // custo_total_owned_unitario)
-            elif alvo == 'rented' and custo_modulo > 0:
-                novos_modulos_comprados = int(caixa_para_reinvestir // custo_modulo)
-            else:
-                novos_modulos_comprados = 0
-            
-            if novos_modulos_comprados > 0:
-                
-                if alvo == 'owned':
-                    custo_da_compra = novos_modulos_comprados * custo_total_owned_unitario
-                    
-                    # Custo do módulo
-                    custo_modulos = novos_modulos_comprados * custo_modulo
-                    historical_value_owned += custo_modulos
-                    modules_owned += novos_modulos_comprados
-                    
-                    # Custo da entrada do terreno
-                    valor_entrada_novo_terreno = novos_modulos_comprados * (valor_compra_terreno * (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0) / modules_init)
-                    
-                    # O reinvestimento é feito com o lucro, o caixa é ajustado
-                    caixa -= custo_da_compra
-                    investimento_total += custo_da_compra
-                    investimento_em_terrenos += valor_entrada_novo_terreno
-                    
-                    # Adiciona a parcela mensal do terreno para os novos módulos comprados
-                    parcelas_terrenos_novos_mensal_corrente += novos_modulos_comprados * parcela_p_novo_terreno_corrigido
-                    
-                    # Adiciona os novos financiamentos à lista (1 financiamento por módulo/terreno)
-                    valor_unitario_terreno = valor_compra_terreno / modules_init
-                    valor_unitario_financiado = valor_unitario_terreno * (1 - (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0))
-                    
-                    if cfg_owned['land_installments'] > 0 and valor_unitario_financiado > 0:
-                        amortizacao_mensal_novo = valor_unitario_financiado / cfg_owned['land_installments']
-                        
-                        for _ in range(novos_modulos_comprados):
-                            financiamentos_ativos.append({
-                                'valor_total': valor_unitario_terreno,
-                                'saldo_devedor': valor_unitario_financiado,
-                                'parcelas_restantes': cfg_owned['land_installments'],
-                                'parcela_mensal': amortizacao_mensal_novo + (valor_unitario_financiado * taxa_juros_mensal),
-                                'taxa_juros_mensal': taxa_juros_mensal,
-                                'amortizacao_mensal': amortizacao_mensal_novo,
-                                'mes_aquisicao': m,
-                                'valor_original_terreno': valor_unitario_terreno
-                            })
-                        terrenos_adquiridos += novos_modulos_comprados
-                        
-                else: # 'rented'
-                    custo_da_compra = novos_modulos_comprados * custo_modulo
-                    historical_value_rented += custo_da_compra
-                    modules_rented += novos_modulos_comprados
-                    
-                    caixa -= custo_da_compra
-                    investimento_total += custo_da_compra
-                    
-                    # Adiciona o aluguel mensal para os novos módulos alugados
-                    aluguel_mensal_corrente += novos_modulos_comprados * aluguel_p_novo_mod_corrigido
-            
-            # Correção anual
-            correction_factor = 1 + correction_rate_pct
-            custo_modulo_atual_corrigido  *= correction_factor
-            receita_p_mod_corrigida       *= correction_factor
-            manut_p_mod_corrigida         *= correction_factor
-            aluguel_mensal_corrente       *= correction_factor
-            parcelas_terrenos_novos_mensal_corrente *= correction_factor
-            aluguel_p_mod_corrigido       *= correction_factor
-            aluguel_p_novo_mod_corrigido  *= correction_factor
-            parcela_p_novo_terreno_corrigido *= correction_factor
-            
-            # Corrige o valor total de cada financiamento ativo
-            for fin in financiamentos_ativos:
-                # O valor total (original) do terreno é corrigido
-                fin['valor_total'] *= (1 + land_appreciation_rate_pct)
-                # A taxa de juros não é corrigida anualmente, apenas o valor do terreno
-                
-        # --- Cálculo dos Novos KPIs ---
-        divida_futura_total = 0.0
-        valor_mercado_total = 0.0
-        
-        for fin in financiamentos_ativos:
-            # Valor de Mercado Total (apreciação mensal)
-            valor_mercado_total += fin['valor_total'] * ((1 + land_appreciation_rate_pct) ** (1/12))
-            
-            # Dívida Futura Total (Saldo Devedor + Juros Futuros)
-            saldo_devedor_atual = fin['saldo_devedor']
-            
-            if saldo_devedor_atual > 0:
-                # Juros futuros: (Parcelas Restantes * Parcela Mensal) - Saldo Devedor
-                # Usando a fórmula simplificada: saldo_devedor * taxa_mensal * parcelas_restantes
-                # Simplificação: Dívida Futura = Saldo Devedor + Juros sobre o Saldo Devedor (para o restante das parcelas)
-                # O cálculo da dívida futura já considera os juros futuros
-                divida_futura_total += saldo_devedor_atual + (saldo_devedor_atual * fin['taxa_juros_mensal'] * fin['parcelas_restantes'])
-        
-        # Patrimônio
-            # Patrimonio Líquido = Ativos (Módulos + Caixa + Fundo + Valor de Mercado Total) - Passivos (Dívida Futura Total)
-            ativos  = historical_value_owned + historical_value_rented + caixa + fundo_ac + valor_mercado_total
-            passivos= divida_futura_total
-            patrimonio_liquido = ativos - passivos
-        
-        # O Investimento Total Acumulado é a soma dos custos de aquisição (módulos e entradas de terreno)
-        desembolso_total = investimento_total + juros_acumulados + aluguel_acumulado + parcelas_novas_acumuladas
-        gastos_totais = manut + aluguel_mensal_corrente + juros_terreno_mensal_total + parcelas_terrenos_novos_mensal_corrente
-        
-        # A quantidade de terrenos é igual à quantidade de módulos próprios
-        terrenos_adquiridos = modules_owned
-        
-        # Riqueza Geral Acumulada = Patrimônio Líquido Final (o que você ainda tem)
-        riqueza_geral_acumulada = patrimonio_liquido
-        
-        # Riqueza Total Gerada = Patrimônio Líquido Final + Retiradas Acumuladas + Fundo de Reserva Acumulado
-        # Representa toda a riqueza criada pelo investimento (o que você tem + o que já sacou + o que guardou)
-        riqueza_total_gerada = patrimonio_liquido + retiradas_ac + fundo_ac
-        
-        # Riqueza Gerada (ganho líquido em relação ao investimento inicial)
-        riqueza_gerada = riqueza_total_gerada - investimento_inicial
-        
-        rows.append({
-            "Mês": m,
-            "Ano": (m - 1) // 12 + 1,
-            "Módulos Ativos": modules_owned + modules_rented,
-            "Módulos Alugados": modules_rented,
-            "Módulos Próprios": modules_owned,
-            "Receita": receita,
-            "Manutenção": manut,
-            "Aluguel": aluguel_mensal_corrente,
-            "Juros Terreno Inicial": juros_terreno_mensal_total,
-            "Amortização Terreno Inicial": amortizacao_terreno_mensal_total,
-            "Parcela Terreno Inicial": parcela_terreno_mensal_total,
-            "Parcelas Terrenos (Novos)": parcelas_terrenos_novos_mensal_corrente,
-            "Gastos": gastos_totais,
-            "Aporte": aporte_mes,
-            "Fundo (Mês)": fundo_mes_total,
-            "Retirada (Mês)": retirada_mes_efetiva,
-            "Caixa (Final Mês)": caixa,
-            "Investimento Total Acumulado": investimento_total,
-            "Fundo Acumulado": fundo_ac,
-            "Retiradas Acumuladas": retiradas_ac,
-            "Módulos Comprados no Ano": novos_modulos_comprados,
-            "Patrimônio Líquido": patrimonio_liquido,
-            "Equity Terreno Inicial": equity_terreno_inicial,
-            "Valor de Mercado Terreno": valor_mercado_total,
-            "Patrimônio Terreno": valor_mercado_total - divida_futura_total,
-            "Juros Acumulados": juros_acumulados,
-            "Amortização Acumulada": amortizacao_acumulada,
-            "Aluguel Acumulado": aluguel_acumulado,
-            "Parcelas Novas Acumuladas": parcelas_novas_acumuladas,
-            "Desembolso Total": desembolso_total,
-            # Novos KPIs
-            "Dívida Futura Total": divida_futura_total,
-            "Investimento em Terrenos": investimento_em_terrenos,
-            "Terrenos Adquiridos": terrenos_adquiridos,
-            "Valor de Mercado Total": valor_mercado_total,
-            "Riqueza Geral Acumulada": riqueza_geral_acumulada,
-            "Riqueza Total Gerada": riqueza_total_gerada,
-            "Riqueza Gerada": riqueza_gerada
-        })
-    
-    return pd.DataFrame(rows)
+@st.cache_data(show_spinner="Simulando cenários Monte Carlo...", max_entries=5, ttl=3600)
+def run_monte_carlo(cfg: dict, distributions: dict, n_paths: int, seed: int):
+    return simulador.run_monte_carlo(cfg, distributions, n_paths=n_paths, seed=seed)
+
+@st.cache_data(show_spinner="Calculando sensibilidade dos parâmetros...", max_entries=5, ttl=3600)
+def run_sensitivity(cfg: dict, delta: float):
+    return simulador.run_sensitivity(cfg, delta=delta)
+
+@st.cache_data(show_spinner="Simulando portfólio...", max_entries=5, ttl=3600)
+def run_portfolio(rows: list, base: dict):
+    return simulador.run_portfolio(rows, base=base)
+
+def format_amortization_table(df: pd.DataFrame):
+    return pd.DataFrame({c: fmt_brl_array(df[c]) if c != "Pagamento" else df[c].to_numpy() for c in df.columns})
+
+def debug_enabled():
+    # Painel do desenvolvedor: SIMULADOR_DEBUG=1 no ambiente ou ?debug=1 na URL
+    return os.environ.get("SIMULADOR_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+def profile_simulation(cfg: dict):
+    # Sem cache: o objetivo é medir o motor, não reaproveitar o resultado
+    profile = simulador.SimulationProfile(trace_memory=True)
+    simulador.run_simulation(cfg, profile=profile)
+    return profile
+
+# Parâmetros disponíveis na Busca de Meta: caminho -> (rótulo, chave do widget)
+GOAL_SEEK_FIELDS = {
+    'modules_init': ("Módulos Iniciais", "cfg_modules_init"),
+    'cost_per_module': ("Custo por Módulo (R$)", "cfg_cost_per_module"),
+    'revenue_per_module': ("Receita Mensal/Módulo (R$)", "cfg_revenue_per_module"),
+    'maintenance_per_module': ("Manutenção Mensal/Módulo (R$)", "cfg_maintenance_per_module"),
+    'general_correction_rate': ("Taxa de Correção Geral Anual (%)", "cfg_correction_rate"),
+    'land_appreciation_rate': ("Taxa de Valorização do Terreno Anual (%)", "cfg_land_appreciation_rate"),
+    'max_withdraw_value': ("Limite Máximo de Retirada Mensal (R$)", "cfg_max_withdraw_value"),
+    'owned.land_total_value': ("Valor Total do Terreno (R$)", "cfg_land_total_value"),
+    'owned.land_down_payment_pct': ("Percentual de Entrada (%)", "cfg_land_down_payment_pct"),
+    'owned.land_interest_rate': ("Taxa de Juros Anual do Terreno (%)", "cfg_land_interest_rate"),
+    'owned.land_installments': ("Número de Parcelas do Terreno", "cfg_land_installments"),
+    'rented.rent_value': ("Aluguel Mensal por Módulo - Inicial (R$)", "cfg_rent_value"),
+    'rented.rent_per_new_module': ("Aluguel Mensal por Módulo - Novos (R$)", "cfg_rent_per_new_module"),
+}
+SENSITIVITY_METRICS = {"Patrimônio Líquido": "Patrimônio Líquido Final", "roi_pct": "ROI Total (%)"}
+
+def field_label(path: str) -> str:
+    # Rótulo amigável de um campo da config ("secao.campo")
+    key = path[len('global.'):] if path.startswith('global.') else path
+    if key in GOAL_SEEK_FIELDS:
+        return GOAL_SEEK_FIELDS[key][0]
+    return {'owned.monthly_land_plot_parcel': "Parcela Mensal por Terreno (R$)",
+            'owned.land_grace_months': "Carência do Terreno (meses)",
+            'owned.land_balloon_pct': "Balão do Terreno (%)"}.get(key, key)
 
 # ---------------------------
 # Config da página + CSS (fiel à imagem)
@@ -695,42 +424,6 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
-# ---------------------------
-# Estado Inicial
-# ---------------------------
-def get_default_config():
-    # Retorna a configuração padrão com os novos campos globais
-    return {
-        'global': {
-            'years': 10, 
-            'general_correction_rate': 3.0, 
-            'max_withdraw_value': 0.0, 
-            'land_appreciation_rate': 3.0, 
-            'contributions': [], 
-            'withdrawals': [], 
-            'reserve_funds': [], 
-            'reinvestment_strategy': 'buy',
-            'cost_per_module': 75000.0,
-            'revenue_per_module': 4500.0,
-            'maintenance_per_module': 200.0,
-            'modules_init': 1,
-        },
-        'rented': {
-            'rent_value': 750.0,
-            'rent_per_new_module': 950.0
-        },
-        'owned': {
-            'land_total_value': 100000.0, 
-            'land_down_payment_pct': 20.0, 
-            'land_installments': 120, 
-            'land_interest_rate': 8.0,
-            'monthly_land_plot_parcel': 0.0, # Será calculado na interface
-        },
-        'strategy': {
-            'land_strategy': 'owned'
-        }
-    }
-
 # ---------------------------
 # Estrutura do Aplicativo Streamlit
 # ---------------------------
@@ -739,6 +432,7 @@ st.markdown("<div class='header'><div class='header-title'>Simulador Financeiro
 # Barra de Investimento Inicial no topo (conforme solicitado)
 # Sempre exibe o investimento inicial, nunca o acumulado
 total_invest = compute_initial_investment_total(st.session_state.config)
+st.session_state.invest_strip_value = total_invest
 
 st.markdown(f"""
     <div class="invest-strip">
@@ -748,13 +442,30 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # Tabs
-tab_config, tab_simul, tab_data = st.tabs(["⚙️ Configurações", "📈 Simulação", "📋 Dados"])
+tab_config, tab_simul, tab_data, tab_portfolio = st.tabs(["⚙️ Configurações", "📈 Simulação", "📋 Dados", "🏢 Portfólio"])
 
 # ---------------------------
 # CONFIGURAÇÕES (aba)
 # ---------------------------
-with tab_config:
+# Cada aba é um fragmento: interagir com um widget reexecuta só a própria aba.
+# Ações que mudam os resultados (executar, comparativo) chamam st.rerun() da página toda.
+@st.fragment
+def render_config_tab():
     st.markdown("<h3 class='section-title'>Parâmetros de Simulação</h3>", unsafe_allow_html=True)
+
+    # Valor aplicado pela Busca de Meta: precisa ser gravado antes de os widgets serem criados
+    if 'goal_seek_pending' in st.session_state:
+        gs_path, gs_value = st.session_state.pop('goal_seek_pending')
+        simulador.set_field(st.session_state.config, gs_path, gs_value)
+        if gs_path in GOAL_SEEK_FIELDS:
+            # Descarta o estado do widget para que ele reinicie com o valor da config
+            st.session_state.pop(GOAL_SEEK_FIELDS[gs_path][1], None)
+
+    # Cenário carregado da biblioteca: substitui a config e reinicia todos os widgets dela
+    if 'library_pending' in st.session_state:
+        st.session_state.config = st.session_state.pop('library_pending')
+        for key in [k for k in st.session_state if str(k).startswith('cfg_')]:
+            del st.session_state[key]
     
     # --- CARD 1: Parâmetros Globais + Valores por Módulo ---
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -849,6 +560,22 @@ with tab_config:
                 # Exibe o valor calculado
                 st.markdown(f"**Parcela Mensal por Terreno (R$) - Novos Módulos**")
                 st.markdown(f"**{fmt_brl(parcela_calculada)}**")
+            
+            # Tipo de financiamento: SAC/Price, carência e balão
+            c8, c9, c10 = st.columns(3)
+            loan_types = {'sac': "SAC (amortização constante)", 'price': "Price (parcela constante)"}
+            with c8:
+                cfg_o['land_loan_type'] = st.selectbox("Tipo de Financiamento", options=list(loan_types), format_func=lambda x: loan_types[x],
+                                                       index=list(loan_types).index(cfg_o.get('land_loan_type', 'sac')), key="cfg_land_loan_type")
+            with c9:
+                cfg_o['land_grace_months'] = st.number_input("Carência (meses só de juros)", min_value=0, value=int(cfg_o.get('land_grace_months', 0)), step=1, key="cfg_land_grace_months")
+            with c10:
+                cfg_o['land_balloon_pct'] = st.number_input("Balão na Última Parcela (%)", min_value=0.0, max_value=100.0, value=float(cfg_o.get('land_balloon_pct', 0.0)), step=5.0, format="%.2f", key="cfg_land_balloon_pct")
+            
+            with st.expander("📄 Tabela de Amortização do Terreno"):
+                tipo, carencia, balao = simulador.loans.loan_terms(cfg_o)
+                tabela = simulador.amortization_table(tipo, max(1, cfg_o['land_installments']), cfg_o['land_interest_rate'] / 100.0 / 12, carencia, balao)
+                st.dataframe(format_amortization_table(tabela.to_frame(valor_a_financiar)), use_container_width=True, hide_index=True, height=300)
                 
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -856,6 +583,20 @@ with tab_config:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("#### 💸 Fluxo de Caixa Adicional")
     
+    # Importação em lote (CSV com colunas tipo;mes;valor)
+    events_file = st.file_uploader("Importar Aportes/Retiradas/Fundos (CSV: tipo, mes, valor)", type=["csv"], key="events_csv")
+    if events_file is not None and st.session_state.get('events_csv_imported') != events_file.file_id:
+        try:
+            events = load_events_csv(events_file.getvalue())
+        except (ValueError, KeyError) as e:
+            st.error(f"Não foi possível importar o CSV: {e}")
+        else:
+            for key, entries in events.items():
+                cfg_g[key].extend(entries)
+            st.session_state.events_csv_imported = events_file.file_id
+            st.session_state.config_changed = True
+            st.success(f"Importados {sum(len(v) for v in events.values())} eventos.")
+    
     # Aportes
     st.markdown("##### Aportes Programados")
     c8, c9 = st.columns(2)
@@ -866,7 +607,7 @@ with tab_config:
         if new_contribution_value > 0:
             cfg_g['contributions'].append({'mes': new_contribution_month, 'valor': new_contribution_value})
             st.session_state.config_changed = True
-            st.rerun()
+            rerun_fragment()
     
     # Lógica de remoção de aportes (simplificada)
     temp_contributions = []
@@ -885,7 +626,7 @@ with tab_config:
             
     if len(temp_contributions) != len(cfg_g['contributions']):
         cfg_g['contributions'] = temp_contributions
-        st.rerun()
+        rerun_fragment()
             
     # Retiradas
     st.markdown("---")
@@ -898,7 +639,7 @@ with tab_config:
         if new_withdrawal_pct > 0:
             cfg_g['withdrawals'].append({'mes': new_withdrawal_month, 'percentual': new_withdrawal_pct})
             st.session_state.config_changed = True
-            st.rerun()
+            rerun_fragment()
 
     # Lógica de remoção de retiradas (simplificada)
     temp_withdrawals = []
@@ -917,7 +658,7 @@ with tab_config:
             
     if len(temp_withdrawals) != len(cfg_g['withdrawals']):
         cfg_g['withdrawals'] = temp_withdrawals
-        st.rerun()
+        rerun_fragment()
 
     # Fundo de Reserva
     st.markdown("---")
@@ -930,7 +671,7 @@ with tab_config:
         if new_reserve_pct > 0:
             cfg_g['reserve_funds'].append({'mes': new_reserve_month, 'percentual': new_reserve_pct})
             st.session_state.config_changed = True
-            st.rerun()
+            rerun_fragment()
             
     # Lógica de remoção de fundos (simplificada)
     temp_reserves = []
@@ -949,16 +690,89 @@ with tab_config:
             
     if len(temp_reserves) != len(cfg_g['reserve_funds']):
         cfg_g['reserve_funds'] = temp_reserves
-        st.rerun()
+        rerun_fragment()
             
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # --- CARD 4: Busca de Meta ---
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown("#### 🎯 Busca de Meta")
+    st.caption("Encontra o valor de um parâmetro que atinge a meta escolhida (ex.: módulos iniciais para equilíbrio até o mês 60).")
+
+    goal_fields = {path: label for path, (label, _) in GOAL_SEEK_FIELDS.items()}
+    for i, w in enumerate(cfg_g['withdrawals']):
+        goal_fields[f"withdrawals.{i}.percentual"] = f"Retirada a partir do Mês {w['mes']} (%)"
+    goal_metrics = {
+        'break_even_month': 'Mês de Equilíbrio',
+        'roi_pct': 'ROI Total (%)',
+        'net_profit': 'Lucro Líquido (R$)',
+        **{col: col for col in simulador.RESULT_COLUMNS if col != 'Mês'},
+    }
+    goal_conditions = {'eq': 'Igual a', 'ge': 'Maior ou igual a', 'le': 'Menor ou igual a'}
+
+    g1, g2, g3 = st.columns(3)
+    gs_field = g1.selectbox("Parâmetro", options=list(goal_fields), format_func=lambda x: goal_fields[x], key="gs_field")
+    gs_metric = g2.selectbox("Métrica", options=list(goal_metrics), format_func=lambda x: goal_metrics[x], key="gs_metric")
+    gs_condition = g3.selectbox("Condição", options=list(goal_conditions), format_func=lambda x: goal_conditions[x], key="gs_condition")
+
+    current_value = float(simulador.get_field(st.session_state.config, gs_field))
+    g4, g5, g6, g7 = st.columns(4)
+    gs_target = g4.number_input("Meta", value=60.0 if gs_metric == 'break_even_month' else 0.0, step=1.0, format="%.2f", key="gs_target")
+    # Contagens (ex.: módulos iniciais) não aceitam zero: o mínimo do campo limita o intervalo
+    gs_min = simulador.goalseek.field_minimum(st.session_state.config, gs_field)
+    gs_lo = g5.number_input("Mínimo do Parâmetro", min_value=None if gs_min is None else float(gs_min),
+                            value=0.0 if gs_min is None else float(gs_min), step=1.0, format="%.2f",
+                            key="gs_lo" if gs_min is None else f"gs_lo_{gs_field}")
+    gs_hi = g6.number_input("Máximo do Parâmetro", value=max(current_value * 2, 100.0), step=1.0, format="%.2f", key="gs_hi")
+    gs_month = g7.number_input("Mês da Métrica (0 = último)", min_value=0, max_value=cfg_g['years']*12, value=0, step=1, key="gs_month",
+                               disabled=gs_metric in simulador.goalseek.SUMMARY_METRICS)
+
+    if st.button("🔎 Buscar Valor", use_container_width=True, key="goal_seek_btn"):
+        if gs_lo >= gs_hi:
+            st.warning("O mínimo do parâmetro deve ser menor que o máximo.")
+        else:
+            with st.spinner("Buscando valor..."):
+                st.session_state.goal_seek_result = simulador.goal_seek(
+                    st.session_state.config, gs_field, gs_metric, gs_target, gs_lo, gs_hi,
+                    condition=gs_condition,
+                    method='bisect' if gs_condition != 'eq' or gs_metric == 'break_even_month' else 'secant',
+                    month=int(gs_month) or None,
+                    runner=get_incremental_simulator().run,
+                )
+                st.session_state.goal_seek_field = gs_field
+
+    gs_result = st.session_state.get('goal_seek_result')
+    if gs_result is not None and st.session_state.get('goal_seek_field') == gs_field:
+        if gs_result['status'] == 'found':
+            st.success(f"{goal_fields[gs_field]} = {gs_result['value']:,.4g} → {goal_metrics[gs_metric]}: {gs_result['metric']:,.2f} "
+                       f"({gs_result['evaluations']} simulações)")
+            if st.button("Aplicar Valor", key="goal_seek_apply_btn"):
+                st.session_state.goal_seek_pending = (gs_field, gs_result['value'])
+                st.session_state.goal_seek_result = None
+                st.session_state.config_changed = True
+                rerun_fragment()
+        elif gs_result['status'] == 'error':
+            st.error(f"A simulação falhou durante a busca ({gs_result['error']}). Ajuste o intervalo do parâmetro.")
+        elif gs_result['status'] == 'always':
+            st.info("A meta já é atendida em todo o intervalo informado.")
+        else:
+            st.warning("A meta não é atingida em nenhum ponto do intervalo informado.")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+    
     # Botão de Simulação
     st.markdown("---")
     if st.button("▶️ Executar Simulação", use_container_width=True, key="run_simulation_btn"):
-        st.session_state.simulation_df = run_simulation(st.session_state.config)
         st.session_state.config_changed = False
-        st.success("Simulação concluída com sucesso!")
+        # Config canônica: a mesma chave dos resultados gravados pela biblioteca de cenários e pelo servidor
+        cfg = simulador.canonical_config(st.session_state.config)
+        if compute_cache_key(cfg) in get_result_cache():
+            st.session_state.simulation_df = run_simulation(cfg)
+            st.session_state.simulation_config = cfg
+            st.success("Simulação concluída com sucesso!")
+        else:
+            # Sem resultado em cache: a aba Simulação desenha a execução ano a ano (com retomada incremental)
+            st.session_state.stream_config = cfg
         st.rerun()
 
     # Botão de Comparativo
@@ -967,59 +781,285 @@ with tab_config:
             st.warning("Execute a simulação primeiro.")
         else:
             # Calcula o número da estratégia
-            if st.session_state.comparison_df.empty:
-                strategy_num = 1
-            else:
-                strategy_num = len(st.session_state.comparison_df['Estratégia'].unique()) + 1
+            strategy_num = len(st.session_state.comparison) + 1
             strategy_name = st.text_input("Nome da Estratégia para Comparação", value=f"Estratégia {strategy_num}", key="comparison_name")
             
-            # Adiciona a coluna de estratégia
-            df_comp = st.session_state.simulation_df.copy()
-            df_comp['Estratégia'] = strategy_name
-            
-            if st.session_state.comparison_df.empty:
-                st.session_state.comparison_df = df_comp
-            else:
-                # Evita duplicatas se o nome for o mesmo
-                existing_strategies = st.session_state.comparison_df['Estratégia'].unique()
-                if strategy_name in existing_strategies:
-                    st.session_state.comparison_df = st.session_state.comparison_df[st.session_state.comparison_df['Estratégia'] != strategy_name]
-                
-                st.session_state.comparison_df = pd.concat([st.session_state.comparison_df, df_comp], ignore_index=True)
+            # Substitui a estratégia de mesmo nome (sem concatenar os resultados das demais)
+            st.session_state.comparison.add(strategy_name, st.session_state.get('simulation_config', st.session_state.config), st.session_state.simulation_df)
             
             st.success(f"Estratégia '{strategy_name}' adicionada ao comparativo!")
             st.rerun()
 
-    if not st.session_state.comparison_df.empty:
+    if st.session_state.comparison:
         st.markdown("---")
         st.markdown("##### Gerenciar Comparativo")
-        st.dataframe(st.session_state.comparison_df[['Estratégia']].drop_duplicates(), use_container_width=True, hide_index=True)
+        st.dataframe(pd.DataFrame({'Estratégia': st.session_state.comparison.names()}), use_container_width=True, hide_index=True)
+        r1, r2 = st.columns([0.7, 0.3])
+        strategy_to_remove = r1.selectbox("Estratégia", options=st.session_state.comparison.names(), key="remove_strategy_select", label_visibility="collapsed")
+        if r2.button("Remover", use_container_width=True, key="remove_strategy_btn"):
+            st.session_state.comparison.remove(strategy_to_remove)
+            st.rerun()
         if st.button("🗑️ Limpar Comparativo", use_container_width=True, key="clear_comparison_btn"):
-            st.session_state.comparison_df = pd.DataFrame()
+            st.session_state.comparison.clear()
             st.success("Comparativo limpo!")
             st.rerun()
 
+    # Biblioteca de cenários: salvar/carregar, importação em lote e execução das pendentes
+    st.markdown("---")
+    with st.expander("📚 Biblioteca de Cenários"):
+        library = get_scenario_library()
+        l1, l2 = st.columns([0.7, 0.3])
+        scenario_name = l1.text_input("Nome do Cenário", key="library_name", placeholder="Nome do cenário (vazio = automático)", label_visibility="collapsed")
+        if l2.button("💾 Salvar", use_container_width=True, key="library_save_btn"):
+            existing = library.find(compute_cache_key(simulador.canonical_config(st.session_state.config)))
+            if existing is not None:
+                st.info(f"Esta configuração já está salva como '{existing}'.")
+            else:
+                st.success(f"Cenário '{library.save(scenario_name.strip() or None, st.session_state.config)}' salvo.")
+
+        scenario_file = st.file_uploader("Importar Cenários (CSV ou JSON/JSONL, um cenário por linha)", type=["csv", "json", "jsonl"], key="library_file")
+        if scenario_file is not None and st.session_state.get('library_file_imported') != scenario_file.file_id:
+            try:
+                fmt = 'csv' if scenario_file.name.lower().endswith('.csv') else 'json'
+                imported = library.import_file(scenario_file.getvalue(), fmt=fmt)
+            except (ValueError, KeyError) as e:
+                st.error(f"Não foi possível importar os cenários: {e}")
+            else:
+                st.session_state.library_file_imported = scenario_file.file_id
+                st.success(f"{imported['added']} cenários importados ({imported['duplicates']} repetidos ignorados).")
+
+        scenario_names = library.names()
+        if scenario_names:
+            cache = get_result_cache()
+            pending = library.pending(cache)
+            st.caption(f"{len(scenario_names)} cenários salvos, {len(pending)} sem resultado calculado.")
+            l1, l2, l3 = st.columns([0.5, 0.25, 0.25])
+            selected_scenario = l1.selectbox("Cenário", options=scenario_names, key="library_select", label_visibility="collapsed")
+            if l2.button("Carregar", use_container_width=True, key="library_load_btn"):
+                st.session_state.library_pending = library.load(selected_scenario)
+                st.session_state.config_changed = True
+                st.rerun()
+            if l3.button("Remover", use_container_width=True, key="library_remove_btn"):
+                library.remove(selected_scenario)
+                rerun_fragment()
+
+            run_names = st.multiselect("Cenários para o Comparativo (vazio = todos)", options=scenario_names, key="library_run_names")
+            if st.button("▶️ Executar Pendentes e Comparar", use_container_width=True, key="library_run_btn"):
+                with st.spinner("Executando cenários pendentes..."):
+                    executed = library.run_pending(cache, names=run_names or None, store=st.session_state.comparison)
+                st.session_state.library_run_count = len(executed)
+                st.rerun()
+            if 'library_run_count' in st.session_state:
+                st.success(f"{st.session_state.pop('library_run_count')} cenários executados; comparativo atualizado.")
+            st.download_button("📥 Exportar Biblioteca (JSONL)", data=library.export_jsonl(), file_name="cenarios.jsonl",
+                               mime="application/jsonl", use_container_width=True, key="library_export_btn")
+
+    # A faixa de investimento inicial fica fora do fragmento: recarrega a página só quando ela muda
+    if compute_initial_investment_total(st.session_state.config) != st.session_state.get('invest_strip_value'):
+        st.rerun()
+
+with tab_config:
+    render_config_tab()
+
 # ---------------------------
 # SIMULAÇÃO (aba)
 # ---------------------------
-with tab_simul:
+STREAM_REDRAW_SECONDS = 0.1   # intervalo mínimo entre redesenhos da execução progressiva
+
+def cancel_streaming_run():
+    st.session_state.pop('stream_config', None)
+    st.session_state.stream_cancelled = True
+
+def render_streaming_run(cfg: dict):
+    # Desenha KPIs e gráfico a cada ano calculado (no máximo a cada STREAM_REDRAW_SECONDS);
+    # "Cancelar" interrompe o script e descarta a execução
+    st.button("⏹️ Cancelar Simulação", key="stream_cancel_btn", on_click=cancel_streaming_run)
+    progress = st.progress(0.0)
+    cards = st.empty()
+    chart = st.empty()
+    months = cfg['global']['years'] * 12
+    redesenho = 0.0
+    columns = None
+    # Pelo simulador incremental: retoma do melhor checkpoint e grava os checkpoints desta execução
+    for columns in get_incremental_simulator().iter_run(cfg):
+        done = len(columns['Mês'])
+        agora = time.perf_counter()
+        if done < months and agora - redesenho < STREAM_REDRAW_SECONDS:
+            continue
+        redesenho = agora
+        progress.progress(done / months, text=f"Ano {done // 12} de {months // 12}")
+        with cards.container():
+            k = st.columns(4)
+            with k[0]:
+                render_kpi_card("Patrimônio Líquido", fmt_brl(columns['Patrimônio Líquido'][-1]), SUCCESS_COLOR, "💰")
+            with k[1]:
+                render_kpi_card("Investimento Total", fmt_brl(columns['Investimento Total Acumulado'][-1]), SECONDARY_COLOR, "💼")
+            with k[2]:
+                render_kpi_card("Caixa", fmt_brl(columns['Caixa (Final Mês)'][-1]), INFO_COLOR, "🏦")
+            with k[3]:
+                render_kpi_card("Modulos Ativos", int(columns['Módulos Ativos'][-1]), PRIMARY_COLOR, "⚡")
+        fig = go.Figure()
+        fig.add_trace(line_trace(columns['Mês'], columns['Patrimônio Líquido'], mode='lines', name='Patrimônio Líquido', line=dict(color=SUCCESS_COLOR, width=3)))
+        fig.add_trace(line_trace(columns['Mês'], columns['Investimento Total Acumulado'], mode='lines', name='Investimento Total', line=dict(color=SECONDARY_COLOR, width=2, dash='dash')))
+        fig.update_xaxes(range=[1, months])
+        chart.plotly_chart(apply_plot_theme(fig, "Evolução do Investimento"), use_container_width=True, key=f"stream_chart_{done}")
+    if columns is not None:
+        get_result_cache().put(cfg, columns)
+        st.session_state.simulation_df = simulador.result_frame(columns, float32=FLOAT32_FRAMES)
+        st.session_state.simulation_config = cfg
+    st.session_state.pop('stream_config', None)
+    st.rerun()
+
+def render_config_analyses():
+    # Análise de incerteza (Monte Carlo)
+    with st.expander("🎲 Análise de Incerteza (Monte Carlo)"):
+        cfg_mc = st.session_state.config['global']
+        mc1, mc2, mc3 = st.columns(3)
+        mc_paths = mc1.number_input("Número de Cenários", min_value=100, max_value=20000, value=2000, step=100, key="mc_paths")
+        mc_seed = mc1.number_input("Semente", min_value=0, value=42, step=1, key="mc_seed")
+        mc_corr_std = mc2.number_input("Desvio da Correção Anual (p.p.)", min_value=0.0, value=1.0, step=0.1, format="%.2f", key="mc_corr_std")
+        mc_land_std = mc2.number_input("Desvio da Valorização Anual (p.p.)", min_value=0.0, value=2.0, step=0.1, format="%.2f", key="mc_land_std")
+        mc_rev_std = mc3.number_input("Desvio da Receita Anual (%)", min_value=0.0, value=10.0, step=1.0, format="%.2f", key="mc_rev_std")
+        
+        if st.button("🎲 Executar Monte Carlo", use_container_width=True, key="run_mc_btn"):
+            distributions = {
+                'general_correction_rate': {'dist': 'normal', 'mean': cfg_mc['general_correction_rate'], 'std': mc_corr_std},
+                'land_appreciation_rate': {'dist': 'normal', 'mean': cfg_mc['land_appreciation_rate'], 'std': mc_land_std},
+                'revenue_per_module': {'dist': 'normal', 'mean': 0.0, 'std': mc_rev_std},
+            }
+            st.session_state.mc_result = run_monte_carlo(st.session_state.config, distributions, int(mc_paths), int(mc_seed))
+        
+        mc = st.session_state.get('mc_result')
+        if mc is not None:
+            be = mc['break_even']
+            b = st.columns(3)
+            with b[0]:
+                render_kpi_card("Prob. de Atingir o Equilíbrio", f"{be['probability']*100:.1f}%", INFO_COLOR, "🎯")
+            with b[1]:
+                p50 = be['percentiles'].get(50)
+                render_kpi_card("Equilíbrio (Mediana)", f"Mês {p50}" if p50 else "N/A", WARNING_COLOR, "⚖️")
+            with b[2]:
+                p95 = be['percentiles'].get(95)
+                render_kpi_card("Equilíbrio (P95)", f"Mês {p95}" if p95 else "N/A", DANGER_COLOR, "⏳")
+            
+            # Janela própria: as faixas podem ser de outro horizonte que o resultado exibido
+            w0, w1 = chart_window(len(mc['months']), "mc_chart_window")
+            for col_mc, color in (("Patrimônio Líquido", SUCCESS_COLOR), ("Caixa (Final Mês)", PRIMARY_COLOR)):
+                bands = simulador.bands_to_frame(mc, col_mc).iloc[w0:w1]
+                pcols = [c for c in bands.columns if c != 'Mês']
+                # Faixas preenchidas (tonexty) exigem o mesmo eixo x em todos os percentis
+                bands = bands.iloc[simulador.charts.shared_indices(bands['Mês'], [bands[c] for c in pcols],
+                                                                    simulador.charts.MAX_POINTS_PER_SERIES)]
+                fig_mc = go.Figure()
+                # Faixas simétricas: P5-P95 (externa) e P25-P75 (interna)
+                for lo, hi, alpha in ((pcols[0], pcols[-1], 0.15), (pcols[1], pcols[-2], 0.3)):
+                    fig_mc.add_trace(go.Scatter(x=bands['Mês'], y=bands[hi], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                    fig_mc.add_trace(go.Scatter(x=bands['Mês'], y=bands[lo], mode='lines', line=dict(width=0), fill='tonexty',
+                                                fillcolor=f"rgba(40,167,69,{alpha})" if color == SUCCESS_COLOR else f"rgba(255,146,52,{alpha})",
+                                                name=f"{lo}-{hi}"))
+                fig_mc.add_trace(go.Scatter(x=bands['Mês'], y=bands['P50'], mode='lines', name='Mediana', line=dict(color=color, width=3)))
+                st.plotly_chart(apply_plot_theme(fig_mc, f"{col_mc} - Faixas de Percentis", h=400), use_container_width=True)
+    
+    # Análise de sensibilidade (tornado)
+    with st.expander("🌪️ Análise de Sensibilidade"):
+        s1, s2 = st.columns(2)
+        sens_delta = s1.number_input("Variação Aplicada (± %)", min_value=1.0, max_value=50.0, value=10.0, step=1.0, format="%.1f", key="sens_delta")
+        sens_metric = s2.selectbox("Métrica", options=list(SENSITIVITY_METRICS), format_func=lambda x: SENSITIVITY_METRICS[x], key="sens_metric")
+        
+        if st.button("🌪️ Executar Análise de Sensibilidade", use_container_width=True, key="run_sens_btn"):
+            st.session_state.sens_result = run_sensitivity(st.session_state.config, sens_delta / 100.0)
+        
+        sens = st.session_state.get('sens_result')
+        if sens is not None and not sens.empty:
+            base_value = sens.attrs['base'][sens_metric]
+            tornado = sens.sort_values(f"Amplitude {sens_metric}", kind="stable")
+            labels = [field_label(f) for f in tornado['Campo']]
+            fig_tornado = go.Figure()
+            fig_tornado.add_trace(go.Bar(y=labels, x=tornado[f"{sens_metric} -Δ"] - base_value, base=base_value, orientation='h',
+                                         name=f"-{sens_delta:.0f}%", marker_color=DANGER_COLOR))
+            fig_tornado.add_trace(go.Bar(y=labels, x=tornado[f"{sens_metric} +Δ"] - base_value, base=base_value, orientation='h',
+                                         name=f"+{sens_delta:.0f}%", marker_color=SUCCESS_COLOR))
+            fig_tornado.update_layout(barmode='overlay')
+            fig_tornado.add_vline(x=base_value, line_color=TEXT_COLOR, line_width=1)
+            st.plotly_chart(apply_plot_theme(fig_tornado, f"Tornado - {SENSITIVITY_METRICS[sens_metric]}", h=max(380, 32 * len(labels))), use_container_width=True)
+            
+            fmt_metric = fmt_brl if sens_metric == "Patrimônio Líquido" else (lambda v: f"{v:.2f}%")
+            st.dataframe(pd.DataFrame({
+                "Parâmetro": [field_label(f) for f in sens['Campo']],
+                "Valor Base": sens['Base'].map(lambda v: f"{v:,.2f}"),
+                f"{SENSITIVITY_METRICS[sens_metric]} (-)": sens[f"{sens_metric} -Δ"].map(fmt_metric),
+                f"{SENSITIVITY_METRICS[sens_metric]} (+)": sens[f"{sens_metric} +Δ"].map(fmt_metric),
+                "Elasticidade": [
+                    "N/A" if np.isnan(v) else f"{v:.3f}" + (" (unilateral)" if uni else "")
+                    for v, uni in zip(sens[f"Elasticidade {sens_metric}"], sens['Unilateral'])
+                ],
+            }), use_container_width=True, hide_index=True)
+            st.caption("Elasticidade: variação relativa da métrica (sobre o módulo da base) por variação relativa "
+                       "do parâmetro; positiva quando a métrica sobe com o parâmetro, mesmo com base negativa.")
+            if sens['Unilateral'].any():
+                st.caption("(unilateral): a perturbação -Δ foi limitada (ex.: contagem mínima de 1); "
+                           "a elasticidade usa o intervalo efetivamente simulado.")
+
+def render_debug_panel(df):
+    # Perfil por fase do motor e memória da sessão (apenas com a flag de depuração)
+    with st.expander("🛠️ Painel do Desenvolvedor"):
+        if st.button("⏱️ Perfilar Execução", use_container_width=True, key="run_profile_btn"):
+            st.session_state.sim_profile = profile_simulation(st.session_state.get('simulation_config', st.session_state.config))
+        
+        profile = st.session_state.get('sim_profile')
+        if profile is not None:
+            d = st.columns(4)
+            d[0].metric("Tempo Total", f"{profile.wall_time * 1000:.2f} ms")
+            d[1].metric("Pico de Memória", f"{(profile.memory_peak or 0) / 1024:,.0f} KiB")
+            d[2].metric("Blocos Alocados", f"{profile.counters.get('blocos_alocados', 0):,}")
+            d[3].metric("Coletas do GC", profile.counters.get('coletas_gc', 0))
+            
+            phases = profile.phase_frame()
+            fig_prof = go.Figure(go.Bar(x=phases['Tempo (ms)'], y=phases['Fase'], orientation='h', marker_color=PRIMARY_COLOR,
+                                        text=phases['Participação (%)'].map(lambda v: f"{v:.1f}%"), textposition='auto'))
+            fig_prof.update_yaxes(autorange="reversed")
+            st.plotly_chart(apply_plot_theme(fig_prof, "Tempo por Fase (ms)", h=340), use_container_width=True)
+            
+            st.dataframe(pd.DataFrame({"Contador": list(profile.counters), "Valor": [f"{v:,}" for v in profile.counters.values()]}),
+                         use_container_width=True, hide_index=True)
+            if profile.active_loans is not None and len(profile.active_loans):
+                meses = np.arange(1, len(profile.active_loans) + 1)
+                fig_loans = go.Figure(line_trace(meses, profile.active_loans, mode='lines', name='Coortes Ativas', line=dict(color=INFO_COLOR, width=2)))
+                st.plotly_chart(apply_plot_theme(fig_loans, "Financiamentos Ativos por Mês (coortes)", h=300), use_container_width=True)
+
+        # Memória ocupada pelo estado desta sessão e pelo resultado atual
+        st.markdown("##### Memória da Sessão")
+        mem = simulador.memory_report(st.session_state.to_dict())
+        m = st.columns(3)
+        m[0].metric("Sessão", f"{mem['Bytes'].sum() / 1024:,.0f} KiB")
+        m[1].metric("Resultado Atual", f"{simulador.nbytes(df) / 1024:,.0f} KiB")
+        m[2].metric("Comparativo", f"{st.session_state.comparison.memory_usage() / 1024:,.0f} KiB")
+        st.dataframe(mem.assign(KiB=mem['Bytes'] / 1024).drop(columns='Bytes').head(15), use_container_width=True, hide_index=True)
+        cols_mem = simulador.frame_memory(df)
+        st.dataframe(cols_mem.assign(KiB=cols_mem['Bytes'] / 1024).drop(columns='Bytes'), use_container_width=True, hide_index=True)
+
+@st.fragment
+def render_simulation_tab():
     st.markdown("<h3 class='section-title'>Resultados da Simulação</h3>", unsafe_allow_html=True)
+
+    if 'stream_config' in st.session_state:
+        render_streaming_run(st.session_state.stream_config)
+    if st.session_state.pop('stream_cancelled', False):
+        st.info("Simulação cancelada.")
     
-    if not st.session_state.comparison_df.empty:
+    if st.session_state.comparison:
         st.markdown("#### 📊 Comparativo de Estratégias")
         
-        dfc = st.session_state.comparison_df
+        store = st.session_state.comparison
         
-        # Resumo do comparativo
+        # Resumo do comparativo (KPIs cacheados por estratégia)
         summary_rows = []
-        for strategy in dfc['Estratégia'].unique():
-            df_strat = dfc[dfc['Estratégia'] == strategy]
-            summary = calculate_summary_metrics(df_strat)
-            final = df_strat.iloc[-1]
+        for strategy in store:
+            summary = store.summary(strategy)
             summary_rows.append({
                 "Estratégia": strategy,
-                "Patrimônio Líquido Final": fmt_brl(final['Patrimônio Líquido']),
-                "Investimento Total": fmt_brl(final['Investimento Total Acumulado']),
+                "Patrimônio Líquido Final": fmt_brl(summary['final_net_worth']),
+                "Investimento Total": fmt_brl(summary['total_investment']),
                 "ROI Total": f"{summary['roi_pct']:.1f}%",
                 "Ponto de Equilíbrio": summary['break_even_month']
             })
@@ -1036,12 +1076,10 @@ with tab_simul:
         }
         selected_metric = st.selectbox("Métrica para Comparação", options=list(metric_options.keys()), format_func=lambda x: metric_options[x], key="comp_metric_select")
         
-        fig_comp = px.line(
-            dfc, x="Mês", y=selected_metric, color='Estratégia',
-            color_discrete_map={'Comprado': PRIMARY_COLOR, 'Alugado': INFO_COLOR, 'Intercalado': WARNING_COLOR}
-        )
-        apply_plot_theme(fig_comp, f"Comparativo de {selected_metric}", h=450)
-        st.plotly_chart(fig_comp, use_container_width=True)
+        comp_months = max(len(store.columns(n)['Mês']) for n in store)
+        w0, w1 = chart_window(comp_months, "comp_chart_window")
+        comparison_key = tuple((n, store.key(n)) for n in store)
+        st.plotly_chart(build_comparison_figure(comparison_key, selected_metric, w0, w1, store), use_container_width=True)
     
     elif not st.session_state.simulation_df.empty:
         df = st.session_state.simulation_df
@@ -1098,78 +1136,54 @@ with tab_simul:
             </div>
         """, unsafe_allow_html=True)
 
-        # Gráficos (mantidos)
+        # Gráficos (mantidos): figuras cacheadas por resultado e período
+        w0, w1 = chart_window(len(df), "chart_window")
+        figs = build_result_figures(compute_cache_key(st.session_state.get('simulation_config', st.session_state.config)), w0, w1, df)
         g1, g2 = st.columns(2)
         with g1:
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df['Mês'], y=df['Patrimônio Líquido'], mode='lines', name='Patrimônio Líquido', line=dict(color=SUCCESS_COLOR, width=3)))
-            fig.add_trace(go.Scatter(x=df['Mês'], y=df['Investimento Total Acumulado'], mode='lines', name='Investimento Total', line=dict(color=SECONDARY_COLOR, width=2, dash='dash')))
-            st.plotly_chart(apply_plot_theme(fig, "Evolução do Investimento"), use_container_width=True)
+            st.plotly_chart(figs['evolucao'], use_container_width=True)
         
         with g2:
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df['Mês'], y=df['Receita'], mode='lines', name='Receita', line=dict(color=SUCCESS_COLOR, width=2)))
-            fig.add_trace(go.Scatter(x=df['Mês'], y=df['Gastos'], mode='lines', name='Gastos', line=dict(color=DANGER_COLOR, width=2)))
-            st.plotly_chart(apply_plot_theme(fig, "Receita vs Gastos"), use_container_width=True)
-        
-        # Módulos por ano (barras)
-        gp = df.groupby('Ano', as_index=False).agg({
-            'Módulos Próprios':'last',
-            'Módulos Alugados':'last',
-            'Módulos Ativos':'last'
-        })
-        fig_bar = go.Figure()
-        fig_bar.add_trace(go.Bar(x=gp['Ano'], y=gp['Módulos Ativos'], name='Módulos Ativos', marker_color=PRIMARY_COLOR))
-        st.plotly_chart(apply_plot_theme(fig_bar, "Evolução de Módulos por Ano", h=380), use_container_width=True)
+            st.plotly_chart(figs['receita'], use_container_width=True)
         
-        # Fluxo de Caixa Mensal (área empilhada)
-        flow = df[['Mês','Aporte','Fundo (Mês)','Retirada (Mês)']].copy()
-        flow['Retirada (Mês)'] = -flow['Retirada (Mês)']  # saída como negativo p/ visual
-        flow_melt = flow.melt(id_vars='Mês', var_name='Tipo', value_name='Valor')
-        fig_area = px.area(flow_melt, x='Mês', y='Valor', color='Tipo',
-                           color_discrete_map={"Aporte":SECONDARY_COLOR,"Fundo (Mês)":WARNING_COLOR,"Retirada (Mês)":"#9333EA"})
-        st.plotly_chart(apply_plot_theme(fig_area, "Fluxo de Caixa Mensal", h=380), use_container_width=True)
+        st.plotly_chart(figs['modulos'], use_container_width=True)
+        st.plotly_chart(figs['fluxo'], use_container_width=True)
+        st.plotly_chart(figs['performance'], use_container_width=True)
         
-        # Performance (ROI% + Investimento/ Caixa)
-        perf = df.copy()
-        perf['ROI %'] = np.where(perf['Investimento Total Acumulado']>0,
-                                 (perf['Patrimônio Líquido']-perf['Investimento Total Acumulado'])/perf['Investimento Total Acumulado']*100, 0)
-        fig_perf = go.Figure()
-        fig_perf.add_trace(go.Scatter(x=perf['Mês'], y=perf['Investimento Total Acumulado'], name='Investimento Total', line=dict(color=SECONDARY_COLOR)))
-        fig_perf.add_trace(go.Scatter(x=perf['Mês'], y=perf['Caixa (Final Mês)'], name='Caixa', line=dict(color=PRIMARY_COLOR)))
-        fig_perf.add_trace(go.Scatter(x=perf['Mês'], y=perf['ROI %'], name='ROI %', yaxis='y2', line=dict(color=INFO_COLOR, width=3)))
-        fig_perf.update_layout(
-            yaxis=dict(title='Valores (R$)'),
-            yaxis2=dict(title='ROI (%)', overlaying='y', side='right', showgrid=False)
-        )
-        st.plotly_chart(apply_plot_theme(fig_perf, "Performance do Investimento", h=420), use_container_width=True)
     
     else:
         st.info("💡 Configure os parâmetros na aba 'Configurações' e execute a simulação para ver os resultados.")
 
+    # Monte Carlo e sensibilidade usam a configuração atual, com ou sem comparativo
+    render_config_analyses()
+    if debug_enabled() and not st.session_state.simulation_df.empty:
+        render_debug_panel(st.session_state.simulation_df)
+
+with tab_simul:
+    render_simulation_tab()
+
 # ---------------------------
 # RELATÓRIOS / PLANILHA (aba)
 # ---------------------------
-with tab_data:
+@st.fragment
+def render_data_tab():
     st.markdown("<h3 class='section-title'>📋 Relatórios e Dados</h3>", unsafe_allow_html=True)
     
-    df_to_show = pd.DataFrame()
-    if not st.session_state.comparison_df.empty:
-        df_to_show = st.session_state.comparison_df
-    elif not st.session_state.simulation_df.empty:
-        df_to_show = st.session_state.simulation_df
+    store = st.session_state.comparison
     
-    if df_to_show.empty:
+    if not store and st.session_state.simulation_df.empty:
         st.info("💡 Execute uma simulação primeiro para ver os relatórios.")
     else:
-        base = df_to_show
         selected_strategy = None
         
-        if 'Estratégia' in base.columns:
-            selected_strategy = st.selectbox("Estratégia para análise", base['Estratégia'].unique(), key="relat_strategy_select")
-            df_analysis = base[base['Estratégia']==selected_strategy].copy()
+        if store:
+            selected_strategy = st.selectbox("Estratégia para análise", store.names(), key="relat_strategy_select")
+            df_analysis = store.frame(selected_strategy)
+            analysis_cfg = store.config(selected_strategy)
         else:
-            df_analysis = base.copy()
+            df_analysis = st.session_state.simulation_df
+            analysis_cfg = st.session_state.get('simulation_config', st.session_state.config)
+        analysis_key = compute_cache_key(analysis_cfg)
         
         # Análise por ponto no tempo
         st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -1230,16 +1244,151 @@ with tab_data:
             if not cols_to_show:
                 st.warning("Selecione ao menos uma coluna.")
             else:
-                df_disp = df_analysis.copy()
-                for col in (MONEY_COLS & set(df_disp.columns)):
-                    df_disp[col] = df_disp[col].apply(lambda x: fmt_brl(x) if pd.notna(x) else "-")
-                st.dataframe(df_disp[cols_to_show], use_container_width=True, hide_index=True)
+                # Paginação em blocos de anos: só a página visível é formatada e enviada ao navegador
+                p1, p2 = st.columns(2)
+                page_size = p1.selectbox("Linhas por página", options=[60, 120, 240, 360], index=1, key="table_page_size")
+                n_pages = max(1, -(-len(df_analysis) // page_size))
+                page = p2.number_input(f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1, step=1, key="table_page")
+                start = (min(page, n_pages) - 1) * page_size
+                stop = min(start + page_size, len(df_analysis))
+                st.dataframe(format_table_page(analysis_key, tuple(cols_to_show), start, stop, df_analysis), use_container_width=True, hide_index=True)
+                st.caption(f"Linhas {start + 1}–{stop} de {len(df_analysis)}")
             
-            excel_bytes = df_to_excel_bytes(df_analysis)
-            st.download_button(
-                "📥 Baixar Relatório Completo (Excel)",
-                data=excel_bytes,
-                file_name=f"relatorio_simulacao_{slug(selected_strategy or 'geral')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+        # Exportação: os bytes só são gerados ao clicar e ficam em cache pelo hash da config
+        export_formats = {'xlsx': "Excel (.xlsx)", 'csv': "CSV (.csv)"}
+        if simulador.export.parquet_available():
+            export_formats['parquet'] = "Parquet (.parquet)"
+        e1, e2 = st.columns(2)
+        export_fmt = e1.selectbox("Formato", options=list(export_formats), format_func=lambda x: export_formats[x], key="export_format")
+        export_scope = 'strategy'
+        if store:
+            export_scope = e2.radio("Conteúdo", options=['strategy', 'comparison'], horizontal=True, key="export_scope",
+                                    format_func=lambda x: "Estratégia selecionada" if x == 'strategy' else "Comparativo completo (uma aba por estratégia)")
+        
+        export_cache = get_export_cache()
+        if export_scope == 'comparison':
+            export_data = lambda: export_cache.comparison(store, export_fmt)
+            file_name = f"comparativo_estrategias.{export_fmt}"
+        else:
+            export_data = lambda: export_cache.run(analysis_cfg, df_analysis, export_fmt)
+            file_name = f"relatorio_simulacao_{slug(selected_strategy or 'geral')}.{export_fmt}"
+        st.download_button(
+            "📥 Baixar Relatório Completo",
+            data=export_data,
+            file_name=file_name,
+            mime=simulador.export.EXPORT_FORMATS[export_fmt],
+            use_container_width=True,
+            key="download_report_btn"
+        )
+
+with tab_data:
+    render_data_tab()
+
+# ---------------------------
+# PORTFÓLIO (aba)
+# ---------------------------
+# Campos editáveis por unidade; os demais vêm da configuração atual
+PORTFOLIO_FIELDS = {
+    'nome': "Unidade",
+    'modules_init': "Módulos Iniciais",
+    'cost_per_module': "Custo por Módulo (R$)",
+    'revenue_per_module': "Receita Mensal/Módulo (R$)",
+    'maintenance_per_module': "Manutenção Mensal/Módulo (R$)",
+    'rented.rent_value': "Aluguel Inicial/Módulo (R$)",
+    'rented.rent_per_new_module': "Aluguel Novos/Módulo (R$)",
+    'owned.land_total_value': "Valor do Terreno (R$)",
+    'owned.land_installments': "Parcelas do Terreno",
+    'owned.land_interest_rate': "Juros do Terreno (% a.a.)",
+    'owned.land_loan_type': "Financiamento",
+    'land_strategy': "Estratégia",
+}
+PORTFOLIO_OPTIONS = {'land_strategy': ['owned', 'rented', 'alternate'], 'owned.land_loan_type': list(simulador.LOAN_TYPES)}
+
+def default_portfolio_table(cfg: dict):
+    # Três unidades iniciais com os parâmetros da configuração atual
+    row = {f: simulador.get_field(cfg, f) for f in PORTFOLIO_FIELDS if f != 'nome'}
+    return pd.DataFrame([{'nome': f"Unidade {i}", **row} for i in range(1, 4)])
+
+@st.fragment
+def render_portfolio_tab():
+    st.markdown("<h3 class='section-title'>🏢 Portfólio de Unidades</h3>", unsafe_allow_html=True)
+    st.caption("Cada linha é uma unidade; os campos não listados (horizonte, correções, aportes...) vêm da aba Configurações. "
+               "Todas as unidades são simuladas juntas e consolidadas mês a mês.")
+
+    sites_file = st.file_uploader("Importar unidades (CSV: nome e campos da configuração)", type=["csv"], key="portfolio_csv")
+    if sites_file is not None:
+        try:
+            names, cfgs = simulador.site_configs(sites_file.getvalue(), st.session_state.config)
+            st.session_state.portfolio_table = pd.DataFrame(
+                [{'nome': n, **{f: simulador.get_field(c, f) for f in PORTFOLIO_FIELDS if f != 'nome'}} for n, c in zip(names, cfgs)])
+        except ValueError as e:
+            st.error(f"Erro ao importar unidades: {e}")
+    if 'portfolio_table' not in st.session_state:
+        st.session_state.portfolio_table = default_portfolio_table(st.session_state.config)
+
+    table = st.data_editor(
+        st.session_state.portfolio_table, num_rows="dynamic", use_container_width=True, hide_index=True, key="portfolio_editor",
+        column_config={
+            f: (st.column_config.SelectboxColumn(label, options=PORTFOLIO_OPTIONS[f]) if f in PORTFOLIO_OPTIONS else label)
+            for f, label in PORTFOLIO_FIELDS.items()
+        },
+    )
+
+    if st.button("▶️ Simular Portfólio", type="primary", use_container_width=True, key="run_portfolio_btn"):
+        try:
+            st.session_state.portfolio = run_portfolio(table.to_dict('records'), deepcopy(st.session_state.config))
+        except ValueError as e:
+            st.error(f"Erro na simulação do portfólio: {e}")
+
+    result = st.session_state.get('portfolio')
+    if result is None or not len(result):
+        st.info("💡 Edite ou importe as unidades e clique em 'Simular Portfólio'.")
+        return
+
+    total = result.consolidated_frame()
+    final = total.iloc[-1]
+    k1, k2, k3, k4 = st.columns(4)
+    with k1:
+        render_kpi_card("Patrimônio Líquido Total", fmt_brl(final['Patrimônio Líquido']), SUCCESS_COLOR, "🏦")
+    with k2:
+        render_kpi_card("Dívida Futura Total", fmt_brl(final['Dívida Futura Total']), DANGER_COLOR, "📉")
+    with k3:
+        render_kpi_card("Módulos Ativos", f"{int(final['Módulos Ativos']):,}".replace(",", "."), PRIMARY_COLOR, "🧩")
+    with k4:
+        render_kpi_card("Unidades", str(len(result)), INFO_COLOR, "🏢")
+
+    w0, w1 = chart_window(len(total), "portfolio_chart_window")
+    fig = go.Figure()
+    fig.add_trace(line_trace(total['Mês'][w0:w1], total['Patrimônio Líquido'][w0:w1], mode='lines', name='Patrimônio Líquido', line=dict(color=SUCCESS_COLOR, width=3)))
+    fig.add_trace(line_trace(total['Mês'][w0:w1], total['Dívida Futura Total'][w0:w1], mode='lines', name='Dívida Futura Total', line=dict(color=DANGER_COLOR, width=2)))
+    fig.add_trace(line_trace(total['Mês'][w0:w1], total['Investimento Total Acumulado'][w0:w1], mode='lines', name='Investimento Total', line=dict(color=SECONDARY_COLOR, width=2, dash='dash')))
+    st.plotly_chart(apply_plot_theme(fig, "Evolução Consolidada do Portfólio"), use_container_width=True)
+
+    summary = result.summary_frame()
+    for c in ("Patrimônio Líquido Final", "Dívida Futura Total", "Investimento Total"):
+        summary[c] = fmt_brl_array(summary[c])
+    summary["ROI Total (%)"] = summary["ROI Total (%)"].map(lambda v: f"{v:.1f}%")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    site = st.selectbox("Unidade para detalhar", result.names, key="portfolio_site_select")
+    site_df = result.site_frame(site)
+    fig_site = go.Figure()
+    fig_site.add_trace(line_trace(site_df['Mês'][w0:w1], site_df['Patrimônio Líquido'][w0:w1], mode='lines', name='Patrimônio Líquido', line=dict(color=SUCCESS_COLOR, width=3)))
+    fig_site.add_trace(line_trace(site_df['Mês'][w0:w1], site_df['Módulos Ativos'][w0:w1], mode='lines', name='Módulos Ativos', yaxis='y2', line=dict(color=PRIMARY_COLOR, width=2)))
+    fig_site.update_layout(yaxis2=dict(title='Módulos', overlaying='y', side='right', showgrid=False))
+    st.plotly_chart(apply_plot_theme(fig_site, f"Unidade: {site}", h=380), use_container_width=True)
+
+    export_cache = get_export_cache()
+    st.download_button(
+        "📥 Baixar Portfólio (Excel)",
+        # Nomes das unidades (na ordem) entram na chave: viram os títulos das abas
+        data=lambda: export_cache.get_or_build(('portfolio',) + tuple(zip(result.names, map(compute_cache_key, result.cfgs))),
+                                               lambda: simulador.export.portfolio_to_excel(total, result.frames())),
+        file_name="portfolio_unidades.xlsx",
+        mime=simulador.export.EXPORT_FORMATS['xlsx'],
+        use_container_width=True,
+        key="download_portfolio_btn"
+    )
+
+with tab_portfolio:
+    render_portfolio_tab()
@@ -0,0 +1,33 @@
+"""Simulador Financeiro de Investimentos - motor de simulação headless."""
+from .engine import (
+    ENGINE_VERSION,
+    MONEY_COLS,
+    COUNT_COLS,
+    RESULT_COLUMNS,
+    STATE_VARS,
+    FinancingLedger,
+    get_default_config,
+    compute_cache_key,
+    compute_initial_investment_total,
+    calculate_summary_metrics,
+    simulate_columns,
+    iter_simulation,
+    run_simulation,
+    compact_columns,
+    result_frame,
+)
+from .cache import ResultCache
+from .schedules import compile_schedules, load_events_csv
+from .loans import LOAN_TYPES, amortization_table, loan_table
+from .sweep import expand_grid, get_field, set_field, run_configs, run_sweep
+from .incremental import IncrementalSimulator, earliest_affected_month
+from .montecarlo import run_monte_carlo, bands_to_frame
+from .goalseek import goal_seek, metric_value
+from .sensitivity import numeric_fields, run_sensitivity
+from .comparison import ComparisonStore
+from .export import ExportCache, export_comparison, export_run
+from .charts import decimate, lttb_indices, series_budget, shared_indices
+from .profiling import PHASES, SimulationProfile
+from .memory import frame_memory, memory_report, nbytes
+from .portfolio import PortfolioResult, run_portfolio, simulate_portfolio_columns, site_configs
+from .library import ScenarioLibrary, canonical_config, read_scenarios
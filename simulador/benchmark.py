@@ -0,0 +1,224 @@
+"""Benchmarks do motor e dos caminhos de dados da interface.
+
+Mede, sobre uma matriz de entradas (horizonte, módulos iniciais, receita alta
+que compra muitos módulos por ano, tamanho das listas de aportes/retiradas e
+as três estratégias de terreno):
+
+  - run_simulation            (DataFrame completo)
+  - calculate_summary_metrics
+  - export.run_to_excel        (planilha da simulação única)
+  - comparativo                (ComparisonStore: inclusão, resumos e formato longo)
+
+Cada medida registra o melhor tempo e a mediana por chamada, a vazão (meses
+simulados/s ou linhas/s) e o pico de memória alocada (tracemalloc). O resultado pode ser
+gravado como linha de base em JSON e comparado com uma linha de base anterior:
+
+    python -m simulador.benchmark --save-baseline bench.json
+    python -m simulador.benchmark --baseline bench.json --threshold 0.25
+
+Com `--baseline`, o processo termina com código 1 se algum melhor tempo (ou pico
+de memória) piorar mais que `--threshold` (fração) em relação à linha de base.
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .engine import ENGINE_VERSION, calculate_summary_metrics, get_default_config, run_simulation
+from .sweep import set_field
+
+MATRIX = {
+    'years': [10, 20, 30],
+    'modules_init': [1, 10],
+    'revenue_per_module': [4500.0, 12000.0],
+    'events': [0, 120],
+    'land_strategy': ['owned', 'rented', 'alternate'],
+}
+QUICK_MATRIX = {
+    'years': [10, 30],
+    'modules_init': [1],
+    'revenue_per_module': [4500.0, 12000.0],
+    'events': [0, 120],
+    'land_strategy': ['owned', 'rented', 'alternate'],
+}
+# Cada amostra repete a função até durar pelo menos isso (como o timeit)
+MIN_SAMPLE_TIME = 0.02
+# Diferenças abaixo disso são ruído do relógio, não regressão
+MIN_TIME_DELTA = 0.0002
+
+
+def case_id(params: dict) -> str:
+    return ("y{years}-m{modules_init}-r{revenue_per_module:.0f}-e{events}-{land_strategy}").format(**params)
+
+def build_config(params: dict) -> dict:
+    """Configuração do caso: `events` aportes e `events` retiradas espalhados pelo horizonte."""
+    cfg = get_default_config()
+    for field in ('years', 'modules_init', 'revenue_per_module', 'land_strategy'):
+        set_field(cfg, field, params[field])
+    months = params['years'] * 12
+    n = params['events']
+    if n:
+        meses = np.linspace(1, months, n).astype(int).tolist()
+        cfg['global']['contributions'] = [{'mes': m, 'valor': 1000.0} for m in meses]
+        cfg['global']['withdrawals'] = [{'mes': m, 'percentual': 0.05} for m in meses]
+    return cfg
+
+def expand_matrix(matrix: dict):
+    names = list(matrix)
+    for values in itertools.product(*(matrix[n] for n in names)):
+        yield dict(zip(names, values))
+
+def _sample(func, number):
+    t0 = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - t0) / number
+
+def measure(func, repeat=5):
+    """Mede `func` em `repeat` amostras; retorna (melhor s, mediana s, pico de memória em bytes, retorno).
+
+    Cada amostra executa a função `number` vezes, com `number` dobrado até a
+    amostra durar `MIN_SAMPLE_TIME`. O melhor tempo por chamada é o menos
+    sensível a ruído da máquina e é o usado na comparação com a linha de base.
+    """
+    result = func()  # aquecimento (imports, caches de primeira chamada)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= MIN_SAMPLE_TIME:
+            break
+        number *= 2
+    times = [elapsed / number] + [_sample(func, number) for _ in range(repeat - 1)]
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), statistics.median(times), peak, result
+
+def _record(measured, units, unit_name):
+    best, median, peak, _ = measured
+    return {"best_s": best, "median_s": median, f"{unit_name}_per_s": units / best if best > 0 else None, "peak_bytes": peak}
+
+def run_benchmarks(matrix=MATRIX, repeat=5, export=True, comparison=True, progress=None):
+    """Executa a matriz e retorna o dicionário de resultados (formato da linha de base)."""
+    from .comparison import ComparisonStore
+    from .export import run_to_excel
+
+    results = {}
+    frames = {}
+    for params in expand_matrix(matrix):
+        cid = case_id(params)
+        cfg = build_config(params)
+        months = params['years'] * 12
+        measured = measure(lambda: run_simulation(cfg), repeat)
+        df = measured[-1]
+        entry = {"params": params, "run_simulation": _record(measured, months, "months")}
+        entry["calculate_summary_metrics"] = _record(measure(lambda: calculate_summary_metrics(df), repeat), months, "rows")
+        if export:
+            entry["run_to_excel"] = _record(measure(lambda: run_to_excel(df), max(1, repeat // 2)), months, "rows")
+        results[cid] = entry
+        frames.setdefault(params['years'], []).append((cid, cfg, df))
+        if progress:
+            progress(cid, entry)
+
+    if comparison:
+        # Comparativo com todas as estratégias de mesmo horizonte
+        for years, items in frames.items():
+
+            def aggregate():
+                store = ComparisonStore()
+                for cid, cfg, df in items:
+                    store.add(cid, cfg, df)
+                for name in store:
+                    store.summary(name)
+                return store.long_frame(["Mês", "Patrimônio Líquido"])
+
+            rows = sum(len(df) for _, _, df in items)
+            cid = f"comparison-y{years}-n{len(items)}"
+            results[cid] = {"params": {"years": years, "strategies": len(items)},
+                            "comparison": _record(measure(aggregate, repeat), rows, "rows")}
+            if progress:
+                progress(cid, results[cid])
+
+    return {
+        "meta": {
+            "engine_version": ENGINE_VERSION,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "cases": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold=0.25):
+    """Lista as regressões [(caso, medida, campo, base, atual, razão)] acima de `threshold`."""
+    regressions = []
+    for cid, entry in current["cases"].items():
+        base_entry = baseline.get("cases", {}).get(cid)
+        if base_entry is None:
+            continue
+        for bench, rec in entry.items():
+            base = base_entry.get(bench)
+            if bench == "params" or not isinstance(base, dict):
+                continue
+            t0, t1 = base["best_s"], rec["best_s"]
+            if t0 and t1 > t0 * (1 + threshold) and t1 - t0 > MIN_TIME_DELTA:
+                regressions.append((cid, bench, "best_s", t0, t1, t1 / t0))
+            m0, m1 = base.get("peak_bytes"), rec.get("peak_bytes")
+            if m0 and m1 > m0 * (1 + threshold):
+                regressions.append((cid, bench, "peak_bytes", m0, m1, m1 / m0))
+    return regressions
+
+def _print_entry(cid, entry, out):
+    parts = []
+    for bench, rec in entry.items():
+        if bench == "params":
+            continue
+        parts.append(f"{bench} {rec['best_s'] * 1000:.2f} ms / {rec['peak_bytes'] / 1024:.0f} KiB")
+    out.write(f"{cid:<40} " + " | ".join(parts) + "\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="simulador.benchmark", description="Benchmarks do simulador.")
+    parser.add_argument("--quick", action="store_true", help="Matriz reduzida (para CI)")
+    parser.add_argument("--repeat", type=int, default=5, help="Amostras por medida")
+    parser.add_argument("--no-export", action="store_true", help="Não mede a exportação para Excel")
+    parser.add_argument("--no-comparison", action="store_true", help="Não mede o comparativo")
+    parser.add_argument("--baseline", help="Linha de base JSON para comparação")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Piora máxima tolerada (fração, padrão 0.25)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Grava os resultados como nova linha de base")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    progress = None if args.quiet else (lambda cid, entry: _print_entry(cid, entry, sys.stdout))
+    current = run_benchmarks(QUICK_MATRIX if args.quick else MATRIX, repeat=args.repeat,
+                             export=not args.no_export, comparison=not args.no_comparison, progress=progress)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        for cid, bench, field, old, new, ratio in regressions:
+            sys.stdout.write(f"REGRESSÃO {cid} {bench} {field}: {old:.6g} -> {new:.6g} ({ratio:.2f}x)\n")
+        if regressions:
+            return 1
+        sys.stdout.write(f"Sem regressões acima de {args.threshold:.0%}.\n")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""Cache persistente de resultados, compartilhado entre processos.
+
+Cada resultado fica em `<raiz>/v<ENGINE_VERSION>/<compute_cache_key(cfg)>/` com
+dois blocos `.npy` (contagens int64 e valores float64, uma linha por coluna).
+A leitura usa `mmap_mode='r'`, então um acerto devolve colunas mapeadas em
+memória, sem cópia. A escrita é atômica (diretório temporário + rename), o que
+permite vários processos (réplicas do Streamlit, workers) usarem a mesma raiz.
+
+A remoção é LRU: cada acerto atualiza o mtime da entrada, e ao gravar as entradas
+mais antigas são apagadas até respeitar `max_bytes` / `max_entries`.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .engine import (
+    ENGINE_VERSION,
+    RESULT_COLUMNS,
+    INT_COLUMNS,
+    FLOAT_COLUMNS,
+    compute_cache_key,
+    simulate_columns,
+)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_META = "meta.json"
+
+
+def default_cache_dir():
+    return os.environ.get("SIMULADOR_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "simulador")
+
+class ResultCache:
+    """Armazena resultados de `simulate_columns` em disco, endereçados pela chave da config."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_entries=None):
+        self.root = os.path.join(path or default_cache_dir(), f"v{ENGINE_VERSION}")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def __contains__(self, key):
+        """Indica se a chave tem entrada gravada (sem ler os dados nem contar acerto/falha)."""
+        return os.path.isfile(os.path.join(self._entry(key), _META))
+
+    def get(self, cfg, key=None):
+        """Retorna as colunas (memory-mapped) ou None se a config não estiver no cache."""
+        key = key or compute_cache_key(cfg)
+        path = self._entry(key)
+        try:
+            with open(os.path.join(path, _META), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["int_columns"] != INT_COLUMNS or meta["float_columns"] != FLOAT_COLUMNS:
+                raise ValueError("esquema de colunas diferente")
+            contagens = np.load(os.path.join(path, "contagens.npy"), mmap_mode="r")
+            valores = np.load(os.path.join(path, "valores.npy"), mmap_mode="r")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError):
+            # Entrada corrompida ou de outro esquema: descarta e recalcula
+            shutil.rmtree(path, ignore_errors=True)
+            self.misses += 1
+            return None
+        try:
+            os.utime(os.path.join(path, _META))
+        except OSError:
+            pass
+        self.hits += 1
+        columns = dict(zip(INT_COLUMNS, contagens))
+        columns.update(zip(FLOAT_COLUMNS, valores))
+        return {col: columns[col] for col in RESULT_COLUMNS}
+
+    def put(self, cfg, columns, key=None):
+        key = key or compute_cache_key(cfg)
+        final = self._entry(key)
+        if os.path.isdir(final):
+            return
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            np.save(os.path.join(tmp, "contagens.npy"), np.stack([columns[c] for c in INT_COLUMNS]).astype(np.int64, copy=False))
+            np.save(os.path.join(tmp, "valores.npy"), np.stack([columns[c] for c in FLOAT_COLUMNS]).astype(np.float64, copy=False))
+            with open(os.path.join(tmp, _META), "w", encoding="utf-8") as f:
+                json.dump({"int_columns": INT_COLUMNS, "float_columns": FLOAT_COLUMNS}, f, ensure_ascii=False)
+            os.rename(tmp, final)
+        except OSError:
+            # Outro processo gravou a mesma chave primeiro (ou falha de disco)
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.writes += 1
+        self.evict()
+
+    def get_or_compute(self, cfg, compute=simulate_columns):
+        key = compute_cache_key(cfg)
+        columns = self.get(cfg, key=key)
+        if columns is None:
+            columns = compute(cfg)
+            self.put(cfg, columns, key=key)
+        return columns
+
+    def _entries(self):
+        out = []
+        with os.scandir(self.root) as it:
+            for e in it:
+                if not e.is_dir() or e.name.startswith("."):
+                    continue
+                try:
+                    mtime = os.stat(os.path.join(e.path, _META)).st_mtime
+                    size = sum(f.stat().st_size for f in os.scandir(e.path))
+                except OSError:
+                    continue
+                out.append((mtime, size, e.path))
+        return out
+
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até respeitar os limites."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            over_count = self.max_entries is not None and count > self.max_entries
+            if not (over_bytes or over_count):
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            count -= 1
+            self.evictions += 1
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
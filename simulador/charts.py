@@ -0,0 +1,75 @@
+"""Redução de pontos para gráficos (LTTB) e orçamento de pontos por série.
+
+Os gráficos de horizonte longo, de muitas estratégias ou das faixas do Monte
+Carlo mandam ao navegador milhares de pontos que não cabem na largura do
+gráfico. `lttb_indices` escolhe, para cada série, os pontos que preservam o
+formato visual (Largest-Triangle-Three-Buckets), e `series_budget` divide um
+orçamento total de pontos entre as séries de um gráfico.
+"""
+import numpy as np
+
+# Largura útil típica de um gráfico, em pixels: mais de um ponto por pixel não aparece
+MAX_POINTS_PER_SERIES = 1000
+# Pontos somados de todas as séries de um gráfico
+TOTAL_POINT_BUDGET = 8000
+MIN_POINTS_PER_SERIES = 100
+# Acima deste total de pontos o gráfico passa a usar WebGL (Scattergl)
+WEBGL_THRESHOLD = 4000
+
+
+def series_budget(n_series, total=TOTAL_POINT_BUDGET):
+    """Pontos por série quando `n_series` séries dividem o orçamento total."""
+    per_series = total // max(int(n_series), 1)
+    return int(min(max(per_series, MIN_POINTS_PER_SERIES), MAX_POINTS_PER_SERIES))
+
+def lttb_indices(x, y, n_out):
+    """Índices dos `n_out` pontos escolhidos pelo LTTB (sempre inclui o primeiro e o último).
+
+    Com `n_out >= len(y)` todos os índices voltam; com `n_out == 2`, só o primeiro e
+    o último. `n_out < 2` não comporta as duas pontas e gera ValueError.
+    """
+    n_out = int(n_out)
+    if n_out < 2:
+        raise ValueError(f"O número de pontos (n_out) precisa ser pelo menos 2: {n_out}.")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out == 2:
+        return np.array([0, n - 1], dtype=np.int64)
+    # n_out - 2 baldes entre o primeiro e o último ponto
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < n_out - 1 else (n - 1, n)
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        # Área do triângulo (ponto escolhido anterior, candidato, média do próximo balde)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+def decimate(x, y, n_out):
+    """Retorna (x, y) reduzidos a no máximo `n_out` pontos."""
+    idx = lttb_indices(x, y, n_out)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+def shared_indices(x, series, n_out):
+    """Índices comuns a várias séries alinhadas (áreas empilhadas, faixas de percentis).
+
+    Une os pontos escolhidos pelo LTTB em cada série; o resultado pode passar um
+    pouco de `n_out`, mas mantém todas as séries no mesmo eixo x.
+    """
+    series = [np.asarray(s, dtype=float) for s in series]
+    if not series or len(series[0]) <= n_out:
+        return np.arange(len(x))
+    per_series = max(3, n_out // len(series))
+    return np.unique(np.concatenate([lttb_indices(x, s, per_series) for s in series]))
+
+def use_webgl(total_points, threshold=WEBGL_THRESHOLD):
+    return total_points > threshold
@@ -0,0 +1,86 @@
+"""Linha de comando do simulador.
+
+Lê configurações (JSON com um objeto/lista ou JSONL com um objeto por linha)
+no esquema de `get_default_config` e escreve os resultados em JSONL ou CSV:
+
+    python -m simulador configs.jsonl -o resultados.jsonl
+    python -m simulador config.json --summary --format csv
+
+Campos ausentes em cada configuração são preenchidos com os valores padrão.
+"""
+import argparse
+import csv
+import json
+import sys
+
+from .engine import (
+    RESULT_COLUMNS,
+    compute_cache_key,
+    calculate_summary_metrics,
+    merge_config,
+    read_configs,
+    simulate_columns,
+)
+
+
+def _write_jsonl(out, records):
+    for rec in records:
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+def run(configs, summary_only=False, cache=None):
+    """Gera um registro por configuração: chave de cache, KPIs e (opcional) colunas mensais."""
+    for i, partial in enumerate(configs):
+        cfg = merge_config(partial)
+        cols = cache.get_or_compute(cfg) if cache is not None else simulate_columns(cfg)
+        rec = {"config": i, "cache_key": compute_cache_key(cfg), "summary": calculate_summary_metrics(cols)}
+        if not summary_only:
+            rec["columns"] = {c: cols[c].tolist() for c in RESULT_COLUMNS}
+        yield rec
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="simulador", description="Executa simulações sem a interface Streamlit.")
+    parser.add_argument("input", nargs="?", default="-", help="Arquivo JSON/JSONL de configurações ('-' para stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Arquivo de saída ('-' para stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--summary", action="store_true", help="Escreve apenas os KPIs finais")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="Usa o cache persistente de resultados (padrão: $SIMULADOR_CACHE_DIR ou ~/.cache/simulador)")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache is not None:
+        from .cache import ResultCache
+        cache = ResultCache(args.cache or None)
+
+    if args.input == "-":
+        configs = read_configs(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            configs = read_configs(f)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        records = run(configs, summary_only=args.summary, cache=cache)
+        if args.format == "jsonl":
+            _write_jsonl(out, records)
+        elif args.summary:
+            writer = csv.writer(out)
+            writer.writerow(["config", "cache_key", "roi_pct", "break_even_month", "total_investment", "net_profit"])
+            for rec in records:
+                s = rec["summary"]
+                writer.writerow([rec["config"], rec["cache_key"], s["roi_pct"], s["break_even_month"],
+                                 s["total_investment"], s["net_profit"]])
+        else:
+            writer = csv.writer(out)
+            writer.writerow(["config"] + RESULT_COLUMNS)
+            for rec in records:
+                cols = rec["columns"]
+                for row in zip(*(cols[c] for c in RESULT_COLUMNS)):
+                    writer.writerow((rec["config"],) + row)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
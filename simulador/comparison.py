@@ -0,0 +1,133 @@
+"""Armazenamento do comparativo de estratégias.
+
+Cada estratégia guarda seu resultado uma única vez, indexado pelo nome e
+acompanhado da chave da configuração (`compute_cache_key`). Incluir, substituir
+ou remover uma estratégia é O(1) e não copia os resultados das demais; o
+resumo (KPIs) e o DataFrame de cada estratégia são calculados sob demanda e
+guardados. O formato "longo" (todas as estratégias empilhadas, com a coluna
+categórica "Estratégia") só é montado para gráficos e exportação, e é reaproveitado
+até a próxima alteração.
+
+As colunas são guardadas com os tipos de `compact_columns` (contagens em inteiros
+compactos; com `float32=True`, colunas monetárias em float32, só para exibição).
+"""
+from copy import deepcopy
+
+import numpy as np
+
+from .engine import RESULT_COLUMNS, calculate_summary_metrics, compact_columns, compute_cache_key
+
+STRATEGY_COLUMN = "Estratégia"
+
+
+class ComparisonStore:
+    """Estratégias do comparativo: nome -> (chave da config, config, colunas)."""
+
+    def __init__(self, float32=False):
+        self.float32 = float32
+        self._entries = {}   # nome -> {'key', 'cfg', 'columns', 'summary', 'frame'} (ordem de inclusão)
+        self._long = {}      # colunas -> DataFrame empilhado (descartado a cada alteração)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def names(self):
+        return list(self._entries)
+
+    def key(self, name):
+        return self._entries[name]['key']
+
+    def config(self, name):
+        return self._entries[name]['cfg']
+
+    def find(self, key):
+        """Nome da estratégia com a chave de configuração `key` (ou None)."""
+        return next((name for name, e in self._entries.items() if e['key'] == key), None)
+
+    def add(self, name, cfg, columns):
+        """Inclui ou substitui a estratégia `name`; retorna False se nada mudou.
+
+        `columns` pode ser um DataFrame ou um dicionário de colunas do motor.
+        """
+        key = compute_cache_key(cfg)
+        atual = self._entries.get(name)
+        if atual is not None and atual['key'] == key:
+            return False
+        self._entries[name] = {
+            'key': key,
+            'cfg': deepcopy(cfg),
+            'columns': compact_columns({col: columns[col] for col in RESULT_COLUMNS}, self.float32),
+            'summary': None,
+            'frame': None,
+        }
+        self._long.clear()
+        return True
+
+    def remove(self, name):
+        if self._entries.pop(name, None) is not None:
+            self._long.clear()
+
+    def clear(self):
+        self._entries.clear()
+        self._long.clear()
+
+    def columns(self, name):
+        return self._entries[name]['columns']
+
+    def frame(self, name):
+        """DataFrame mensal da estratégia (criado uma vez, sem cópia das colunas)."""
+        entry = self._entries[name]
+        if entry['frame'] is None:
+            import pandas as pd
+            entry['frame'] = pd.DataFrame(entry['columns'], columns=RESULT_COLUMNS, copy=False)
+        return entry['frame']
+
+    def summary(self, name):
+        """KPIs de `calculate_summary_metrics` mais o patrimônio líquido final (cacheados)."""
+        entry = self._entries[name]
+        if entry['summary'] is None:
+            cols = entry['columns']
+            summary = calculate_summary_metrics(cols)
+            summary['final_net_worth'] = float(cols['Patrimônio Líquido'][-1]) if len(cols['Mês']) else 0.0
+            entry['summary'] = summary
+        return entry['summary']
+
+    def summary_frame(self):
+        """Uma linha por estratégia com os KPIs (valores numéricos, sem formatação)."""
+        import pandas as pd
+        rows = [{STRATEGY_COLUMN: name, **self.summary(name)} for name in self._entries]
+        return pd.DataFrame(rows)
+
+    def long_frame(self, columns=None):
+        """Todas as estratégias empilhadas, com a coluna categórica "Estratégia".
+
+        `columns` restringe as colunas do resultado (ex.: ["Mês", "Patrimônio Líquido"]).
+        """
+        import pandas as pd
+        columns = tuple(columns or RESULT_COLUMNS)
+        if columns in self._long:
+            return self._long[columns]
+        names = self.names()
+        entries = [self._entries[n]['columns'] for n in names]
+        lengths = [len(e['Mês']) for e in entries]
+        data = {col: (np.concatenate([e[col] for e in entries]) if entries else np.array([])) for col in columns}
+        # Códigos no menor inteiro que comporta as estratégias (o nome é guardado uma vez)
+        codes = np.repeat(np.arange(len(names), dtype=np.min_scalar_type(-max(len(names), 1))), lengths)
+        data[STRATEGY_COLUMN] = pd.Categorical.from_codes(codes, categories=names)
+        df = pd.DataFrame(data)
+        self._long[columns] = df
+        return df
+
+    def memory_usage(self):
+        """Bytes ocupados: colunas das estratégias e formatos longos guardados.
+
+        Os DataFrames por estratégia são visões das colunas e não entram na conta.
+        """
+        total = sum(arr.nbytes for e in self._entries.values() for arr in e['columns'].values())
+        return total + sum(int(df.memory_usage(deep=True).sum()) for df in self._long.values())
@@ -0,0 +1,1033 @@
+"""Motor de simulação headless (sem Streamlit/Plotly).
+
+Pode ser importado por jobs em lote, testes e workers. O pandas só é importado
+quando um DataFrame é pedido (`run_simulation`), mantendo o cold start baixo.
+"""
+import json
+import hashlib
+import time
+
+import numpy as np
+
+from .loans import loan_table
+from .schedules import compile_schedules
+
+# --- COLUNAS DO RESULTADO ---
+MONEY_COLS = {
+    "Receita","Manutenção","Aluguel","Parcela Terreno Inicial","Parcelas Terrenos (Novos)","Gastos",
+    "Aporte","Fundo (Mês)","Retirada (Mês)","Caixa (Final Mês)","Investimento Total Acumulado",
+    "Fundo Acumulado","Retiradas Acumuladas","Patrimônio Líquido","Juros Terreno Inicial",
+    "Amortização Terreno Inicial","Equity Terreno Inicial","Valor de Mercado Terreno",
+    "Patrimônio Terreno","Juros Acumulados","Amortização Acumulada","Desembolso Total",
+    "Aluguel Acumulado","Parcelas Novas Acumuladas",
+    # Novos KPIs
+    "Dívida Futura Total", "Investimento em Terrenos", "Valor de Mercado Total"
+}
+COUNT_COLS = {"Mês","Ano","Módulos Ativos","Módulos Alugados","Módulos Próprios","Módulos Comprados no Ano", "Terrenos Adquiridos"}
+
+# Versão do modelo de cálculo: incrementar quando os resultados mudarem (invalida caches persistentes)
+ENGINE_VERSION = 1
+
+# Ordem das colunas do resultado mensal
+RESULT_COLUMNS = [
+    "Mês", "Ano", "Módulos Ativos", "Módulos Alugados", "Módulos Próprios", "Receita", "Manutenção",
+    "Aluguel", "Juros Terreno Inicial", "Amortização Terreno Inicial", "Parcela Terreno Inicial",
+    "Parcelas Terrenos (Novos)", "Gastos", "Aporte", "Fundo (Mês)", "Retirada (Mês)", "Caixa (Final Mês)",
+    "Investimento Total Acumulado", "Fundo Acumulado", "Retiradas Acumuladas", "Módulos Comprados no Ano",
+    "Patrimônio Líquido", "Equity Terreno Inicial", "Valor de Mercado Terreno", "Patrimônio Terreno",
+    "Juros Acumulados", "Amortização Acumulada", "Aluguel Acumulado", "Parcelas Novas Acumuladas",
+    "Desembolso Total", "Dívida Futura Total", "Investimento em Terrenos", "Terrenos Adquiridos",
+    "Valor de Mercado Total", "Riqueza Geral Acumulada", "Riqueza Total Gerada", "Riqueza Gerada",
+]
+# Contagens são inteiras; os demais campos são float64
+INT_COLUMNS = [c for c in RESULT_COLUMNS if c in COUNT_COLS]
+FLOAT_COLUMNS = [c for c in RESULT_COLUMNS if c not in COUNT_COLS]
+# Tipos das contagens nos DataFrames: o menor que comporta os valores da coluna
+# (o motor e o cache continuam em int64)
+COUNT_DTYPES = (np.int16, np.int32, np.int64)
+
+# ---------------------------
+# Configuração Padrão
+# ---------------------------
+def get_default_config():
+    # Retorna a configuração padrão com os novos campos globais
+    return {
+        'global': {
+            'years': 10, 
+            'general_correction_rate': 3.0, 
+            'max_withdraw_value': 0.0, 
+            'land_appreciation_rate': 3.0, 
+            'contributions': [], 
+            'withdrawals': [], 
+            'reserve_funds': [], 
+            'reinvestment_strategy': 'buy',
+            'cost_per_module': 75000.0,
+            'revenue_per_module': 4500.0,
+            'maintenance_per_module': 200.0,
+            'modules_init': 1,
+        },
+        'rented': {
+            'rent_value': 750.0,
+            'rent_per_new_module': 950.0
+        },
+        'owned': {
+            'land_total_value': 100000.0, 
+            'land_down_payment_pct': 20.0, 
+            'land_installments': 120, 
+            'land_interest_rate': 8.0,
+            'land_loan_type': 'sac',      # 'sac' (amortização constante) ou 'price' (parcela constante)
+            'land_grace_months': 0,       # carência: meses iniciais só de juros
+            'land_balloon_pct': 0.0,      # balão: % do valor financiado pago com a última parcela
+            'monthly_land_plot_parcel': 0.0, # Será calculado na interface
+        },
+        'strategy': {
+            'land_strategy': 'owned'
+        }
+    }
+
+def merge_config(partial: dict) -> dict:
+    """Completa uma configuração parcial com os valores de `get_default_config`."""
+    cfg = get_default_config()
+    for section, values in partial.items():
+        if isinstance(values, dict) and isinstance(cfg.get(section), dict):
+            cfg[section].update(values)
+        else:
+            cfg[section] = values
+    return cfg
+
+def read_configs(stream):
+    """Configs de um JSON (objeto ou lista) ou JSONL (um objeto por linha)."""
+    text = stream.read().strip()
+    if not text:
+        return []
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # JSONL: um objeto por linha
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def compute_cache_key(cfg: dict) -> str:
+    payload = json.dumps(cfg, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+def compute_initial_investment_total(cfg):
+    g = cfg['global']; o = cfg['owned']
+    # Investimento inicial = (Modulos iniciais * Custo por modulo) + Entrada do terreno para TODOS os modulos iniciais (se comprado)
+    total = g['modules_init'] * g['cost_per_module']
+    if cfg['strategy']['land_strategy'] in ['owned', 'alternate'] and o.get('land_total_value', 0) > 0:
+        # Valor total do terreno para TODOS os modulos iniciais
+        valor_total_terreno = o['land_total_value'] * g['modules_init']
+        total += valor_total_terreno * (o.get('land_down_payment_pct', 0) / 100.0)
+    return total
+
+def calculate_summary_metrics(df):
+    """KPIs finais de uma simulação (aceita DataFrame ou dicionário de colunas)."""
+    summary = {"roi_pct": 0, "break_even_month": "N/A", "total_investment": 0, "net_profit": 0}
+    if len(df) == 0 or 'Mês' not in df:
+        return summary
+    patrimonio = np.asarray(df['Patrimônio Líquido'], dtype=float)
+    investimento = np.asarray(df['Investimento Total Acumulado'], dtype=float)
+    if patrimonio.size == 0:
+        return summary
+    total_investment = float(investimento[-1])
+    summary["total_investment"] = total_investment
+    if total_investment > 0:
+        # Patrimônio Líquido Final deve ser a soma do tatal investido em módulos com o total investido em terrenos.
+        # PL = Ativos (Módulos + Caixa + Fundo + Valor de Mercado Total) - Passivos (Dívida Futura Total)
+        net_profit = float(patrimonio[-1]) - total_investment
+        summary["roi_pct"] = (net_profit / total_investment) * 100
+        summary["net_profit"] = net_profit
+    break_even = np.flatnonzero(patrimonio >= investimento)
+    if break_even.size:
+        break_even_month = int(np.asarray(df['Mês'])[break_even[0]])
+        summary["break_even_month"] = f"Mês {break_even_month}"
+    return summary
+
+# ---------------------------
+# Funções de Simulação
+# ---------------------------
+class FinancingLedger:
+    """Carteira de financiamentos de terrenos armazenada em arrays NumPy.
+
+    Contratos adquiridos no mesmo mês com os mesmos termos formam uma coorte com
+    uma quantidade; saldo, amortização e valor são sempre por contrato (unitários).
+
+    Os agregados usados a cada mês (juros, amortização, valor de mercado e dívida
+    futura) são mantidos como totais correntes, atualizados apenas quando uma
+    coorte entra, paga uma parcela ou é quitada; o custo mensal é O(1).
+
+    Coortes com tabela de amortização (Price, carência ou balão; ver `loans`)
+    referenciam a tabela pelo número de pagamentos feitos desde a entrada: os
+    juros, a amortização e a dívida futura do mês são consultas vetorizadas nas
+    colunas das tabelas, ponderadas por quantidade x valor financiado.
+    """
+
+    _FIELDS = ('quantidade', 'valor_financiado', 'amortizacao_mensal', 'taxa_juros_mensal',
+               'parcelas', 'pagas_na_entrada', 'valor_base', 'mes_aquisicao', 'ativo',
+               'inicio_tabela', 'peso')
+
+    def __init__(self, capacity=16):
+        self.size = 0
+        self.quantidade = np.zeros(capacity, dtype=np.int64)
+        self.valor_financiado = np.zeros(capacity)
+        self.amortizacao_mensal = np.zeros(capacity)
+        self.taxa_juros_mensal = np.zeros(capacity)
+        self.parcelas = np.zeros(capacity, dtype=np.int64)
+        self.pagas_na_entrada = np.zeros(capacity, dtype=np.int64)   # relógio do ledger na entrada
+        self.valor_base = np.zeros(capacity)                         # valor / índice de valorização na entrada
+        self.mes_aquisicao = np.zeros(capacity, dtype=np.int64)
+        self.ativo = np.zeros(capacity, dtype=bool)
+        self.inicio_tabela = np.full(capacity, -1, dtype=np.int64)   # posição nas colunas das tabelas (-1: SAC sem tabela)
+        self.peso = np.zeros(capacity)                                # quantidade x valor financiado
+        self.tabelas = []            # tabelas de amortização em uso (colunas concatenadas abaixo)
+        self._divida_tabela = np.zeros(0)
+        self._pagamento_tabela = np.zeros((3, 0))   # juros, amortização e dívida futura após o pagamento
+        self.realocacoes = 0         # vezes em que os arrays dobraram de capacidade
+        self.pagamentos = 0          # meses de pagamento processados (relógio)
+        self.indice_valorizacao = 1.0
+        self.quitacoes = {}          # relógio -> coortes quitadas nesse pagamento
+        self._zerar_totais()
+
+    def _zerar_totais(self):
+        self.n_ativas = 0
+        self.tot_valor_base = 0.0    # Σ q·valor_base
+        self.tot_saldo = 0.0         # Σ q·s
+        self.tot_juros = 0.0         # Σ q·r·s (juros do próximo mês)
+        self.tot_amort = 0.0         # Σ q·a
+        self.tot_juros_amort = 0.0   # Σ q·r·a
+        self.tot_juros_amort_n = 0.0 # Σ q·r·a·n
+        self.tot_juros_futuros = 0.0 # Σ q·s·r·n
+        self.agendadas = np.zeros(0, dtype=np.int64)   # coortes ativas com tabela (ordem de entrada)
+        self._base_agendadas = np.zeros(0, dtype=np.int64)   # posição na tabela menos o relógio na entrada
+        self._peso_agendadas = np.zeros(0)
+        self.divida_agendada = 0.0   # dívida futura das coortes com tabela
+
+    def __len__(self):
+        return self.n_ativas
+
+    def add(self, quantidade, valor_total, valor_financiado, parcelas, taxa_juros_mensal, mes, tabela=None):
+        """Adiciona uma coorte de `quantidade` contratos idênticos (valores por contrato).
+
+        Com `tabela` (`loans.AmortizationTable`), os pagamentos seguem a tabela e
+        `parcelas` passa a ser o número total de pagamentos (carência + parcelas).
+        """
+        if tabela is not None:
+            parcelas = len(tabela)
+        if quantidade <= 0 or parcelas <= 0 or valor_financiado <= 0:
+            return
+        if self.size == len(self.quantidade):
+            self.realocacoes += 1
+            for name in self._FIELDS:
+                arr = getattr(self, name)
+                setattr(self, name, np.concatenate([arr, np.full_like(arr, -1 if name == 'inicio_tabela' else 0)]))
+        i = self.size
+        q, s, n, r = quantidade, valor_financiado, parcelas, taxa_juros_mensal
+        if tabela is not None:
+            self._add_tabelada(i, q, valor_total, s, n, r, mes, tabela)
+            return
+        a = s / n
+        self.quantidade[i] = q
+        self.valor_financiado[i] = s
+        self.amortizacao_mensal[i] = a
+        self.taxa_juros_mensal[i] = r
+        self.parcelas[i] = n
+        self.pagas_na_entrada[i] = self.pagamentos
+        vb = valor_total / self.indice_valorizacao
+        self.valor_base[i] = vb
+        self.mes_aquisicao[i] = mes
+        self.ativo[i] = True
+        self.size += 1
+        self.quitacoes.setdefault(self.pagamentos + n, []).append(i)
+
+        self.n_ativas += 1
+        self.tot_valor_base += q * vb
+        self.tot_saldo += q * s
+        self.tot_juros += q * r * s
+        self.tot_amort += q * a
+        self.tot_juros_amort += q * r * a
+        self.tot_juros_amort_n += q * r * a * n
+        self.tot_juros_futuros += q * s * r * n
+
+    def _add_tabelada(self, i, q, valor_total, s, n, r, mes, tabela):
+        if not any(t is tabela for t in self.tabelas):
+            self.tabelas.append(tabela)
+            self._divida_tabela = np.concatenate([t.divida_futura for t in self.tabelas])
+            self._pagamento_tabela = np.concatenate([
+                (t.juros, t.amortizacao, np.append(t.divida_futura[1:], 0.0)) for t in self.tabelas], axis=1)
+        inicio = 0
+        for t in self.tabelas:
+            if t is tabela:
+                break
+            inicio += len(t) + 1
+        vb = valor_total / self.indice_valorizacao
+        self.quantidade[i] = q
+        self.valor_financiado[i] = s
+        self.amortizacao_mensal[i] = 0.0
+        self.taxa_juros_mensal[i] = r
+        self.parcelas[i] = n
+        self.pagas_na_entrada[i] = self.pagamentos
+        self.valor_base[i] = vb
+        self.mes_aquisicao[i] = mes
+        self.ativo[i] = True
+        self.inicio_tabela[i] = inicio
+        self.peso[i] = q * s
+        self.size += 1
+        self.quitacoes.setdefault(self.pagamentos + n, []).append(i)
+
+        self.n_ativas += 1
+        self.tot_valor_base += q * vb
+        self._set_agendadas(np.append(self.agendadas, i))
+        # Soma sequencial (na ordem de entrada), a mesma da carteira de unidades do portfólio
+        self.divida_agendada = sum((self._peso_agendadas
+                                    * self._divida_tabela[self._base_agendadas + self.pagamentos]).tolist())
+
+    def _set_agendadas(self, agendadas):
+        self.agendadas = agendadas
+        self._base_agendadas = self.inicio_tabela[agendadas] - self.pagas_na_entrada[agendadas]
+        self._peso_agendadas = self.peso[agendadas]
+
+    def copy(self):
+        """Cópia independente (usada nos checkpoints da simulação)."""
+        novo = FinancingLedger.__new__(FinancingLedger)
+        novo.__dict__.update(self.__dict__)
+        for name in self._FIELDS:
+            setattr(novo, name, getattr(self, name).copy())
+        novo.quitacoes = {k: list(v) for k, v in self.quitacoes.items()}
+        novo.tabelas = list(self.tabelas)
+        novo._set_agendadas(self.agendadas.copy())
+        return novo
+
+    def balances(self):
+        """Saldo devedor e parcelas restantes (por contrato) de cada coorte."""
+        n = self.size
+        pagas = self.pagamentos - self.pagas_na_entrada[:n]
+        saldo = self.valor_financiado[:n] - pagas * self.amortizacao_mensal[:n]
+        tabelada = self.inicio_tabela[:n] >= 0
+        if tabelada.any():
+            k = self.inicio_tabela[:n][tabelada] + np.minimum(pagas[tabelada], self.parcelas[:n][tabelada])
+            saldos = np.concatenate([t.saldo for t in self.tabelas])
+            saldo[tabelada] = self.valor_financiado[:n][tabelada] * saldos[k]
+        return saldo, self.parcelas[:n] - pagas
+
+    def pay_month(self):
+        """Paga a parcela do mês de todas as coortes e remove as quitadas.
+
+        Retorna (juros, amortização) totais do mês.
+        """
+        if self.n_ativas == 0:
+            return 0.0, 0.0
+        juros, amort = self.tot_juros, self.tot_amort
+        # s' = s - a e n' = n - 1 para todas as coortes ativas
+        self.tot_juros_futuros += self.tot_juros_amort - juros - self.tot_juros_amort_n
+        self.tot_juros_amort_n -= self.tot_juros_amort
+        self.tot_juros -= self.tot_juros_amort
+        self.tot_saldo -= amort
+        if self.agendadas.size:
+            # Pagamento do mês de cada coorte com tabela: uma consulta pela posição desde a
+            # entrada. A dívida futura após o pagamento de uma coorte quitada é 0, então a
+            # soma já vale para a carteira depois das quitações.
+            j, a, d = (self._peso_agendadas * self._pagamento_tabela[:, self._base_agendadas + self.pagamentos]).tolist()
+            juros += sum(j)
+            amort += sum(a)
+            self.divida_agendada = sum(d)
+        self.pagamentos += 1
+        for i in self.quitacoes.pop(self.pagamentos, ()):
+            self._remove(i)
+        return juros, amort
+
+    def _quita_antes(self, meses):
+        """Alguma coorte é quitada antes do último dos próximos `meses` pagamentos?"""
+        return any(self.pagamentos < c < self.pagamentos + meses for c in self.quitacoes)
+
+    def begin_block(self, meses):
+        """Totais correntes (juros, Σ q·r·a, amortização, saldo, Σ q·r·a·n, juros futuros) do bloco.
+
+        Sem quitações antes do último dos próximos `meses` pagamentos, os totais
+        seguem as recorrências lineares de `pay_month` e podem ser atualizados como
+        escalares pelo laço mensal, sem chamadas à carteira; `end_block` grava o
+        resultado. Retorna None se alguma coorte for quitada no meio do bloco ou
+        se houver coortes com tabela de amortização.
+        """
+        if self.agendadas.size or self._quita_antes(meses):
+            return None
+        return (self.tot_juros, self.tot_juros_amort, self.tot_amort, self.tot_saldo,
+                self.tot_juros_amort_n, self.tot_juros_futuros)
+
+    def end_block(self, meses, juros, saldo, juros_amort_n, juros_futuros):
+        """Grava os totais após os `meses` pagamentos do bloco e remove as coortes quitadas no último."""
+        if self.n_ativas == 0:
+            return
+        self.tot_juros = juros
+        self.tot_saldo = saldo
+        self.tot_juros_amort_n = juros_amort_n
+        self.tot_juros_futuros = juros_futuros
+        self.pagamentos += meses
+        for i in self.quitacoes.pop(self.pagamentos, ()):
+            self._remove(i)
+
+    def _remove(self, i):
+        q, r, a = int(self.quantidade[i]), float(self.taxa_juros_mensal[i]), float(self.amortizacao_mensal[i])
+        self.ativo[i] = False
+        self.n_ativas -= 1
+        if self.n_ativas == 0:
+            # Evita resíduos de ponto flutuante quando a carteira fica vazia
+            self._zerar_totais()
+            return
+        if self.inicio_tabela[i] >= 0:
+            self.tot_valor_base -= q * float(self.valor_base[i])
+            self._set_agendadas(self.agendadas[self.agendadas != i])
+            return
+        s = float(self.valor_financiado[i]) - int(self.parcelas[i]) * a
+        self.tot_valor_base -= q * float(self.valor_base[i])
+        self.tot_saldo -= q * s
+        self.tot_juros -= q * r * s
+        self.tot_amort -= q * a
+        self.tot_juros_amort -= q * r * a
+
+    def appreciate(self, fator):
+        """Corrige o valor de mercado de todos os terrenos ainda financiados."""
+        self.indice_valorizacao *= fator
+
+    def market_value(self, fator=1.0):
+        return self.tot_valor_base * self.indice_valorizacao * fator
+
+    def future_debt(self):
+        """Saldo devedor + juros sobre o saldo para as parcelas restantes."""
+        return self.tot_saldo + self.tot_juros_futuros + self.divida_agendada
+
+# Variáveis de estado que mudam ao longo do laço mensal (salvas nos checkpoints)
+STATE_VARS = (
+    'modules_owned', 'modules_rented', 'terrenos_adquiridos', 'investimento_em_terrenos',
+    'caixa', 'investimento_total', 'historical_value_owned', 'historical_value_rented',
+    'juros_acumulados', 'amortizacao_acumulada', 'aluguel_acumulado', 'parcelas_novas_acumuladas',
+    'aluguel_mensal_corrente', 'parcelas_terrenos_novos_mensal_corrente', 'fundo_ac', 'retiradas_ac',
+    'custo_modulo_atual_corrigido', 'receita_p_mod_corrigida', 'manut_p_mod_corrigida',
+    'aluguel_p_mod_corrigido', 'aluguel_p_novo_mod_corrigido', 'parcela_p_novo_terreno_corrigido',
+    'lucro_acumulado_anual',
+)
+
+# Séries gravadas a cada mês pela simulação; as demais colunas são derivadas delas em `_fill_columns`.
+# "Valor dos Módulos" não é coluna do resultado: é o valor histórico dos módulos próprios +
+# alugados, usado no patrimônio.
+SERIES = (
+    "Caixa (Final Mês)", "Investimento Total Acumulado", "Juros Acumulados", "Amortização Acumulada",
+    "Investimento em Terrenos", "Retiradas Acumuladas", "Fundo Acumulado", "Aluguel Acumulado",
+    "Parcelas Novas Acumuladas", "Aporte", "Juros Terreno Inicial", "Amortização Terreno Inicial",
+    "Retirada (Mês)", "Fundo (Mês)", "Valor de Mercado Total", "Dívida Futura Total", "Receita",
+    "Manutenção", "Aluguel", "Parcelas Terrenos (Novos)", "Valor dos Módulos",
+)
+
+def _fill_columns(contagens, valores, modulos, serie, inicio, investimento_inicial):
+    """Preenche as colunas a partir do mês `inicio+1` com as séries gravadas no laço.
+
+    `modulos` (próprios, alugados, comprados no ano) e `serie` (ordem de SERIES)
+    têm uma coluna por mês simulado. O mês é sempre o último eixo: com um eixo
+    de unidades antes dele (carteira de unidades), `investimento_inicial` é uma
+    coluna (unidades x 1).
+    """
+    months = contagens.shape[-1]
+    s = slice(inicio, months)
+    c = dict(zip(INT_COLUMNS, contagens))
+    v = dict(zip(FLOAT_COLUMNS, valores))
+    proprios, alugados, comprados = modulos
+    mes = np.arange(inicio + 1, months + 1)
+    c["Mês"][..., s] = mes
+    c["Ano"][..., s] = (mes - 1) // 12 + 1
+    c["Módulos Ativos"][..., s] = proprios + alugados
+    c["Módulos Alugados"][..., s] = alugados
+    c["Módulos Próprios"][..., s] = proprios
+    c["Módulos Comprados no Ano"][..., s] = comprados
+    c["Terrenos Adquiridos"][..., s] = proprios
+    for col, valores_col in zip(SERIES[:-1], serie):
+        v[col][..., s] = valores_col
+    (caixa, investimento_total, juros_ac, amort_ac, _, retiradas_ac, fundo_ac, aluguel_ac, parcelas_ac,
+     _, juros, amort, _, _, valor_mercado, divida, _, manut, aluguel, parcelas_novas, valor_modulos) = serie
+    # Patrimonio Líquido = Ativos (Módulos + Caixa + Fundo + Valor de Mercado Total) - Passivos (Dívida Futura Total)
+    patrimonio = valor_modulos + caixa + fundo_ac + valor_mercado - divida
+    # Riqueza Total Gerada = Patrimônio Líquido + Retiradas Acumuladas + Fundo de Reserva Acumulado
+    riqueza_total = patrimonio + retiradas_ac + fundo_ac
+    v["Parcela Terreno Inicial"][..., s] = juros + amort
+    v["Gastos"][..., s] = manut + aluguel + juros + parcelas_novas
+    v["Patrimônio Líquido"][..., s] = patrimonio
+    v["Equity Terreno Inicial"][..., s] = amort_ac
+    v["Valor de Mercado Terreno"][..., s] = valor_mercado
+    v["Patrimônio Terreno"][..., s] = valor_mercado - divida
+    v["Desembolso Total"][..., s] = investimento_total + juros_ac + aluguel_ac + parcelas_ac
+    v["Riqueza Geral Acumulada"][..., s] = patrimonio
+    v["Riqueza Total Gerada"][..., s] = riqueza_total
+    # Riqueza Gerada (ganho líquido em relação ao investimento inicial)
+    v["Riqueza Gerada"][..., s] = riqueza_total - investimento_inicial
+
+def _flush_series(contagens, valores, linhas_modulos, linhas_serie, inicio, fim, investimento_inicial):
+    """Converte as séries gravadas dos meses `inicio+1..fim` e preenche essas colunas; retorna os módulos."""
+    n = fim - inicio
+    modulos = np.fromiter(linhas_modulos, np.int64, 3 * n).reshape(n, 3).T
+    serie = np.fromiter(linhas_serie, np.float64, len(SERIES) * n).reshape(n, len(SERIES)).T
+    _fill_columns(contagens[:, :fim], valores[:, :fim], modulos, serie, inicio, investimento_inicial)
+    return modulos
+
+def _simulation_steps(cfg: dict, checkpoints=None, resume=None, profile=None, stream=False):
+    """Laço da simulação (ver `simulate_columns`) como gerador.
+
+    Com `stream=True`, as colunas de cada ano são preenchidas ao fim do bloco
+    anual e o gerador produz (último mês calculado, colunas completas); as
+    posições dos meses seguintes ainda não foram preenchidas. Sem `stream`, nada
+    é produzido e as colunas são preenchidas de uma vez no fim. O retorno do
+    gerador é o dicionário de colunas.
+    """
+    perfil = profile is not None
+    if perfil:
+        agora = time.perf_counter
+        t_preparacao = agora()
+    cfg_global = cfg['global']
+    cfg_owned = cfg['owned']
+    cfg_rented = cfg['rented']
+    cfg_strategy = cfg['strategy']
+
+    # Parâmetros Globais
+    months = cfg_global['years'] * 12
+    correction_rate_pct = cfg_global['general_correction_rate'] / 100.0
+    land_appreciation_rate_pct = cfg_global['land_appreciation_rate'] / 100.0
+    reinvestment_strategy = cfg_global['reinvestment_strategy']
+    
+    # Cronogramas de aportes e percentuais de retirada/fundo (compilados uma vez)
+    # (listas Python: o laço escalar evita escalares NumPy)
+    aportes, pct_retirada, pct_fundo = (a.tolist() for a in compile_schedules(cfg_global, months))
+    
+    # Valores por Módulo (Globais)
+    custo_modulo_atual = cfg_global['cost_per_module']
+    receita_p_mod = cfg_global['revenue_per_module']
+    manut_p_mod = cfg_global['maintenance_per_module']
+    
+    # Parâmetros de Terreno Alugado
+    aluguel_p_mod = cfg_rented['rent_value']
+    aluguel_p_novo_mod = cfg_rented['rent_per_new_module']
+    
+    # Parâmetros de Terreno Comprado
+    valor_compra_terreno = cfg_owned.get('land_total_value', 0.0)
+    parcela_p_novo_terreno = cfg_owned.get('monthly_land_plot_parcel', 0.0)
+    taxa_juros_anual = cfg_owned.get('land_interest_rate', 8.0) / 100.0
+    taxa_juros_mensal = taxa_juros_anual / 12
+    # Tabela de amortização (Price, carência ou balão); None no SAC simples
+    tabela_financiamento = loan_table(cfg_owned, cfg_owned['land_installments'], taxa_juros_mensal)
+    
+    # Estado Inicial
+    modules_init = cfg_global['modules_init']
+    
+    # Inicialização de variáveis
+    modules_owned = 0
+    modules_rented = 0
+    
+    # Variáveis para Terrenos Adquiridos (Novos KPIs)
+    terrenos_adquiridos = 0 # Contagem total de terrenos (inicial + novos)
+    investimento_em_terrenos = 0.0 # Soma das entradas + amortização
+    
+    # Carteira de financiamentos de terrenos (inicial + novos), agrupados em coortes
+    financiamentos_ativos = FinancingLedger()
+    
+    # Distribuição inicial dos módulos baseada na estratégia
+    land_strategy = cfg_strategy['land_strategy']
+    if land_strategy == 'owned':
+        modules_owned = modules_init
+    elif land_strategy == 'rented':
+        modules_rented = modules_init
+    elif land_strategy == 'alternate':
+        if valor_compra_terreno > 0:
+            modules_owned = modules_init
+        else:
+            modules_rented = modules_init
+    
+    # A quantidade de terrenos deve ser igual à quantidade de módulos próprios
+    terrenos_adquiridos = modules_owned
+    
+    caixa = 0.0
+    investimento_total = 0.0
+    historical_value_owned = modules_owned * custo_modulo_atual
+    historical_value_rented = modules_rented * custo_modulo_atual
+    
+    investimento_total += historical_value_owned + historical_value_rented
+    
+    # Armazena o investimento inicial para cálculo da Riqueza Gerada
+    investimento_inicial = investimento_total
+    
+    # Financiamento Terreno Inicial (apenas se a estratégia inicial for 'owned' ou 'alternate' e houver valor de terreno)
+    juros_acumulados = 0.0
+    amortizacao_acumulada = 0.0
+    aluguel_acumulado = 0.0
+    parcelas_novas_acumuladas = 0.0
+    
+    aluguel_mensal_corrente = modules_rented * aluguel_p_mod
+    
+    # A parcela por módulo próprio é a parcela calculada na interface
+    parcelas_terrenos_novos_mensal_corrente = modules_owned * parcela_p_novo_terreno
+
+    if land_strategy in ['owned', 'alternate'] and valor_compra_terreno > 0:
+        # Valor total do terreno para TODOS os módulos iniciais
+        valor_total_terreno_inicial = valor_compra_terreno * modules_init
+        valor_entrada_terreno = valor_total_terreno_inicial * (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0)
+        valor_financiado = valor_total_terreno_inicial - valor_entrada_terreno
+        
+        amortizacao_mensal = 0.0
+        
+        if cfg_owned['land_installments'] > 0:
+            amortizacao_mensal = valor_financiado / cfg_owned['land_installments']
+            
+            # Adiciona UM ÚNICO financiamento para todos os módulos iniciais (coorte de 1 contrato, mês 0)
+            financiamentos_ativos.add(1, valor_total_terreno_inicial, valor_financiado,
+                                      cfg_owned['land_installments'], taxa_juros_mensal, 0, tabela_financiamento)
+            
+        investimento_total += valor_entrada_terreno
+        investimento_em_terrenos += valor_entrada_terreno
+    
+    fundo_ac = 0.0
+    retiradas_ac = 0.0
+    # Saída colunar pré-alocada: uma linha por coluna, uma posição por mês
+    contagens = np.empty((len(INT_COLUMNS), months), dtype=np.int64)
+    valores = np.empty((len(FLOAT_COLUMNS), months), dtype=np.float64)
+    # Séries gravadas a cada mês (listas planas, convertidas uma vez no fim; ver SERIES)
+    linhas_modulos = []
+    linhas_serie = []
+
+    # Variáveis anuais para correção
+    custo_modulo_atual_corrigido = custo_modulo_atual
+    receita_p_mod_corrigida = receita_p_mod
+    manut_p_mod_corrigida = manut_p_mod
+    aluguel_p_mod_corrigido = aluguel_p_mod
+    aluguel_p_novo_mod_corrigido = aluguel_p_novo_mod
+    parcela_p_novo_terreno_corrigido = parcela_p_novo_terreno
+
+    # Variável para acumular o lucro anual para o reinvestimento
+    lucro_acumulado_anual = 0.0
+    # Valorização mensal do terreno (usada no valor de mercado de cada mês)
+    fator_mensal_terreno = (1 + land_appreciation_rate_pct) ** (1/12)
+    max_withdraw = cfg_global['max_withdraw_value']
+
+    inicio = 0
+    if resume is not None:
+        estado, origem = resume
+        inicio = min(estado['mes'], months)
+        (modules_owned, modules_rented, terrenos_adquiridos, investimento_em_terrenos,
+         caixa, investimento_total, historical_value_owned, historical_value_rented,
+         juros_acumulados, amortizacao_acumulada, aluguel_acumulado, parcelas_novas_acumuladas,
+         aluguel_mensal_corrente, parcelas_terrenos_novos_mensal_corrente, fundo_ac, retiradas_ac,
+         custo_modulo_atual_corrigido, receita_p_mod_corrigida, manut_p_mod_corrigida,
+         aluguel_p_mod_corrigido, aluguel_p_novo_mod_corrigido, parcela_p_novo_terreno_corrigido,
+         lucro_acumulado_anual) = (estado[name] for name in STATE_VARS)
+        financiamentos_ativos = estado['financiamentos'].copy()
+        for j, col in enumerate(INT_COLUMNS):
+            contagens[j, :inicio] = origem[col][:inicio]
+        for j, col in enumerate(FLOAT_COLUMNS):
+            valores[j, :inicio] = origem[col][:inicio]
+
+    preenchido = inicio
+    if stream:
+        columns = dict(zip(INT_COLUMNS, contagens))
+        columns.update(zip(FLOAT_COLUMNS, valores))
+        columns = {col: columns[col] for col in RESULT_COLUMNS}
+
+    if perfil:
+        t_fin = t_dist = t_reinv = t_kpi = t_ckpt = 0.0
+        blocos = blocos_mes_a_mes = 0
+        coortes_ativas = np.zeros(months, dtype=np.int64)
+        profile.add('preparacao', agora() - t_preparacao)
+
+    # Laço por blocos anuais: dentro do ano, módulos, preços corrigidos, aluguel e parcelas de
+    # terrenos novos são constantes (só mudam no reinvestimento/correção do último mês), então
+    # receita, manutenção e lucro operacional são calculados uma vez por bloco.
+    ano_inicio = inicio + 1
+    while ano_inicio <= months:
+        fim = min(ano_inicio + 11 - (ano_inicio - 1) % 12, months)   # último mês do ano
+        meses_bloco = fim - ano_inicio + 1
+
+        # Receita e Manutenção usam os valores corrigidos e são aplicados a TODOS os módulos
+        receita = (modules_owned + modules_rented) * receita_p_mod_corrigida
+        manut   = (modules_owned + modules_rented) * manut_p_mod_corrigida
+        # Gastos Operacionais (Aluguel + Parcelas de Terrenos Novos)
+        # parcelas_terrenos_novos_mensal_corrente representa o custo do terreno para os módulos próprios (owned)
+        gastos_operacionais = aluguel_mensal_corrente + parcelas_terrenos_novos_mensal_corrente
+        lucro_operacional = receita - manut - gastos_operacionais
+        valor_modulos = historical_value_owned + historical_value_rented
+
+        # Financiamentos: sem quitações no meio do ano, os totais da carteira seguem recorrências
+        # lineares (juros caem Σ q·r·a por mês, amortização constante) e o valor de mercado fica
+        # constante até a valorização anual; com quitação, a carteira paga mês a mês.
+        linear = financiamentos_ativos.begin_block(meses_bloco)
+        if linear is not None:
+            juros_corrente, juros_amort, amortizacao_fixa, saldo, juros_amort_n, juros_futuros = linear
+            valor_mercado_total = financiamentos_ativos.market_value(fator_mensal_terreno)
+        if perfil:
+            if linear is not None:
+                blocos += 1
+            else:
+                blocos_mes_a_mes += 1
+
+        for m in range(ano_inicio, fim + 1):
+            if perfil:
+                t0 = agora()
+            novos_modulos_comprados = 0
+
+            # Aportes
+            aporte_mes = aportes[m - 1]
+            caixa += aporte_mes
+            investimento_total += aporte_mes
+
+            # --- Pagamento dos Financiamentos Ativos ---
+            if linear is not None:
+                # Mesmas operações de FinancingLedger.pay_month, sobre os totais do bloco
+                juros_terreno_mensal_total = juros_corrente
+                amortizacao_terreno_mensal_total = amortizacao_fixa
+                juros_futuros += juros_amort - juros_corrente - juros_amort_n
+                juros_amort_n -= juros_amort
+                juros_corrente -= juros_amort
+                saldo -= amortizacao_fixa
+                divida_futura_total = saldo + juros_futuros
+            else:
+                juros_terreno_mensal_total, amortizacao_terreno_mensal_total = financiamentos_ativos.pay_month()
+                divida_futura_total = financiamentos_ativos.future_debt()
+                valor_mercado_total = financiamentos_ativos.market_value(fator_mensal_terreno)
+            parcela_terreno_mensal_total = juros_terreno_mensal_total + amortizacao_terreno_mensal_total
+            if perfil:
+                t1 = agora()
+                t_fin += t1 - t0
+
+            # Acumuladores globais
+            juros_acumulados += juros_terreno_mensal_total
+            amortizacao_acumulada += amortizacao_terreno_mensal_total
+
+            # Investimento em terrenos (apenas a amortização)
+            investimento_em_terrenos += amortizacao_terreno_mensal_total
+
+            caixa += lucro_operacional
+
+            # O pagamento das parcelas do terreno é um gasto, já subtraído do caixa
+            caixa -= parcela_terreno_mensal_total
+
+            # Distribuição (Retiradas + Fundo) limitada ao lucro e ao caixa
+            fundo_mes_total = 0.0
+            retirada_mes_efetiva = 0.0
+
+            # 1. Calcular a base de lucro para distribuição (Lucro Operacional - Parcela Terreno Total)
+            lucro_distribuivel = lucro_operacional - parcela_terreno_mensal_total
+            lucro_acumulado_anual += lucro_distribuivel # Acumula o lucro para o reinvestimento anual
+
+            if lucro_distribuivel > 0:
+                base = lucro_distribuivel
+
+                # Calcular retiradas e fundo potenciais
+                retirada_potencial = base * pct_retirada[m - 1]
+                fundo_potencial    = base * pct_fundo[m - 1]
+
+                # Aplicar limite máximo de retirada
+                if max_withdraw > 0 and retirada_potencial > max_withdraw:
+                    retirada_mes_efetiva = max_withdraw
+                    fundo_mes_total = fundo_potencial
+                else:
+                    retirada_mes_efetiva = retirada_potencial
+                    fundo_mes_total = fundo_potencial
+
+                total_distrib = retirada_mes_efetiva + fundo_mes_total
+
+                # 2. Limitar a distribuição ao caixa disponível (após todas as entradas e saídas)
+                caixa_apos_operacional = caixa
+
+                if total_distrib > caixa_apos_operacional:
+                    if caixa_apos_operacional > 0:
+                        proporcao = caixa_apos_operacional / total_distrib
+                        retirada_mes_efetiva *= proporcao
+                        fundo_mes_total *= proporcao
+                    else:
+                        retirada_mes_efetiva = 0.0
+                        fundo_mes_total = 0.0
+
+            # 3. Atualizar o caixa e acumuladores
+            # Verifica se há caixa suficiente antes de descontar retiradas e fundo
+            total_a_descontar = retirada_mes_efetiva + fundo_mes_total
+            if caixa >= total_a_descontar:
+                caixa -= total_a_descontar
+                retiradas_ac += retirada_mes_efetiva
+                fundo_ac += fundo_mes_total
+            else:
+                # Se não há caixa suficiente, não desconta nada
+                retirada_mes_efetiva = 0.0
+                fundo_mes_total = 0.0
+
+            # Acumuladores de desembolso corrente
+            aluguel_acumulado += aluguel_mensal_corrente
+            parcelas_novas_acumuladas += parcelas_terrenos_novos_mensal_corrente
+            if perfil:
+                t2 = agora()
+                t_dist += t2 - t1
+
+            if m < fim:
+                # Ordem igual a SERIES; patrimônio, riquezas e demais totais são derivados no fim
+                linhas_modulos += (modules_owned, modules_rented, 0)
+                linhas_serie += (
+                    caixa, investimento_total, juros_acumulados, amortizacao_acumulada, investimento_em_terrenos,
+                    retiradas_ac, fundo_ac, aluguel_acumulado, parcelas_novas_acumuladas,
+                    aporte_mes, juros_terreno_mensal_total, amortizacao_terreno_mensal_total,
+                    retirada_mes_efetiva, fundo_mes_total, valor_mercado_total, divida_futura_total,
+                    receita, manut, aluguel_mensal_corrente, parcelas_terrenos_novos_mensal_corrente,
+                    valor_modulos,
+                )
+                if perfil:
+                    t_kpi += agora() - t2
+                    coortes_ativas[m - 1] = financiamentos_ativos.n_ativas
+
+        # --- Último mês do bloco: totais da carteira, reinvestimento e correção anual ---
+        if linear is not None:
+            financiamentos_ativos.end_block(meses_bloco, juros_corrente, saldo, juros_amort_n, juros_futuros)
+
+        # Reinvestimento anual (baseado no caixa disponível e lucro acumulado anual)
+        if m % 12 == 0:
+
+            # Usa o caixa disponível para reinvestimento, mas apenas se for positivo
+            caixa_para_reinvestir = max(0, caixa) if lucro_acumulado_anual > 0 else 0
+            lucro_acumulado_anual = 0.0 # Reseta o lucro acumulado
+
+            alvo = land_strategy
+            if land_strategy == 'alternate':
+                alvo = 'owned' if ((m // 12) % 2 == 0) else 'rented'
+
+            custo_modulo = custo_modulo_atual_corrigido
+
+            # Custo total para comprar 1 módulo + 1 terreno (entrada)
+            custo_total_owned_unitario = custo_modulo + (valor_compra_terreno * (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0) / modules_init)
+
+            if alvo == 'owned' and custo_total_owned_unitario > 0:
+                # Quantidade de módulos que podem ser comprados
+                novos_modulos_comprados = int(caixa_para_reinvestir // custo_total_owned_unitario)
+            elif alvo == 'rented' and custo_modulo > 0:
+                novos_modulos_comprados = int(caixa_para_reinvestir // custo_modulo)
+            else:
+                novos_modulos_comprados = 0
+
+            if novos_modulos_comprados > 0:
+
+                if alvo == 'owned':
+                    custo_da_compra = novos_modulos_comprados * custo_total_owned_unitario
+
+                    # Custo do módulo
+                    custo_modulos = novos_modulos_comprados * custo_modulo
+                    historical_value_owned += custo_modulos
+                    modules_owned += novos_modulos_comprados
+
+                    # Custo da entrada do terreno
+                    valor_entrada_novo_terreno = novos_modulos_comprados * (valor_compra_terreno * (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0) / modules_init)
+
+                    # O reinvestimento é feito com o lucro, o caixa é ajustado
+                    caixa -= custo_da_compra
+                    investimento_total += custo_da_compra
+                    investimento_em_terrenos += valor_entrada_novo_terreno
+
+                    # Adiciona a parcela mensal do terreno para os novos módulos comprados
+                    parcelas_terrenos_novos_mensal_corrente += novos_modulos_comprados * parcela_p_novo_terreno_corrigido
+
+                    # Adiciona os novos financiamentos à lista (1 financiamento por módulo/terreno)
+                    valor_unitario_terreno = valor_compra_terreno / modules_init
+                    valor_unitario_financiado = valor_unitario_terreno * (1 - (cfg_owned.get('land_down_payment_pct', 0.0) / 100.0))
+
+                    if cfg_owned['land_installments'] > 0 and valor_unitario_financiado > 0:
+                        # Uma única coorte com todos os terrenos comprados no mês (mesmos termos)
+                        financiamentos_ativos.add(novos_modulos_comprados, valor_unitario_terreno, valor_unitario_financiado,
+                                                  cfg_owned['land_installments'], taxa_juros_mensal, m, tabela_financiamento)
+                        terrenos_adquiridos += novos_modulos_comprados
+
+                else: # 'rented'
+                    custo_da_compra = novos_modulos_comprados * custo_modulo
+                    historical_value_rented += custo_da_compra
+                    modules_rented += novos_modulos_comprados
+
+                    caixa -= custo_da_compra
+                    investimento_total += custo_da_compra
+
+                    # Adiciona o aluguel mensal para os novos módulos alugados
+                    aluguel_mensal_corrente += novos_modulos_comprados * aluguel_p_novo_mod_corrigido
+
+            # Correção anual
+            correction_factor = 1 + correction_rate_pct
+            custo_modulo_atual_corrigido  *= correction_factor
+            receita_p_mod_corrigida       *= correction_factor
+            manut_p_mod_corrigida         *= correction_factor
+            aluguel_mensal_corrente       *= correction_factor
+            parcelas_terrenos_novos_mensal_corrente *= correction_factor
+            aluguel_p_mod_corrigido       *= correction_factor
+            aluguel_p_novo_mod_corrigido  *= correction_factor
+            parcela_p_novo_terreno_corrigido *= correction_factor
+
+            # Corrige o valor total de cada financiamento ativo
+            # A taxa de juros não é corrigida anualmente, apenas o valor do terreno
+            financiamentos_ativos.appreciate(1 + land_appreciation_rate_pct)
+        if perfil:
+            t3 = agora()
+            t_reinv += t3 - t2
+
+        # --- Cálculo dos Novos KPIs ---
+        # Valor de Mercado Total (apreciação mensal)
+        valor_mercado_total = financiamentos_ativos.market_value(fator_mensal_terreno)
+        # Dívida Futura Total (Saldo Devedor + Juros Futuros)
+        divida_futura_total = financiamentos_ativos.future_debt()
+
+        # A quantidade de terrenos é igual à quantidade de módulos próprios
+        terrenos_adquiridos = modules_owned
+
+        linhas_modulos += (modules_owned, modules_rented, novos_modulos_comprados)
+        linhas_serie += (
+            caixa, investimento_total, juros_acumulados, amortizacao_acumulada, investimento_em_terrenos,
+            retiradas_ac, fundo_ac, aluguel_acumulado, parcelas_novas_acumuladas,
+            aporte_mes, juros_terreno_mensal_total, amortizacao_terreno_mensal_total,
+            retirada_mes_efetiva, fundo_mes_total, valor_mercado_total, divida_futura_total,
+            receita, manut, aluguel_mensal_corrente, parcelas_terrenos_novos_mensal_corrente,
+            historical_value_owned + historical_value_rented,
+        )
+        if perfil:
+            t4 = agora()
+            t_kpi += t4 - t3
+            coortes_ativas[m - 1] = financiamentos_ativos.n_ativas
+
+        if checkpoints is not None and m % 12 == 0:
+            estado = {'mes': m, 'financiamentos': financiamentos_ativos.copy()}
+            estado.update(zip(STATE_VARS, (
+                modules_owned, modules_rented, terrenos_adquiridos, investimento_em_terrenos,
+                caixa, investimento_total, historical_value_owned, historical_value_rented,
+                juros_acumulados, amortizacao_acumulada, aluguel_acumulado, parcelas_novas_acumuladas,
+                aluguel_mensal_corrente, parcelas_terrenos_novos_mensal_corrente, fundo_ac, retiradas_ac,
+                custo_modulo_atual_corrigido, receita_p_mod_corrigida, manut_p_mod_corrigida,
+                aluguel_p_mod_corrigido, aluguel_p_novo_mod_corrigido, parcela_p_novo_terreno_corrigido,
+                lucro_acumulado_anual)))
+            checkpoints.append(estado)
+            if perfil:
+                t_ckpt += agora() - t4
+        if stream:
+            _flush_series(contagens, valores, linhas_modulos, linhas_serie, preenchido, fim, investimento_inicial)
+            preenchido = fim
+            linhas_modulos = []
+            linhas_serie = []
+            yield fim, columns
+        ano_inicio = fim + 1
+
+    if perfil:
+        t4 = agora()
+    n = months - inicio
+    modulos = _flush_series(contagens, valores, linhas_modulos, linhas_serie, preenchido, months, investimento_inicial)
+    if perfil:
+        t_kpi += agora() - t4
+        profile.add('financiamentos', t_fin)
+        profile.add('distribuicao', t_dist)
+        profile.add('reinvestimento', t_reinv)
+        profile.add('kpis', t_kpi)
+        if checkpoints is not None:
+            profile.add('checkpoints', t_ckpt)
+        compras = modulos[2]
+        profile.count('meses', n)
+        profile.count('blocos_anuais', blocos)
+        profile.count('blocos_mes_a_mes', blocos_mes_a_mes)
+        profile.count('modulos_comprados', int(compras.sum()))
+        profile.count('anos_com_compra', int(np.count_nonzero(compras)))
+        profile.count('coortes_criadas', financiamentos_ativos.size)
+        profile.count('realocacoes_carteira', financiamentos_ativos.realocacoes)
+        profile.counters['coortes_ativas_max'] = int(coortes_ativas.max(initial=0))
+        profile.active_loans = coortes_ativas
+
+    # Cada coluna é uma visão (sem cópia) das matrizes pré-alocadas
+    columns = dict(zip(INT_COLUMNS, contagens))
+    columns.update(zip(FLOAT_COLUMNS, valores))
+    return {col: columns[col] for col in RESULT_COLUMNS}
+
+def simulate_columns(cfg: dict, checkpoints=None, resume=None, profile=None):
+    """Executa a simulação mensal e retorna um dicionário {coluna: np.ndarray}.
+
+    `checkpoints`: lista que recebe, ao fim de cada ano, um dicionário com o mês,
+    as variáveis de STATE_VARS e uma cópia da carteira de financiamentos.
+    `resume`: par (checkpoint, colunas da execução de origem) para retomar a partir
+    do mês do checkpoint; os meses anteriores são copiados das colunas de origem.
+    `profile`: `SimulationProfile` que recebe o tempo de cada fase do laço e as
+    contagens (coortes ativas por mês, módulos comprados, realocações da carteira).
+    """
+    # Sem `stream` o gerador não produz nada: o resultado vem no StopIteration
+    try:
+        next(_simulation_steps(cfg, checkpoints, resume, profile))
+    except StopIteration as fim:
+        return fim.value
+    raise RuntimeError("_simulation_steps produziu resultados parciais sem stream")
+
+def iter_simulation(cfg: dict, monthly=False):
+    """Executa a simulação gerando os resultados à medida que são calculados.
+
+    Por padrão, a cada ano simulado gera {coluna: np.ndarray} com os meses já
+    calculados (visões, sem cópia); o último item é o resultado completo, igual
+    ao de `simulate_columns`. Com `monthly=True`, gera um registro {coluna: valor}
+    por mês. O primeiro item sai após o primeiro ano, qualquer que seja o
+    horizonte; interromper a iteração (break / `close()`) cancela o restante.
+    """
+    anterior = 0
+    for fim, columns in _simulation_steps(cfg, stream=True):
+        if monthly:
+            linhas = zip(*(columns[col][anterior:fim].tolist() for col in RESULT_COLUMNS))
+            for linha in linhas:
+                yield dict(zip(RESULT_COLUMNS, linha))
+        else:
+            yield {col: columns[col][:fim] for col in RESULT_COLUMNS}
+        anterior = fim
+
+def _count_dtype(arr):
+    if not arr.size:
+        return COUNT_DTYPES[0]
+    lo, hi = int(arr.min()), int(arr.max())
+    for dtype in COUNT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+def compact_columns(columns: dict, float32=False):
+    """Colunas com as contagens (COUNT_COLS) no menor inteiro que as comporta.
+
+    Com `float32=True`, as colunas monetárias (MONEY_COLS) passam a float32: metade
+    da memória, com ~7 dígitos significativos (resolução de centavos até ~R$ 160 mil),
+    suficiente para exibição e gráficos, não para recalcular resultados. As demais
+    colunas não são copiadas.
+    """
+    out = {}
+    for col, arr in columns.items():
+        arr = np.asarray(arr)
+        if col in COUNT_COLS:
+            arr = arr.astype(_count_dtype(arr), copy=False)
+        elif float32 and col in MONEY_COLS:
+            arr = arr.astype(np.float32)
+        out[col] = arr
+    return out
+
+def result_frame(columns: dict, float32=False):
+    """DataFrame mensal com os tipos compactos de `compact_columns`."""
+    import pandas as pd
+    return pd.DataFrame(compact_columns({col: columns[col] for col in RESULT_COLUMNS if col in columns}, float32), copy=False)
+
+def run_simulation(cfg: dict, cache=None, profile=None, float32=False):
+    """Executa a simulação e retorna o resultado mensal como DataFrame.
+
+    Com `cache` (um `ResultCache`), reutiliza resultados gravados em disco.
+    Com `profile` (um `SimulationProfile`), registra o tempo de cada fase, as
+    contagens do laço e as alocações da execução. As contagens vêm em inteiros
+    compactos; `float32=True` reduz também as colunas monetárias (ver `compact_columns`).
+    """
+    if profile is None:
+        columns = cache.get_or_compute(cfg) if cache is not None else simulate_columns(cfg)
+        return result_frame(columns, float32)
+    with profile.measure():
+        columns = None
+        if cache is not None:
+            with profile.phase('cache'):
+                columns = cache.get(cfg)
+            profile.cache_hit = columns is not None
+        if columns is None:
+            columns = simulate_columns(cfg, profile=profile)
+            if cache is not None:
+                with profile.phase('cache'):
+                    cache.put(cfg, columns)
+        with profile.phase('dataframe'):
+            df = result_frame(columns, float32)
+    return df
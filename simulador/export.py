@@ -0,0 +1,210 @@
+"""Exportação de resultados (Excel, CSV e Parquet).
+
+As planilhas são escritas direto com o xlsxwriter em modo `constant_memory`
+(linha a linha, sem montar a planilha inteira em memória), com larguras de
+coluna calculadas de forma vetorizada a partir do maior valor de cada coluna,
+sem converter cada célula em texto.
+
+Uma comparação inteira vira uma única pasta de trabalho: uma aba "Resumo" e
+uma aba por estratégia. Para exportações grandes há CSV e Parquet (este
+último exige `pyarrow`).
+
+`ExportCache` guarda os bytes gerados por chave (hash da config + formato),
+para que a geração aconteça uma vez e só quando o download for pedido.
+"""
+import io
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .engine import MONEY_COLS, compute_cache_key
+
+MONEY_FORMAT = "R$ #,##0.00"
+SINGLE_SHEET = "Simulacao_Mensal"
+SUMMARY_SHEET = "Resumo"
+PORTFOLIO_SHEET = "Portfolio"
+EXPORT_FORMATS = {
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'csv': "text/csv",
+    'parquet': "application/vnd.apache.parquet",
+}
+SUMMARY_COLUMNS = {
+    "Estratégia": None,
+    "Patrimônio Líquido Final": 'final_net_worth',
+    "Investimento Total": 'total_investment',
+    "Lucro Líquido": 'net_profit',
+    "ROI Total (%)": 'roi_pct',
+    "Ponto de Equilíbrio": 'break_even_month',
+}
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _column_names(data):
+    return list(data.columns) if hasattr(data, 'columns') else list(data)
+
+def column_width(name, values, money=False):
+    """Largura (em caracteres) suficiente para o cabeçalho e o maior valor exibido."""
+    arr = np.asarray(values)
+    width = len(name)
+    if arr.size and arr.dtype.kind in 'iuf':
+        finitos = arr[np.isfinite(arr)] if arr.dtype.kind == 'f' else arr
+        if finitos.size:
+            maior = float(np.max(np.abs(finitos)))
+            digitos = len(f"{maior:.0f}")
+            sinal = 1 if float(np.min(finitos)) < 0 else 0
+            if money:
+                # "R$ " + separadores de milhar + ",00"
+                width = max(width, 3 + digitos + (digitos - 1) // 3 + 3 + sinal)
+            elif arr.dtype.kind == 'f':
+                width = max(width, digitos + 3 + sinal)
+            else:
+                width = max(width, digitos + sinal)
+    elif arr.size:
+        width = max(width, int(np.char.str_len(arr.astype(str)).max()))
+    return width + 2
+
+def sheet_title(name, used=()):
+    """Nome de aba válido no Excel (31 caracteres, sem []:*?/\\) e único em `used`."""
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(name)).strip("'") or "Estrategia"
+    title, n = base[:31], 1
+    while title.lower() in {u.lower() for u in used}:
+        n += 1
+        sufixo = f" ({n})"
+        title = base[:31 - len(sufixo)] + sufixo
+    return title
+
+def _write_sheet(wb, title, data, money_columns, money_fmt, header_fmt):
+    ws = wb.add_worksheet(title)
+    names = _column_names(data)
+    columns = [np.asarray(data[c]) for c in names]
+    # Em constant_memory as linhas são gravadas em sequência: formatos e larguras vêm antes
+    for i, (name, values) in enumerate(zip(names, columns)):
+        money = name in money_columns
+        ws.set_column(i, i, column_width(name, values, money=money), money_fmt if money else None)
+    ws.write_row(0, 0, names, header_fmt)
+    for r, row in enumerate(zip(*(c.tolist() for c in columns)), start=1):
+        ws.write_row(r, 0, row)
+    ws.freeze_panes(1, 0)
+
+def write_excel(sheets, money_columns=MONEY_COLS):
+    """Gera um .xlsx com uma aba por item de `sheets` ({título: DataFrame ou dict de colunas})."""
+    import xlsxwriter
+
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {'constant_memory': True, 'nan_inf_to_errors': True})
+    money_fmt = wb.add_format({"num_format": MONEY_FORMAT})
+    header_fmt = wb.add_format({"bold": True})
+    used = []
+    for title, data in sheets.items():
+        title = sheet_title(title, used)
+        used.append(title)
+        _write_sheet(wb, title, data, money_columns, money_fmt, header_fmt)
+    wb.close()
+    return output.getvalue()
+
+def summary_table(store):
+    """Colunas da aba "Resumo" de um `ComparisonStore`."""
+    table = {col: [] for col in SUMMARY_COLUMNS}
+    for name in store:
+        summary = store.summary(name)
+        for col, field in SUMMARY_COLUMNS.items():
+            table[col].append(name if field is None else summary[field])
+    return {col: np.array(values) for col, values in table.items()}
+
+def run_to_excel(data):
+    """Planilha de uma única simulação (aba "Simulacao_Mensal")."""
+    return write_excel({SINGLE_SHEET: data})
+
+def comparison_to_excel(store):
+    """Pasta de trabalho do comparativo: aba "Resumo" e uma aba por estratégia."""
+    return write_excel(_named_sheets(SUMMARY_SHEET, summary_table(store), {name: store.columns(name) for name in store}),
+                       money_columns=set(MONEY_COLS) | {"Patrimônio Líquido Final", "Investimento Total", "Lucro Líquido"})
+
+def portfolio_to_excel(total, frames):
+    """Pasta de trabalho do portfólio: aba "Portfolio" (consolidado) e uma aba por unidade."""
+    return write_excel(_named_sheets(PORTFOLIO_SHEET, total, frames))
+
+def _named_sheets(first_title, first, named):
+    """{título: dados} com a aba `first_title` à frente; os títulos de `named` não colidem com ela."""
+    sheets = {first_title: first}
+    for name, data in named.items():
+        sheets[sheet_title(name, used=sheets)] = data
+    return sheets
+
+def to_csv(data):
+    """CSV (UTF-8 com BOM, para abrir acentuado no Excel) de um DataFrame ou dict de colunas."""
+    import pandas as pd
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=_column_names(data), copy=False)
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+def to_parquet(data):
+    import pandas as pd
+    if not parquet_available():
+        raise ImportError("A exportação em Parquet requer o pacote 'pyarrow'.")
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=_column_names(data), copy=False)
+    output = io.BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+def export_run(data, fmt='xlsx'):
+    if fmt == 'xlsx':
+        return run_to_excel(data)
+    if fmt == 'csv':
+        return to_csv(data)
+    if fmt == 'parquet':
+        return to_parquet(data)
+    raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+def export_comparison(store, fmt='xlsx'):
+    if fmt == 'xlsx':
+        return comparison_to_excel(store)
+    # CSV/Parquet: formato longo, com a coluna "Estratégia"
+    if fmt == 'csv':
+        return to_csv(store.long_frame())
+    if fmt == 'parquet':
+        return to_parquet(store.long_frame())
+    raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+def run_export_key(cfg, fmt):
+    return (fmt, compute_cache_key(cfg))
+
+def comparison_export_key(store, fmt):
+    return (fmt,) + tuple((name, store.key(name)) for name in store)
+
+class ExportCache:
+    """Bytes de exportação já gerados, por chave (LRU limitado por número de entradas)."""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        data = build()
+        with self._lock:
+            self.builds += 1
+            self._items[key] = data
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return data
+
+    def run(self, cfg, data, fmt='xlsx'):
+        return self.get_or_build(run_export_key(cfg, fmt), lambda: export_run(data, fmt))
+
+    def comparison(self, store, fmt='xlsx'):
+        return self.get_or_build(comparison_export_key(store, fmt), lambda: export_comparison(store, fmt))
@@ -0,0 +1,165 @@
+"""Busca de metas (goal seek) sobre um parâmetro da configuração.
+
+Responde perguntas como:
+
+    # Quantos módulos iniciais para atingir o equilíbrio até o mês 60?
+    goal_seek(cfg, "modules_init", "break_even_month", 60, lo=1, hi=50, condition="le")
+    # Qual a maior taxa de juros do terreno com ROI >= 0?
+    goal_seek(cfg, "land_interest_rate", "roi_pct", 0, lo=0, hi=30, condition="ge")
+    # Qual percentual de retirada deixa o ROI em exatamente 150%?
+    goal_seek(cfg, "withdrawals.0.percentual", "roi_pct", 150, lo=0, hi=100, method="secant")
+
+A métrica pode ser um campo de `calculate_summary_metrics` ou qualquer coluna do
+resultado (valor no mês `month`, ou no último mês). As avaliações passam por um
+`IncrementalSimulator`, então parâmetros que afetam apenas meses tardios retomam
+dos checkpoints da avaliação anterior.
+"""
+import math
+from copy import deepcopy
+
+from .engine import RESULT_COLUMNS, calculate_summary_metrics
+from .incremental import IncrementalSimulator
+from .sweep import get_field, resolve_field, set_field
+
+SUMMARY_METRICS = ('roi_pct', 'net_profit', 'total_investment', 'break_even_month')
+# Menor valor válido das contagens inteiras (ex.: 0 módulos iniciais divide por zero no motor)
+COUNT_FIELD_MINIMUMS = {'years': 1, 'modules_init': 1, 'land_installments': 1}
+# Erros do motor numa avaliação: a busca para e devolve status 'error'
+ENGINE_ERRORS = (ArithmeticError, ValueError, KeyError, IndexError, TypeError)
+
+
+def metric_value(columns, metric: str, month=None):
+    """Valor numérico de uma métrica (mês de equilíbrio "N/A" vira infinito)."""
+    if metric in SUMMARY_METRICS:
+        value = calculate_summary_metrics(columns)[metric]
+        if metric == 'break_even_month':
+            return math.inf if value == "N/A" else float(value.split()[-1])
+        return float(value)
+    if metric not in RESULT_COLUMNS:
+        raise KeyError(f"Métrica desconhecida: {metric}")
+    serie = columns[metric]
+    return float(serie[-1] if month is None else serie[min(month, len(serie)) - 1])
+
+def field_minimum(cfg: dict, field: str):
+    """Menor valor aceito para o campo na busca (None se não houver)."""
+    return COUNT_FIELD_MINIMUMS.get(resolve_field(cfg, field)[1])
+
+class _EvaluationError(Exception):
+    pass
+
+def goal_seek(cfg: dict, field: str, metric: str, target: float, lo: float, hi: float,
+              condition='eq', method='bisect', month=None, integer=None, tol=1e-6, max_iter=60,
+              runner=None):
+    """Procura o valor de `field` em [lo, hi] que atinge a meta.
+
+    - condition='eq': raiz de metric(x) = target (bisseção ou secante/Illinois).
+    - condition='ge' / 'le': fronteira onde metric(x) >= / <= target passa a valer,
+      supondo monotonicidade; retorna o valor extremo que ainda satisfaz a condição.
+
+    `integer` (padrão: o tipo atual do campo é int) restringe a busca a inteiros;
+    `tol` é relativo à escala do parâmetro.
+    Contagens inteiras (`COUNT_FIELD_MINIMUMS`) têm o limite inferior elevado ao
+    mínimo válido. Retorna um dicionário com status ('found', 'always', 'never',
+    ou 'error' se o motor falhar numa avaliação, com a mensagem em `error`),
+    value, metric, evaluations e history [(x, métrica)].
+    """
+    if condition not in ('eq', 'ge', 'le'):
+        raise ValueError("condition deve ser 'eq', 'ge' ou 'le'")
+    runner = runner or IncrementalSimulator().run
+    if integer is None:
+        integer = isinstance(get_field(cfg, field), int) and not isinstance(get_field(cfg, field), bool)
+    if integer:
+        lo, hi = math.ceil(lo), math.floor(hi)
+        minimo = field_minimum(cfg, field)
+        if minimo is not None:
+            lo = max(lo, minimo)
+    history = []
+
+    def evaluate(x):
+        x = int(round(x)) if integer else float(x)
+        trial = deepcopy(cfg)
+        set_field(trial, field, x)
+        try:
+            y = metric_value(runner(trial), metric, month)
+        except ENGINE_ERRORS as e:
+            raise _EvaluationError(f"{field} = {x}: {type(e).__name__}: {e}") from e
+        history.append((x, y))
+        return y
+
+    def result(status, value, error=None):
+        y = next((h[1] for h in reversed(history) if h[0] == value), None) if value is not None else None
+        out = {"status": status, "value": value, "metric": y, "evaluations": len(history), "history": history}
+        if error is not None:
+            out["error"] = error
+        return out
+
+    if lo > hi:
+        return result('never', None)
+    try:
+        return _search(evaluate, result, history, lo, hi, target, condition, method, integer, tol, max_iter)
+    except _EvaluationError as e:
+        return result('error', None, str(e))
+
+def _search(evaluate, result, history, lo, hi, target, condition, method, integer, tol, max_iter):
+    """Bisseção/secante (condition='eq') ou busca da fronteira (ge/le) de `goal_seek`."""
+    if condition == 'eq':
+        f_lo, f_hi = evaluate(lo) - target, evaluate(hi) - target
+        if f_lo == 0:
+            return result('found', lo)
+        if f_hi == 0:
+            return result('found', hi)
+        if (f_lo > 0) == (f_hi > 0) or math.isinf(f_lo) or math.isinf(f_hi):
+            return result('never', None)
+        a, b, fa, fb = lo, hi, f_lo, f_hi
+        lado = 0
+        larguras = [2 * (b - a)] * 2
+        for _ in range(max_iter):
+            if (integer and b - a <= 1) or (not integer and abs(b - a) <= tol * max(1.0, abs(a), abs(b))):
+                break
+            # Métrica em degraus (compras inteiras de módulos) pode travar a secante:
+            # se o intervalo não caiu pela metade em dois passos, usa bisseção
+            if method == 'secant' and (b - a) <= larguras[-2] / 2:
+                # Regula falsi com modificação de Illinois: converge como a secante, sem sair do intervalo
+                x = b - fb * (b - a) / (fb - fa)
+            else:
+                x = (a + b) / 2
+            if integer:
+                x = min(max(int(round(x)), a + 1), b - 1)
+            fx = evaluate(x) - target
+            if fx == 0:
+                return result('found', x)
+            if (fx > 0) == (fb > 0):
+                b, fb = x, fx
+                if lado == 1:
+                    fa /= 2
+                lado = 1
+            else:
+                a, fa = x, fx
+                if lado == -1:
+                    fb /= 2
+                lado = -1
+            larguras.append(b - a)
+        # Para inteiros, retorna o extremo mais próximo da meta
+        best = min((a, b), key=lambda v: abs(next(h[1] for h in reversed(history) if h[0] == v) - target))
+        return result('found', best)
+
+    def ok(x):
+        y = evaluate(x)
+        return y >= target if condition == 'ge' else y <= target
+
+    ok_lo, ok_hi = ok(lo), ok(hi)
+    if ok_lo and ok_hi:
+        return result('always', None)
+    if not ok_lo and not ok_hi:
+        return result('never', None)
+    # `bom` satisfaz a condição e `ruim` não; a fronteira fica entre os dois
+    bom, ruim = (lo, hi) if ok_lo else (hi, lo)
+    for _ in range(max_iter):
+        if (integer and abs(bom - ruim) <= 1) or (not integer and abs(bom - ruim) <= tol * max(1.0, abs(bom), abs(ruim))):
+            break
+        x = (bom + ruim) // 2 if integer else (bom + ruim) / 2
+        if ok(x):
+            bom = x
+        else:
+            ruim = x
+    return result('found', bom)
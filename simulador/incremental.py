@@ -0,0 +1,164 @@
+"""Re-simulação incremental a partir de checkpoints anuais.
+
+Cada execução guarda o estado completo do motor ao fim de cada ano. Quando uma
+nova configuração difere de uma já executada apenas em entradas "tardias"
+(aportes, retiradas e fundos a partir de um mês, ou o horizonte), a simulação é
+retomada do último checkpoint anterior ao primeiro mês afetado, em vez do mês 1.
+
+`iter_run` faz o mesmo gerando o resultado ano a ano (como `iter_simulation`),
+para a interface desenhar a execução enquanto ela acontece.
+"""
+import threading
+from collections import Counter, OrderedDict
+from copy import deepcopy
+
+from .engine import RESULT_COLUMNS, _simulation_steps, compute_cache_key, simulate_columns
+
+# Eventos com início em `mes` (aportes valem só no mês; percentuais a partir dele)
+_EVENT_FIELDS = {
+    'contributions': 'valor',
+    'withdrawals': 'percentual',
+    'reserve_funds': 'percentual',
+}
+
+
+def _changed_event_months(old_entries, new_entries, value_key):
+    old = Counter((e.get('mes'), e.get(value_key)) for e in old_entries)
+    new = Counter((e.get('mes'), e.get(value_key)) for e in new_entries)
+    return [mes for mes, _ in ((old - new) + (new - old)).elements()]
+
+def earliest_affected_month(old_cfg: dict, new_cfg: dict):
+    """Primeiro mês cujo resultado pode mudar de `old_cfg` para `new_cfg` (None se iguais).
+
+    Retorna 1 quando a diferença está em um parâmetro que afeta toda a simulação.
+    """
+    if old_cfg == new_cfg:
+        return None
+    if set(old_cfg) != set(new_cfg):
+        return 1
+    for section in old_cfg:
+        if section != 'global' and old_cfg[section] != new_cfg[section]:
+            return 1
+
+    old_g, new_g = old_cfg['global'], new_cfg['global']
+    if set(old_g) != set(new_g):
+        return 1
+    earliest = None
+
+    def at(month):
+        nonlocal earliest
+        month = max(int(month or 1), 1)
+        earliest = month if earliest is None else min(earliest, month)
+
+    for key in old_g:
+        if old_g[key] == new_g[key]:
+            continue
+        if key in _EVENT_FIELDS:
+            for mes in _changed_event_months(old_g[key], new_g[key], _EVENT_FIELDS[key]):
+                at(mes)
+        elif key == 'years':
+            # Meses em comum não mudam: só o trecho estendido (ou cortado)
+            at(min(old_g['years'], new_g['years']) * 12 + 1)
+        elif key == 'max_withdraw_value':
+            # O limite só atua a partir da primeira retirada
+            inicios = [w['mes'] for w in new_g.get('withdrawals', [])]
+            if inicios:
+                at(min(inicios))
+        else:
+            return 1
+    return earliest
+
+class IncrementalSimulator:
+    """Executa configurações reaproveitando checkpoints de execuções recentes (LRU)."""
+
+    def __init__(self, max_runs=16):
+        self.max_runs = max_runs
+        self._runs = OrderedDict()   # chave -> (cfg, colunas, checkpoints)
+        self._lock = threading.Lock()
+        self.full_runs = 0
+        self.resumed_runs = 0
+        self.months_simulated = 0
+        self.months_reused = 0
+
+    def _best_base(self, cfg):
+        """Retorna (checkpoint, colunas, checkpoints anteriores) da melhor execução guardada."""
+        best = None
+        for old_cfg, columns, checkpoints in self._runs.values():
+            earliest = earliest_affected_month(old_cfg, cfg)
+            validos = [cp for cp in checkpoints if earliest is None or cp['mes'] < earliest]
+            if validos and (best is None or validos[-1]['mes'] > best[0]['mes']):
+                best = (validos[-1], columns, validos)
+        return best
+
+    def run(self, cfg: dict):
+        key = compute_cache_key(cfg)
+        with self._lock:
+            if key in self._runs:
+                self._runs.move_to_end(key)
+                return self._runs[key][1]
+            base = self._best_base(cfg)
+
+        if base is None:
+            checkpoints = []
+            columns = simulate_columns(cfg, checkpoints=checkpoints)
+        else:
+            checkpoint, origem, anteriores = base
+            checkpoints = list(anteriores)
+            columns = simulate_columns(cfg, checkpoints=checkpoints, resume=(checkpoint, origem))
+
+        self._record(cfg, key, base, columns, checkpoints)
+        return columns
+
+    def iter_run(self, cfg: dict):
+        """Como `run`, mas gera a cada ano {coluna: np.ndarray} com os meses já calculados.
+
+        A execução retoma do melhor checkpoint e grava os próprios checkpoints; o
+        último item é o resultado completo. Interromper a iteração descarta a execução.
+        """
+        key = compute_cache_key(cfg)
+        with self._lock:
+            if key in self._runs:
+                self._runs.move_to_end(key)
+                yield self._runs[key][1]
+                return
+            base = self._best_base(cfg)
+
+        checkpoints = [] if base is None else list(base[2])
+        resume = None if base is None else (base[0], base[1])
+        passos = _simulation_steps(cfg, checkpoints=checkpoints, resume=resume, stream=True)
+        months = cfg['global']['years'] * 12
+        feito = None
+        while True:
+            try:
+                feito, columns = next(passos)
+            except StopIteration as fim:
+                columns = fim.value
+                break
+            yield {col: columns[col][:feito] for col in RESULT_COLUMNS}
+        self._record(cfg, key, base, columns, checkpoints)
+        if feito != months:
+            # Retomada no fim do horizonte (ex.: horizonte reduzido): nenhum ano novo foi gerado
+            yield columns
+
+    def _record(self, cfg, key, base, columns, checkpoints):
+        months = cfg['global']['years'] * 12
+        inicio = 0 if base is None else min(base[0]['mes'], months)
+        with self._lock:
+            if base is None:
+                self.full_runs += 1
+            else:
+                self.resumed_runs += 1
+            self.months_reused += inicio
+            self.months_simulated += months - inicio
+            self._runs[key] = (deepcopy(cfg), columns, checkpoints)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+
+    def stats(self):
+        return {
+            "runs": len(self._runs),
+            "full_runs": self.full_runs,
+            "resumed_runs": self.resumed_runs,
+            "months_simulated": self.months_simulated,
+            "months_reused": self.months_reused,
+        }
@@ -0,0 +1,246 @@
+"""Biblioteca de cenários: configurações salvas em disco (SQLite).
+
+Cada cenário é guardado com um nome e a configuração canônica (completada com
+os valores padrão e com os números no tipo do campo padrão). A chave do cenário
+é `compute_cache_key` dessa configuração: a mesma do cache de resultados, e
+única na biblioteca, de modo que configurações equivalentes não se repetem.
+
+Importação em lote a partir de CSV (uma linha por cenário, colunas no formato
+de `sweep.set_field`, como na carteira de unidades) ou JSON/JSONL (um objeto
+por cenário, com a config parcial ou no formato {"nome": ..., "config": {...}}):
+
+    nome;cost_per_module;revenue_per_module;land_strategy
+    Base;75000;4500;owned
+    Alugado;75000;4500;rented
+
+`run_pending` executa, em paralelo, só os cenários sem resultado no cache.
+O arquivo padrão é `$SIMULADOR_LIBRARY` ou `~/.simulador/cenarios.sqlite`.
+"""
+import io
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from copy import deepcopy
+
+from .engine import compute_cache_key, get_default_config, merge_config, read_configs
+from .portfolio import NAME_COLUMN, _is_blank, _read_rows, _row_config
+from .sweep import run_configs
+
+SCENARIO_LABEL = "Cenário"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cenarios (
+    chave  TEXT PRIMARY KEY,
+    nome   TEXT NOT NULL UNIQUE,
+    config TEXT NOT NULL,
+    criado REAL NOT NULL
+)
+"""
+
+
+def default_library_path():
+    return os.environ.get("SIMULADOR_LIBRARY") or os.path.join(os.path.expanduser("~"), ".simulador", "cenarios.sqlite")
+
+def canonical_config(cfg: dict) -> dict:
+    """Config completa, com os números no tipo do campo padrão (ex.: 75000 -> 75000.0).
+
+    Configurações equivalentes passam a ter a mesma `compute_cache_key`.
+    """
+    out = merge_config(deepcopy(cfg))
+    for section, values in get_default_config().items():
+        atual = out.get(section)
+        if not isinstance(atual, dict):
+            continue
+        for key, padrao in values.items():
+            v = atual.get(key)
+            if isinstance(padrao, bool) or isinstance(v, bool) or not isinstance(padrao, (int, float)) or not isinstance(v, (int, float)):
+                continue
+            if isinstance(padrao, float) or float(v).is_integer():
+                atual[key] = type(padrao)(v)
+    return out
+
+def _read_text(source):
+    """Texto de um caminho, arquivo aberto, texto ou bytes."""
+    if isinstance(source, os.PathLike) or (isinstance(source, str) and '\n' not in source and os.path.exists(source)):
+        with open(source, encoding='utf-8-sig', newline='') as f:
+            return f.read()
+    text = source if isinstance(source, (str, bytes)) else source.read()
+    return text.decode('utf-8-sig') if isinstance(text, bytes) else text
+
+def read_scenarios(source, fmt=None):
+    """Retorna (nomes, configs) de um CSV ou JSON/JSONL; nomes ausentes são None.
+
+    `fmt` ('csv' ou 'json') é deduzido da extensão do arquivo ou do conteúdo.
+    """
+    if fmt is None and isinstance(source, (str, os.PathLike)) and '\n' not in str(source):
+        ext = os.path.splitext(str(source))[1].lower()
+        fmt = 'csv' if ext == '.csv' else 'json' if ext in ('.json', '.jsonl') else None
+    text = _read_text(source)
+    if fmt is None:
+        fmt = 'json' if text.lstrip()[:1] in ('{', '[') else 'csv'
+    names, cfgs = [], []
+    if fmt == 'csv':
+        if not text.strip():
+            return names, cfgs
+        base = get_default_config()
+        for i, row in enumerate(_read_rows(text), start=1):
+            name = row.get(NAME_COLUMN)
+            names.append(None if _is_blank(name) else str(name).strip())
+            cfgs.append(_row_config(row, base, f"{SCENARIO_LABEL} {i}"))
+        return names, cfgs
+    for i, item in enumerate(read_configs(io.StringIO(text)), start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"{SCENARIO_LABEL} {i}: esperado um objeto JSON.")
+        item = dict(item)
+        name = item.pop(NAME_COLUMN, None)
+        partial = item['config'] if isinstance(item.get('config'), dict) else item
+        names.append(None if _is_blank(name) else str(name).strip())
+        cfgs.append(partial)
+    return names, cfgs
+
+class ScenarioLibrary:
+    """Cenários salvos: nome -> config canônica, sem configs repetidas."""
+
+    def __init__(self, path=None):
+        self.path = path or default_library_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        # Uma conexão por operação: a biblioteca pode ser usada por várias threads/processos
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM cenarios")[0][0]
+
+    def __contains__(self, name):
+        return bool(self._query("SELECT 1 FROM cenarios WHERE nome = ?", (name,)))
+
+    def names(self):
+        return [n for (n,) in self._query("SELECT nome FROM cenarios ORDER BY rowid")]
+
+    def find(self, key):
+        """Nome do cenário com a chave `key` (ou None)."""
+        rows = self._query("SELECT nome FROM cenarios WHERE chave = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def key(self, name):
+        rows = self._query("SELECT chave FROM cenarios WHERE nome = ?", (name,))
+        if not rows:
+            raise KeyError(name)
+        return rows[0][0]
+
+    def load(self, name):
+        rows = self._query("SELECT config FROM cenarios WHERE nome = ?", (name,))
+        if not rows:
+            raise KeyError(name)
+        return json.loads(rows[0][0])
+
+    def entries(self, names=None):
+        """[(nome, chave, config)] na ordem de inclusão; `names` restringe os cenários."""
+        rows = self._query("SELECT nome, chave, config FROM cenarios ORDER BY rowid")
+        if names is not None:
+            wanted = set(names)
+            rows = [r for r in rows if r[0] in wanted]
+        return [(name, key, json.loads(cfg)) for name, key, cfg in rows]
+
+    def add_many(self, names, cfgs):
+        """Inclui vários cenários numa única transação.
+
+        Uma config já presente (na biblioteca ou antes no mesmo lote) não é
+        incluída de novo: o cenário fica com o nome existente. Um nome já usado
+        por outra config é substituído. Nomes None viram "Cenário N".
+        Retorna {'added', 'duplicates', 'names'} (`names`: nome final de cada config).
+        """
+        with closing(self._connect()) as conn, conn:
+            by_key = dict(conn.execute("SELECT chave, nome FROM cenarios"))
+            used = set(by_key.values())
+            seq = len(used)
+            final, rows = [], []
+            added = duplicates = 0
+            agora = time.time()
+            for name, cfg in zip(names, cfgs):
+                cfg = canonical_config(cfg)
+                key = compute_cache_key(cfg)
+                if key in by_key:
+                    duplicates += 1
+                    final.append(by_key[key])
+                    continue
+                if name is None:
+                    seq += 1
+                    while f"{SCENARIO_LABEL} {seq}" in used:
+                        seq += 1
+                    name = f"{SCENARIO_LABEL} {seq}"
+                elif name in used:
+                    # O nome passa para a nova config
+                    del by_key[next(k for k, n in by_key.items() if n == name)]
+                    if any(r[1] == name for r in rows):
+                        rows = [r for r in rows if r[1] != name]
+                        added -= 1
+                    else:
+                        conn.execute("DELETE FROM cenarios WHERE nome = ?", (name,))
+                by_key[key] = name
+                used.add(name)
+                final.append(name)
+                rows.append((key, name, json.dumps(cfg, ensure_ascii=False), agora))
+                added += 1
+            conn.executemany("INSERT INTO cenarios (chave, nome, config, criado) VALUES (?, ?, ?, ?)", rows)
+        return {'added': added, 'duplicates': duplicates, 'names': final}
+
+    def save(self, name, cfg):
+        """Salva a config com o nome `name`; retorna o nome sob o qual ela ficou guardada.
+
+        Se a mesma config já estiver salva, nada é gravado e o nome existente é retornado.
+        """
+        return self.add_many([name], [cfg])['names'][0]
+
+    def import_file(self, source, fmt=None):
+        """Importa os cenários de um CSV ou JSON/JSONL (ver `read_scenarios` e `add_many`)."""
+        names, cfgs = read_scenarios(source, fmt)
+        return self.add_many(names, cfgs)
+
+    def export_jsonl(self):
+        """Todos os cenários em JSONL ({"nome", "config"}), no formato aceito por `import_file`."""
+        return "".join(json.dumps({NAME_COLUMN: name, 'config': cfg}, ensure_ascii=False) + "\n"
+                       for name, _, cfg in self.entries())
+
+    def remove(self, name):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cenarios WHERE nome = ?", (name,))
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cenarios")
+
+    def pending(self, cache, names=None):
+        """Nomes dos cenários sem resultado no cache."""
+        return [name for name, key, _ in self.entries(names) if key not in cache]
+
+    def run_pending(self, cache, names=None, processes=None, store=None):
+        """Executa em paralelo os cenários sem resultado no cache e grava os resultados.
+
+        Com `store` (um `ComparisonStore`), todos os cenários selecionados, executados
+        agora ou já em cache, são incluídos no comparativo. Retorna os nomes executados.
+        """
+        entries = self.entries(names)
+        todo = [e for e in entries if e[1] not in cache]
+        results = run_configs([cfg for _, _, cfg in todo], processes=processes, keep_frames=True)
+        computed = {}
+        for (_, key, cfg), (_, cols) in zip(todo, results):
+            cache.put(cfg, cols, key=key)
+            computed[key] = cols
+        if store is not None:
+            for name, key, cfg in entries:
+                cols = computed.get(key)
+                if cols is None:
+                    # Lido do cache (ou recalculado, se a entrada foi removida pelo LRU)
+                    cols = cache.get_or_compute(cfg)
+                store.add(name, cfg, cols)
+        return [name for name, _, _ in todo]
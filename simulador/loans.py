@@ -0,0 +1,131 @@
+"""Tabelas de amortização dos financiamentos de terreno.
+
+Tipos de financiamento (`owned.land_loan_type`):
+
+  - 'sac'    amortização constante (padrão)
+  - 'price'  parcela constante (Tabela Price / PMT)
+
+Opções comuns aos dois tipos:
+
+  - `owned.land_grace_months`  carência: meses iniciais em que só os juros são pagos
+  - `owned.land_balloon_pct`   balão: % do valor financiado pago junto com a última parcela
+
+A tabela de um conjunto de termos (tipo, parcelas, taxa, carência, balão) é
+calculada uma única vez, para principal unitário (todos os valores são
+proporcionais ao valor financiado), e guardada em cache. Cada coorte da
+carteira referencia a tabela pelo número de pagamentos feitos desde a
+aquisição; os pagamentos do mês de todas as coortes são uma consulta
+vetorizada (gather) nas colunas da tabela.
+
+O SAC sem carência e sem balão continua sendo calculado pelos totais correntes
+de `FinancingLedger` (recorrências lineares, O(1) por mês), sem tabela.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+LOAN_TYPES = ('sac', 'price')
+
+
+class AmortizationTable:
+    """Tabela de amortização por unidade de principal.
+
+    `juros[k]` e `amortizacao[k]` são os valores do pagamento k+1; `saldo[k]` e
+    `divida_futura[k]` são os valores após k pagamentos (k = 0 na contratação).
+    As quatro colunas têm `pagamentos + 1` posições (juros e amortização valem 0
+    na última), para serem indexadas pelo mesmo deslocamento.
+    """
+
+    __slots__ = ('tipo', 'parcelas', 'taxa_juros_mensal', 'carencia', 'balao',
+                 'pagamentos', 'juros', 'amortizacao', 'saldo', 'divida_futura')
+
+    def __init__(self, tipo, parcelas, taxa_juros_mensal, carencia, balao, juros, amortizacao, saldo):
+        self.tipo = tipo
+        self.parcelas = parcelas
+        self.taxa_juros_mensal = taxa_juros_mensal
+        self.carencia = carencia
+        self.balao = balao
+        self.pagamentos = carencia + parcelas
+        self.juros = juros
+        self.amortizacao = amortizacao
+        self.saldo = saldo
+        # Dívida Futura = saldo devedor + juros sobre o saldo para os pagamentos restantes
+        restantes = self.pagamentos - np.arange(self.pagamentos + 1)
+        self.divida_futura = saldo + saldo * taxa_juros_mensal * restantes
+        for col in (self.juros, self.amortizacao, self.saldo, self.divida_futura):
+            col.flags.writeable = False
+
+    def __len__(self):
+        return self.pagamentos
+
+    def parcela(self):
+        """Valor total (juros + amortização) de cada pagamento."""
+        return (self.juros + self.amortizacao)[:self.pagamentos]
+
+    def to_frame(self, principal=1.0):
+        """Tabela de amortização de um financiamento de `principal` (uma linha por pagamento)."""
+        import pandas as pd
+        n = self.pagamentos
+        return pd.DataFrame({
+            "Pagamento": np.arange(1, n + 1),
+            "Juros": self.juros[:n] * principal,
+            "Amortização": self.amortizacao[:n] * principal,
+            "Parcela": self.parcela() * principal,
+            "Saldo Devedor": self.saldo[1:] * principal,
+        })
+
+def loan_terms(cfg_owned: dict):
+    """Termos do financiamento na config: (tipo, carência em meses, balão em fração do principal)."""
+    tipo = str(cfg_owned.get('land_loan_type', 'sac') or 'sac').lower()
+    if tipo not in LOAN_TYPES:
+        raise ValueError(f"Tipo de financiamento desconhecido: {tipo} (use {', '.join(LOAN_TYPES)}).")
+    carencia = max(0, int(cfg_owned.get('land_grace_months', 0) or 0))
+    balao = float(cfg_owned.get('land_balloon_pct', 0.0) or 0.0) / 100.0
+    if not 0.0 <= balao <= 1.0:
+        raise ValueError("O balão do financiamento deve estar entre 0% e 100%.")
+    return tipo, carencia, balao
+
+@lru_cache(maxsize=256)
+def amortization_table(tipo, parcelas, taxa_juros_mensal, carencia=0, balao=0.0):
+    """Tabela (cacheada) para principal 1 com `carencia` meses só de juros e `parcelas` amortizações."""
+    parcelas, carencia = int(parcelas), int(carencia)
+    if parcelas <= 0:
+        raise ValueError("O financiamento precisa de pelo menos 1 parcela.")
+    r = float(taxa_juros_mensal)
+    n = carencia + parcelas
+    j = np.arange(1, parcelas + 1)            # parcelas já pagas após cada amortização
+    amortizado = 1.0 - balao
+    if tipo == 'sac':
+        amort = np.full(parcelas, amortizado / parcelas)
+        saldo_apos = 1.0 - j * (amortizado / parcelas)
+        # O balão é pago com a última parcela, quitando o saldo
+        saldo_apos[-1] = 0.0
+        amort[-1] += balao
+    elif tipo == 'price':
+        if r > 0:
+            # Parcela constante que amortiza (1 - balão) e deixa o balão para o fim
+            fator = (1 + r) ** j
+            pmt = (1.0 - balao * (1 + r) ** -parcelas) * r / (1 - (1 + r) ** -parcelas)
+            saldo_apos = fator - pmt * (fator - 1) / r
+        else:
+            saldo_apos = 1.0 - j * (amortizado / parcelas)
+        saldo_apos[-1] = 0.0
+        amort = np.concatenate(([1.0], saldo_apos[:-1])) - saldo_apos
+    else:
+        raise ValueError(f"Tipo de financiamento desconhecido: {tipo}")
+
+    saldo = np.empty(n + 1)
+    saldo[:carencia + 1] = 1.0
+    saldo[carencia + 1:] = saldo_apos
+    juros = np.zeros(n + 1)
+    juros[:n] = r * saldo[:n]
+    amortizacao = np.zeros(n + 1)
+    amortizacao[carencia:n] = amort
+    return AmortizationTable(tipo, parcelas, r, carencia, balao, juros, amortizacao, saldo)
+
+def loan_table(cfg_owned: dict, parcelas, taxa_juros_mensal):
+    """Tabela dos termos da config, ou None para SAC sem carência/balão (calculado sem tabela)."""
+    tipo, carencia, balao = loan_terms(cfg_owned)
+    if (tipo, carencia, balao) == ('sac', 0, 0.0) or parcelas <= 0:
+        return None
+    return amortization_table(tipo, int(parcelas), float(taxa_juros_mensal), carencia, balao)
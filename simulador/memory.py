@@ -0,0 +1,61 @@
+"""Contabilidade de memória de resultados e do estado de uma sessão.
+
+    memory_report({"simulacao": df, "comparativo": store})   # uma linha por item
+    frame_memory(df)                                         # uma linha por coluna
+
+DataFrames são medidos com `memory_usage(deep=True)`, arrays pelo `nbytes`;
+objetos com `memory_usage()` (ex.: `ComparisonStore`) informam o próprio total;
+dicionários, listas e demais objetos são percorridos recursivamente. Dados
+compartilhados entre dois itens (visões do mesmo array) entram na conta dos dois.
+"""
+import sys
+
+import numpy as np
+
+
+def nbytes(obj, _vistos=None):
+    """Bytes ocupados por `obj` e pelo que ele referencia (estimativa)."""
+    vistos = _vistos if _vistos is not None else set()
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if hasattr(obj, 'memory_usage') and callable(obj.memory_usage):
+        uso = obj.memory_usage(deep=True) if hasattr(obj, 'dtypes') or hasattr(obj, 'dtype') else obj.memory_usage()
+        return int(np.sum(uso))
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(nbytes(k, vistos) + nbytes(v, vistos) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(nbytes(v, vistos) for v in obj)
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + nbytes(vars(obj), vistos)
+    return sys.getsizeof(obj)
+
+def _kind(obj):
+    if hasattr(obj, 'shape') and hasattr(obj, 'dtypes'):
+        return f"DataFrame {obj.shape[0]}x{obj.shape[1]}"
+    if isinstance(obj, np.ndarray):
+        return f"ndarray {obj.dtype} {obj.shape}"
+    if hasattr(obj, '__len__') and not isinstance(obj, (str, bytes)):
+        return f"{type(obj).__name__} ({len(obj)})"
+    return type(obj).__name__
+
+def memory_report(items):
+    """Uma linha por item de `items` (dicionário, ex.: `st.session_state`), do maior para o menor."""
+    import pandas as pd
+    rows = [{"Item": str(name), "Tipo": _kind(obj), "Bytes": nbytes(obj)} for name, obj in dict(items).items()]
+    rows.sort(key=lambda r: r["Bytes"], reverse=True)
+    return pd.DataFrame(rows, columns=["Item", "Tipo", "Bytes"])
+
+def frame_memory(df):
+    """Uma linha por coluna de `df`: tipo e bytes (índice incluído na primeira linha)."""
+    import pandas as pd
+    uso = df.memory_usage(deep=True)
+    return pd.DataFrame({
+        "Coluna": list(uso.index),
+        "Tipo": ["índice" if col == "Index" else str(df[col].dtype) for col in uso.index],
+        "Bytes": uso.to_numpy(),
+    })
@@ -0,0 +1,285 @@
+"""Modo estocástico (Monte Carlo) do simulador.
+
+Sorteia, para cada caminho e cada ano, a taxa de correção geral, a taxa de
+valorização do terreno e um desvio percentual da receita por módulo. O laço
+mensal é o mesmo de `simulate_columns`, mas cada variável de estado é um vetor
+ao longo da dimensão de caminhos (não há laço Python por caminho).
+
+Distribuições aceitas (valores em %, como na configuração):
+
+    {'dist': 'fixed', 'value': 3.0}
+    {'dist': 'normal', 'mean': 3.0, 'std': 1.0}
+    {'dist': 'uniform', 'low': 1.0, 'high': 5.0}
+    {'dist': 'triangular', 'low': 1.0, 'mode': 3.0, 'high': 6.0}
+
+Para `revenue_per_module` a distribuição é o desvio (%) sobre a receita
+corrigida do ano; os campos omitidos usam o valor determinístico da config.
+"""
+import numpy as np
+
+from .loans import loan_table
+from .schedules import compile_schedules
+
+STOCHASTIC_FIELDS = ('general_correction_rate', 'land_appreciation_rate', 'revenue_per_module')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def draw_rates(spec, size, rng, default=0.0):
+    """Sorteia uma matriz `size` (caminhos x anos) de valores em % segundo `spec`."""
+    if spec is None:
+        return np.full(size, float(default))
+    dist = spec.get('dist', 'normal')
+    if dist == 'fixed':
+        return np.full(size, float(spec.get('value', default)))
+    if dist == 'normal':
+        return rng.normal(spec.get('mean', default), spec.get('std', 0.0), size)
+    if dist == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], size)
+    if dist == 'triangular':
+        return rng.triangular(spec['low'], spec['mode'], spec['high'], size)
+    raise ValueError(f"Distribuição desconhecida: {dist}")
+
+def run_monte_carlo(cfg: dict, distributions: dict = None, n_paths=1000, seed=None,
+                    percentiles=DEFAULT_PERCENTILES, keep_paths=False):
+    """Simula `n_paths` caminhos de uma vez e retorna as faixas de percentis.
+
+    Retorna um dicionário com:
+      - 'months': meses 1..N
+      - 'percentiles': percentis calculados
+      - 'bands': {coluna: array (percentis x meses)} para "Patrimônio Líquido" e "Caixa (Final Mês)"
+      - 'break_even': {'months': mês de equilíbrio por caminho (0 = não atingiu),
+                       'probability': fração de caminhos que atingiram,
+                       'percentiles': {p: mês ou None}}
+      - 'paths': {coluna: array (meses x caminhos)} quando `keep_paths=True`
+    """
+    distributions = distributions or {}
+    unknown = set(distributions) - set(STOCHASTIC_FIELDS)
+    if unknown:
+        raise KeyError(f"Campos estocásticos não suportados: {sorted(unknown)}")
+
+    cfg_global = cfg['global']
+    cfg_owned = cfg['owned']
+    cfg_rented = cfg['rented']
+    land_strategy = cfg['strategy']['land_strategy']
+
+    P = int(n_paths)
+    if P < 1:
+        raise ValueError(f"O número de caminhos (n_paths) precisa ser pelo menos 1: {n_paths}.")
+    months = cfg_global['years'] * 12
+    years = cfg_global['years']
+    rng = np.random.default_rng(seed)
+
+    # Taxas anuais sorteadas (caminhos x anos), em fração
+    correction = draw_rates(distributions.get('general_correction_rate'), (P, years), rng,
+                            cfg_global['general_correction_rate']) / 100.0
+    appreciation = draw_rates(distributions.get('land_appreciation_rate'), (P, years), rng,
+                              cfg_global['land_appreciation_rate']) / 100.0
+    revenue_shock = 1 + draw_rates(distributions.get('revenue_per_module'), (P, years), rng, 0.0) / 100.0
+
+    aportes, pct_retirada, pct_fundo = compile_schedules(cfg_global, months)
+    max_withdraw = cfg_global['max_withdraw_value']
+
+    # Valores por módulo e terreno
+    modules_init = cfg_global['modules_init']
+    custo_modulo = np.full(P, float(cfg_global['cost_per_module']))
+    receita_p_mod = np.full(P, float(cfg_global['revenue_per_module']))
+    manut_p_mod = np.full(P, float(cfg_global['maintenance_per_module']))
+    aluguel_p_novo_mod = np.full(P, float(cfg_rented['rent_per_new_module']))
+    parcela_p_novo_terreno = np.full(P, float(cfg_owned.get('monthly_land_plot_parcel', 0.0)))
+    valor_compra_terreno = cfg_owned.get('land_total_value', 0.0)
+    entrada_pct = cfg_owned.get('land_down_payment_pct', 0.0) / 100.0
+    parcelas = cfg_owned['land_installments']
+    taxa_juros_mensal = cfg_owned.get('land_interest_rate', 8.0) / 100.0 / 12
+    # Price, carência ou balão: pagamentos consultados na tabela pela idade da coorte
+    tabela = loan_table(cfg_owned, parcelas, taxa_juros_mensal)
+
+    # Distribuição inicial dos módulos
+    modules_owned = np.zeros(P)
+    modules_rented = np.zeros(P)
+    if land_strategy == 'owned' or (land_strategy == 'alternate' and valor_compra_terreno > 0):
+        modules_owned[:] = modules_init
+    elif land_strategy in ('rented', 'alternate'):
+        modules_rented[:] = modules_init
+
+    investimento_total = (modules_owned + modules_rented) * custo_modulo
+    historical_value = investimento_total.copy()
+    aluguel_corrente = modules_rented * cfg_rented['rent_value']
+    parcelas_novos_corrente = modules_owned * parcela_p_novo_terreno
+
+    # Carteira de financiamentos: uma coorte por ano de compra (0 = terreno inicial).
+    # Os termos unitários não dependem do caminho; apenas quantidades e valores de mercado.
+    C = years + 1
+    qtd = np.zeros((P, C))
+    valor = np.zeros((P, C))
+    saldo = np.zeros(C)
+    amort = np.zeros(C)
+    restantes = np.zeros(C, dtype=np.int64)
+    entrada_coorte = np.zeros(C, dtype=np.int64)   # mês de aquisição (coortes com tabela)
+    registrada = np.zeros(C, dtype=bool)
+
+    if land_strategy in ('owned', 'alternate') and valor_compra_terreno > 0:
+        valor_inicial = valor_compra_terreno * modules_init
+        entrada = valor_inicial * entrada_pct
+        financiado = valor_inicial - entrada
+        if parcelas > 0:
+            qtd[:, 0] = 1
+            valor[:, 0] = valor_inicial
+            saldo[0] = financiado
+            amort[0] = financiado / parcelas
+            restantes[0] = parcelas
+            registrada[0] = financiado > 0
+        investimento_total += entrada
+
+    valor_unitario_terreno = valor_compra_terreno / modules_init
+    entrada_unitaria = valor_unitario_terreno * entrada_pct
+    financiado_unitario = valor_unitario_terreno * (1 - entrada_pct)
+
+    caixa = np.zeros(P)
+    fundo_ac = np.zeros(P)
+    lucro_anual = np.zeros(P)
+    break_even = np.zeros(P, dtype=np.int64)
+
+    pl_paths = np.empty((months, P))
+    caixa_paths = np.empty((months, P))
+
+    for m in range(1, months + 1):
+        ano = (m - 1) // 12
+        modulos = modules_owned + modules_rented
+        receita = modulos * receita_p_mod * revenue_shock[:, ano]
+        manut = modulos * manut_p_mod
+
+        caixa += aportes[m - 1]
+        investimento_total += aportes[m - 1]
+
+        lucro_operacional = receita - manut - aluguel_corrente - parcelas_novos_corrente
+
+        # Financiamentos: juros e amortização de todas as coortes ativas
+        if tabela is None:
+            ativo = (saldo > 0) & (restantes > 0)
+            juros = qtd @ np.where(ativo, saldo * taxa_juros_mensal, 0.0)
+            amortizacao = qtd @ np.where(ativo, amort, 0.0)
+            saldo = np.where(ativo, saldo - amort, saldo)
+            restantes = restantes - ativo
+        else:
+            # `saldo` guarda o valor financiado; a tabela dá juros e amortização pela idade
+            k = m - 1 - entrada_coorte
+            ativo = registrada & (k >= 0) & (k < len(tabela))
+            k = np.clip(k, 0, len(tabela))
+            juros = qtd @ np.where(ativo, saldo * tabela.juros[k], 0.0)
+            amortizacao = qtd @ np.where(ativo, saldo * tabela.amortizacao[k], 0.0)
+        parcela = juros + amortizacao
+
+        caixa += lucro_operacional - parcela
+
+        # Distribuição (Retiradas + Fundo) limitada ao lucro e ao caixa
+        lucro_distribuivel = lucro_operacional - parcela
+        lucro_anual += lucro_distribuivel
+        base = np.maximum(lucro_distribuivel, 0.0)
+        retirada = base * pct_retirada[m - 1]
+        if max_withdraw > 0:
+            retirada = np.minimum(retirada, max_withdraw)
+        fundo = base * pct_fundo[m - 1]
+        total = retirada + fundo
+        proporcao = np.where(total > caixa, np.where(caixa > 0, caixa / np.where(total > 0, total, 1.0), 0.0), 1.0)
+        retirada *= proporcao
+        fundo *= proporcao
+        total = retirada + fundo
+        pode = caixa >= total
+        caixa -= np.where(pode, total, 0.0)
+        fundo_ac += np.where(pode, fundo, 0.0)
+
+        # Reinvestimento anual e correção
+        if m % 12 == 0:
+            reinvestir = np.where(lucro_anual > 0, np.maximum(caixa, 0.0), 0.0)
+            lucro_anual[:] = 0.0
+
+            alvo = land_strategy
+            if land_strategy == 'alternate':
+                alvo = 'owned' if ((m // 12) % 2 == 0) else 'rented'
+
+            if alvo == 'owned':
+                custo_unitario = custo_modulo + entrada_unitaria
+                novos = np.where(custo_unitario > 0, np.floor(reinvestir / np.where(custo_unitario > 0, custo_unitario, 1.0)), 0.0)
+                caixa -= novos * custo_unitario
+                investimento_total += novos * custo_unitario
+                historical_value += novos * custo_modulo
+                modules_owned += novos
+                parcelas_novos_corrente += novos * parcela_p_novo_terreno
+                if parcelas > 0 and financiado_unitario > 0:
+                    c = m // 12
+                    qtd[:, c] = novos
+                    valor[:, c] = valor_unitario_terreno
+                    saldo[c] = financiado_unitario
+                    amort[c] = financiado_unitario / parcelas
+                    restantes[c] = parcelas
+                    entrada_coorte[c] = m
+                    registrada[c] = True
+            elif alvo == 'rented':
+                novos = np.where(custo_modulo > 0, np.floor(reinvestir / np.where(custo_modulo > 0, custo_modulo, 1.0)), 0.0)
+                caixa -= novos * custo_modulo
+                investimento_total += novos * custo_modulo
+                historical_value += novos * custo_modulo
+                modules_rented += novos
+                aluguel_corrente += novos * aluguel_p_novo_mod
+
+            fator = 1 + correction[:, ano]
+            custo_modulo = custo_modulo * fator
+            receita_p_mod = receita_p_mod * fator
+            manut_p_mod = manut_p_mod * fator
+            aluguel_corrente = aluguel_corrente * fator
+            parcelas_novos_corrente = parcelas_novos_corrente * fator
+            aluguel_p_novo_mod = aluguel_p_novo_mod * fator
+            parcela_p_novo_terreno = parcela_p_novo_terreno * fator
+            valor *= (1 + appreciation[:, ano])[:, None]
+
+        # KPIs: valor de mercado e dívida futura das coortes ainda ativas
+        if tabela is None:
+            ativo = (saldo > 0) & (restantes > 0)
+            divida_coorte = saldo + saldo * taxa_juros_mensal * restantes
+        else:
+            pagos = m - entrada_coorte
+            ativo = registrada & (pagos < len(tabela))
+            divida_coorte = saldo * tabela.divida_futura[np.clip(pagos, 0, len(tabela))]
+        fator_mensal = (1 + appreciation[:, ano]) ** (1 / 12)
+        valor_mercado = (qtd * valor) @ ativo.astype(float) * fator_mensal
+        divida_futura = qtd @ np.where(ativo, divida_coorte, 0.0)
+
+        patrimonio = historical_value + caixa + fundo_ac + valor_mercado - divida_futura
+        pl_paths[m - 1] = patrimonio
+        caixa_paths[m - 1] = caixa
+        break_even = np.where((break_even == 0) & (patrimonio >= investimento_total), m, break_even)
+
+    pcts = list(percentiles)
+    atingiu = break_even > 0
+    be_pct = {}
+    if atingiu.any():
+        valores = np.percentile(np.where(atingiu, break_even, np.iinfo(np.int64).max), pcts, method='inverted_cdf')
+        be_pct = {p: (int(v) if v <= months else None) for p, v in zip(pcts, valores)}
+    else:
+        be_pct = {p: None for p in pcts}
+
+    result = {
+        'months': np.arange(1, months + 1),
+        'percentiles': pcts,
+        'bands': {
+            "Patrimônio Líquido": np.percentile(pl_paths, pcts, axis=1),
+            "Caixa (Final Mês)": np.percentile(caixa_paths, pcts, axis=1),
+        },
+        'break_even': {
+            'months': break_even,
+            'probability': float(atingiu.mean()),
+            'percentiles': be_pct,
+        },
+    }
+    if keep_paths:
+        result['paths'] = {"Patrimônio Líquido": pl_paths, "Caixa (Final Mês)": caixa_paths}
+    return result
+
+def bands_to_frame(result: dict, column: str):
+    """Converte as faixas de uma coluna em DataFrame (Mês + uma coluna por percentil)."""
+    import pandas as pd
+    bands = result['bands'][column]
+    data = {"Mês": result['months']}
+    for p, serie in zip(result['percentiles'], bands):
+        data[f"P{p}"] = serie
+    return pd.DataFrame(data)
@@ -0,0 +1,547 @@
+"""Carteira de unidades (portfólio): várias unidades simuladas juntas.
+
+Cada unidade tem a própria configuração (custo e receita por módulo, aluguel,
+termos do terreno, estratégia...), normalmente vinda de uma tabela com uma
+linha por unidade:
+
+    nome;cost_per_module;revenue_per_module;rent_value;land_strategy
+    Centro;75000;4500;750;owned
+    Norte;68000;4100;700;rented
+
+As colunas são campos da configuração no formato de `sweep.set_field`
+("secao.campo" ou só "campo"); células vazias mantêm o valor da config base.
+
+O laço mensal é o mesmo de `simulate_columns`, mas cada variável de estado é
+um vetor ao longo do eixo de unidades (não há laço Python por unidade). A
+carteira de financiamentos de cada unidade é representada pelos mesmos totais
+correntes de `FinancingLedger` (um vetor por total) e por uma agenda de
+quitações por mês, de modo que os resultados de cada unidade coincidem com os
+da simulação individual. O custo do laço cresce pouco com o número de
+unidades; o horizonte (`years`) precisa ser o mesmo em todas.
+"""
+import csv
+import io
+import os
+from copy import deepcopy
+
+import numpy as np
+
+from .engine import (
+    COUNT_COLS,
+    FLOAT_COLUMNS,
+    INT_COLUMNS,
+    RESULT_COLUMNS,
+    SERIES,
+    _fill_columns,
+    calculate_summary_metrics,
+    get_default_config,
+    result_frame,
+)
+from .loans import loan_table
+from .schedules import _parse_number, compile_schedules
+from .sweep import get_field, set_field
+
+NAME_COLUMN = "nome"
+SITE_COLUMN = "Unidade"
+# Colunas consolidadas: todas as do resultado mensal, somadas entre as unidades (exceto Mês/Ano)
+CONSOLIDATED_COLUMNS = [c for c in RESULT_COLUMNS if c not in ("Mês", "Ano")]
+
+
+def _read_rows(source):
+    """Linhas (dicionários de texto) de um CSV: caminho, arquivo aberto, texto ou bytes; separador `,` ou `;`."""
+    # Texto de uma linha só (ex.: apenas o cabeçalho) também é CSV: caminho só se o arquivo existir
+    if isinstance(source, os.PathLike) or (isinstance(source, str) and '\n' not in source and os.path.exists(source)):
+        with open(source, encoding='utf-8-sig', newline='') as f:
+            text = f.read()
+    else:
+        text = source if isinstance(source, (str, bytes)) else source.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    dialect = csv.Sniffer().sniff(text.splitlines()[0], delimiters=',;')
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    reader.fieldnames = [(h or '').strip() for h in reader.fieldnames or []]
+    return list(reader)
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip()) or (isinstance(value, float) and value != value)
+
+def _coerce(value, atual):
+    """Converte o valor da tabela para o tipo do campo na config base."""
+    if isinstance(atual, bool):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ('1', 'true', 'sim')
+    if isinstance(atual, int):
+        return int(_parse_number(value)) if isinstance(value, str) else int(value)
+    if isinstance(atual, float):
+        return _parse_number(value) if isinstance(value, str) else float(value)
+    return value.strip() if isinstance(value, str) else value
+
+def _row_config(row: dict, base: dict, label: str):
+    """Cópia de `base` com os campos preenchidos da linha (a coluna `nome` é ignorada)."""
+    cfg = deepcopy(base)
+    for field, value in row.items():
+        if field == NAME_COLUMN or _is_blank(value):
+            continue
+        try:
+            set_field(cfg, field, _coerce(value, get_field(cfg, field)))
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"{label}: campo desconhecido '{field}'.") from e
+        except ValueError as e:
+            raise ValueError(f"{label}: valor inválido para '{field}': {value!r}.") from e
+    return cfg
+
+def site_configs(table, base: dict = None):
+    """Retorna (nomes, configs) das unidades de `table`.
+
+    `table` é um DataFrame, uma lista de dicionários ou um CSV (caminho, arquivo,
+    texto ou bytes). A coluna `nome` é opcional (padrão "Unidade N").
+    """
+    base = base if base is not None else get_default_config()
+    if hasattr(table, 'to_dict'):
+        rows = table.to_dict('records')
+    elif isinstance(table, (str, bytes, os.PathLike)) or hasattr(table, 'read'):
+        rows = _read_rows(table)
+    else:
+        rows = list(table)
+    names, cfgs = [], []
+    for i, row in enumerate(rows, start=1):
+        name = row.get(NAME_COLUMN)
+        cfgs.append(_row_config(row, base, f"{SITE_COLUMN} {i}"))
+        names.append(f"{SITE_COLUMN} {i}" if _is_blank(name) else str(name).strip())
+    if len(set(names)) != len(names):
+        raise ValueError("Os nomes das unidades precisam ser únicos.")
+    return names, cfgs
+
+def _param(cfgs, section, key, default=None):
+    return np.array([float(c[section].get(key, default) if default is not None else c[section][key]) for c in cfgs])
+
+class _SiteLedger:
+    """Totais correntes de `FinancingLedger` para cada unidade (um vetor por total).
+
+    As coortes não são guardadas individualmente: cada compra agenda a sua
+    quitação (mês + parcelas), quando os totais da unidade são abatidos como em
+    `FinancingLedger._remove`. Nas unidades com tabela de amortização (`tabelas`,
+    uma por unidade ou None), cada coorte guarda a unidade, o peso (quantidade x
+    valor financiado) e o mês de entrada; os pagamentos do mês são uma consulta
+    nas colunas das tabelas, somada por unidade.
+    """
+
+    def __init__(self, n_sites, tabelas=None):
+        self.n_sites = n_sites
+        tabelas = tabelas if tabelas is not None else [None] * n_sites
+        unicas = list({id(t): t for t in tabelas if t is not None}.values())
+        inicio = {}
+        posicao = 0
+        for t in unicas:
+            inicio[id(t)] = posicao
+            posicao += len(t) + 1
+        self.inicio_tabela = np.array([inicio[id(t)] if t is not None else -1 for t in tabelas], dtype=np.int64)
+        self.pagamentos_tabela = np.array([len(t) if t is not None else 0 for t in tabelas], dtype=np.int64)
+        self._juros_tabela = np.concatenate([t.juros for t in unicas]) if unicas else np.zeros(0)
+        self._amort_tabela = np.concatenate([t.amortizacao for t in unicas]) if unicas else np.zeros(0)
+        self._divida_tabela = np.concatenate([t.divida_futura for t in unicas]) if unicas else np.zeros(0)
+        # Coortes ativas com tabela (ordem de entrada): unidade, peso, posição inicial, mês de entrada
+        self.ag_unidade = np.zeros(0, dtype=np.int64)
+        self.ag_peso = np.zeros(0)
+        self.ag_inicio = np.zeros(0, dtype=np.int64)
+        self.ag_entrada = np.zeros(0, dtype=np.int64)
+        self.divida_agendada = np.zeros(n_sites)
+        self.n_ativas = np.zeros(n_sites, dtype=np.int64)
+        self.indice_valorizacao = np.ones(n_sites)
+        self.tot_valor_base = np.zeros(n_sites)
+        self.tot_saldo = np.zeros(n_sites)
+        self.tot_juros = np.zeros(n_sites)
+        self.tot_amort = np.zeros(n_sites)
+        self.tot_juros_amort = np.zeros(n_sites)
+        self.tot_juros_amort_n = np.zeros(n_sites)
+        self.tot_juros_futuros = np.zeros(n_sites)
+        self.quitacoes = {}   # mês -> [(unidades, q, r, a, saldo final, valor base)]
+
+    def add(self, sites, quantidade, valor_total, valor_financiado, parcelas, taxa_juros_mensal, mes):
+        """Uma coorte por unidade de `sites` (arrays alinhados a `sites`; valores por contrato)."""
+        ok = (quantidade > 0) & (parcelas > 0) & (valor_financiado > 0)
+        if not ok.all():
+            sites, quantidade, valor_total, valor_financiado, parcelas, taxa_juros_mensal = (
+                x[ok] for x in (sites, quantidade, valor_total, valor_financiado, parcelas, taxa_juros_mensal))
+        if sites.size == 0:
+            return
+        tabelada = self.inicio_tabela[sites] >= 0
+        if tabelada.any():
+            self._add_tabelada(sites[tabelada], quantidade[tabelada], valor_total[tabelada],
+                               valor_financiado[tabelada], mes)
+            if tabelada.all():
+                return
+            k = ~tabelada
+            sites, quantidade, valor_total, valor_financiado, parcelas, taxa_juros_mensal = (
+                x[k] for x in (sites, quantidade, valor_total, valor_financiado, parcelas, taxa_juros_mensal))
+        q, s, n, r = quantidade, valor_financiado, parcelas, taxa_juros_mensal
+        a = s / n
+        vb = valor_total / self.indice_valorizacao[sites]
+        self.n_ativas[sites] += 1
+        self.tot_valor_base[sites] += q * vb
+        self.tot_saldo[sites] += q * s
+        self.tot_juros[sites] += q * r * s
+        self.tot_amort[sites] += q * a
+        self.tot_juros_amort[sites] += q * r * a
+        self.tot_juros_amort_n[sites] += q * r * a * n
+        self.tot_juros_futuros[sites] += q * s * r * n
+        # Quitação no pagamento do mês `mes + n` (o mesmo n em todas as coortes de uma unidade)
+        saldo_final = s - n * a
+        for prazo in np.unique(n):
+            k = n == prazo
+            self.quitacoes.setdefault(mes + int(prazo), []).append(
+                (sites[k], q[k], r[k], a[k], saldo_final[k], vb[k]))
+
+    def _add_tabelada(self, sites, q, valor_total, s, mes):
+        vb = valor_total / self.indice_valorizacao[sites]
+        self.n_ativas[sites] += 1
+        self.tot_valor_base[sites] += q * vb
+        self.ag_unidade = np.concatenate([self.ag_unidade, sites])
+        self.ag_peso = np.concatenate([self.ag_peso, q * s])
+        self.ag_inicio = np.concatenate([self.ag_inicio, self.inicio_tabela[sites]])
+        self.ag_entrada = np.concatenate([self.ag_entrada, np.full(sites.size, mes, dtype=np.int64)])
+        n = self.pagamentos_tabela[sites]
+        for prazo in np.unique(n):
+            k = n == prazo
+            self.quitacoes.setdefault(mes + int(prazo), []).append((sites[k], q[k], None, None, None, vb[k]))
+        self._atualiza_divida_agendada(mes)
+
+    def _soma_por_unidade(self, valores):
+        # Soma sequencial na ordem de entrada (a mesma de FinancingLedger)
+        return np.bincount(self.ag_unidade, weights=valores, minlength=self.n_sites)
+
+    def _atualiza_divida_agendada(self, mes):
+        k = self.ag_inicio + (mes - self.ag_entrada)
+        self.divida_agendada = self._soma_por_unidade(self.ag_peso * self._divida_tabela[k])
+
+    def pay_month(self, mes):
+        """Paga a parcela do mês em todas as unidades; retorna (juros, amortização) por unidade."""
+        juros, amort = self.tot_juros, self.tot_amort.copy()
+        # Unidades sem coortes têm todos os totais zerados e não mudam
+        self.tot_juros_futuros += self.tot_juros_amort - juros - self.tot_juros_amort_n
+        self.tot_juros_amort_n -= self.tot_juros_amort
+        self.tot_juros = juros - self.tot_juros_amort
+        self.tot_saldo -= amort
+        if self.ag_unidade.size:
+            k = self.ag_inicio + (mes - 1 - self.ag_entrada)
+            juros = juros + self._soma_por_unidade(self.ag_peso * self._juros_tabela[k])
+            amort += self._soma_por_unidade(self.ag_peso * self._amort_tabela[k])
+        for sites, q, r, a, s, vb in self.quitacoes.pop(mes, ()):
+            self._remove(sites, q, r, a, s, vb)
+        if self.ag_unidade.size:
+            fim = (mes - self.ag_entrada) >= self.pagamentos_tabela[self.ag_unidade]
+            if fim.any():
+                ativas = ~fim
+                self.ag_unidade, self.ag_peso, self.ag_inicio, self.ag_entrada = (
+                    x[ativas] for x in (self.ag_unidade, self.ag_peso, self.ag_inicio, self.ag_entrada))
+            self._atualiza_divida_agendada(mes)
+        return juros, amort
+
+    def _remove(self, sites, q, r, a, s, vb):
+        self.n_ativas[sites] -= 1
+        vazia = self.n_ativas[sites] == 0
+        if vazia.any():
+            # Evita resíduos de ponto flutuante quando a carteira da unidade fica vazia
+            z = sites[vazia]
+            for tot in (self.tot_valor_base, self.tot_saldo, self.tot_juros, self.tot_amort,
+                        self.tot_juros_amort, self.tot_juros_amort_n, self.tot_juros_futuros):
+                tot[z] = 0.0
+            k = ~vazia
+            sites, q, vb = sites[k], q[k], vb[k]
+            if r is not None:
+                r, a, s = r[k], a[k], s[k]
+        self.tot_valor_base[sites] -= q * vb
+        if r is None:
+            # Coorte com tabela: só o valor de mercado sai dos totais
+            return
+        self.tot_saldo[sites] -= q * s
+        self.tot_juros[sites] -= q * r * s
+        self.tot_amort[sites] -= q * a
+        self.tot_juros_amort[sites] -= q * r * a
+
+    def appreciate(self, fator):
+        self.indice_valorizacao *= fator
+
+    def market_value(self, fator):
+        return self.tot_valor_base * self.indice_valorizacao * fator
+
+    def future_debt(self):
+        return self.tot_saldo + self.tot_juros_futuros + self.divida_agendada
+
+def simulate_portfolio_columns(cfgs):
+    """Simula as unidades de `cfgs` juntas e retorna {coluna: np.ndarray (unidades x meses)}."""
+    cfgs = list(cfgs)
+    S = len(cfgs)
+    if S == 0:
+        return {col: np.empty((0, 0), dtype=np.int64 if col in COUNT_COLS else np.float64) for col in RESULT_COLUMNS}
+    anos = {c['global']['years'] for c in cfgs}
+    if len(anos) > 1:
+        raise ValueError(f"Todas as unidades precisam do mesmo horizonte (anos: {sorted(anos)}).")
+    months = anos.pop() * 12
+    unidades = np.arange(S)
+
+    correction_rate_pct = _param(cfgs, 'global', 'general_correction_rate') / 100.0
+    land_appreciation_rate_pct = _param(cfgs, 'global', 'land_appreciation_rate') / 100.0
+    max_withdraw = _param(cfgs, 'global', 'max_withdraw_value')
+    # Cronogramas (meses x unidades: cada mês é uma linha contígua)
+    aportes, pct_retirada, pct_fundo = (np.ascontiguousarray(np.stack(a, axis=1))
+                                        for a in zip(*(compile_schedules(c['global'], months) for c in cfgs)))
+
+    custo_modulo_atual = _param(cfgs, 'global', 'cost_per_module')
+    receita_p_mod = _param(cfgs, 'global', 'revenue_per_module')
+    manut_p_mod = _param(cfgs, 'global', 'maintenance_per_module')
+    aluguel_p_mod = _param(cfgs, 'rented', 'rent_value')
+    aluguel_p_novo_mod = _param(cfgs, 'rented', 'rent_per_new_module')
+    valor_compra_terreno = _param(cfgs, 'owned', 'land_total_value', 0.0)
+    parcela_p_novo_terreno = _param(cfgs, 'owned', 'monthly_land_plot_parcel', 0.0)
+    entrada_pct = _param(cfgs, 'owned', 'land_down_payment_pct', 0.0) / 100.0
+    taxa_juros_mensal = _param(cfgs, 'owned', 'land_interest_rate', 8.0) / 100.0 / 12
+    parcelas = np.array([c['owned']['land_installments'] for c in cfgs], dtype=np.int64)
+    modules_init = np.array([c['global']['modules_init'] for c in cfgs], dtype=np.int64)
+    if (modules_init <= 0).any():
+        raise ValueError("Todas as unidades precisam de pelo menos 1 módulo inicial (modules_init).")
+    land_strategy = np.array([c['strategy']['land_strategy'] for c in cfgs])
+    comprado = land_strategy == 'owned'
+    alugado = land_strategy == 'rented'
+    intercalado = land_strategy == 'alternate'
+
+    # Distribuição inicial dos módulos baseada na estratégia
+    inicia_comprado = comprado | (intercalado & (valor_compra_terreno > 0))
+    inicia_alugado = alugado | (intercalado & ~(valor_compra_terreno > 0))
+    modules_owned = np.where(inicia_comprado, modules_init, 0)
+    modules_rented = np.where(inicia_alugado, modules_init, 0)
+
+    historical_value_owned = modules_owned * custo_modulo_atual
+    historical_value_rented = modules_rented * custo_modulo_atual
+    investimento_total = historical_value_owned + historical_value_rented
+    investimento_inicial = investimento_total.copy()
+    investimento_em_terrenos = np.zeros(S)
+    aluguel_mensal_corrente = modules_rented * aluguel_p_mod
+    parcelas_terrenos_novos_mensal_corrente = modules_owned * parcela_p_novo_terreno
+
+    tabelas = [loan_table(c['owned'], p, t) for c, p, t in zip(cfgs, parcelas.tolist(), taxa_juros_mensal.tolist())]
+    financiamentos = _SiteLedger(S, tabelas)
+    financia = (comprado | intercalado) & (valor_compra_terreno > 0)
+    if financia.any():
+        valor_total_terreno_inicial = valor_compra_terreno * modules_init
+        valor_entrada_terreno = np.where(financia, valor_total_terreno_inicial * entrada_pct, 0.0)
+        valor_financiado = valor_total_terreno_inicial - valor_entrada_terreno
+        k = financia & (parcelas > 0)
+        financiamentos.add(unidades[k], np.ones(k.sum(), dtype=np.int64), valor_total_terreno_inicial[k],
+                           valor_financiado[k], parcelas[k], taxa_juros_mensal[k], 0)
+        investimento_total += valor_entrada_terreno
+        investimento_em_terrenos += valor_entrada_terreno
+
+    caixa = np.zeros(S)
+    fundo_ac = np.zeros(S)
+    retiradas_ac = np.zeros(S)
+    juros_acumulados = np.zeros(S)
+    amortizacao_acumulada = np.zeros(S)
+    aluguel_acumulado = np.zeros(S)
+    parcelas_novas_acumuladas = np.zeros(S)
+    lucro_acumulado_anual = np.zeros(S)
+    sem_compra = np.zeros(S, dtype=np.int64)
+
+    custo_modulo_atual_corrigido = custo_modulo_atual
+    receita_p_mod_corrigida = receita_p_mod
+    manut_p_mod_corrigida = manut_p_mod
+    aluguel_p_novo_mod_corrigido = aluguel_p_novo_mod
+    parcela_p_novo_terreno_corrigido = parcela_p_novo_terreno
+    fator_mensal_terreno = (1 + land_appreciation_rate_pct) ** (1/12)
+    limita_retirada = max_withdraw > 0
+    # Termos unitários do terreno de cada novo módulo próprio
+    entrada_unitaria = valor_compra_terreno * entrada_pct / modules_init
+    valor_unitario_terreno = valor_compra_terreno / modules_init
+    valor_unitario_financiado = valor_unitario_terreno * (1 - entrada_pct)
+    financia_novos = (parcelas > 0) & (valor_unitario_financiado > 0)
+
+    # Séries gravadas a cada mês (meses x séries x unidades; ver SERIES)
+    linhas_modulos = np.empty((months, 3, S), dtype=np.int64)
+    linhas_serie = np.empty((months, len(SERIES), S))
+
+    for m in range(1, months + 1):
+        if m % 12 == 1:
+            # Receita, manutenção e lucro operacional só mudam no reinvestimento anual
+            modulos = modules_owned + modules_rented
+            receita = modulos * receita_p_mod_corrigida
+            manut = modulos * manut_p_mod_corrigida
+            gastos_operacionais = aluguel_mensal_corrente + parcelas_terrenos_novos_mensal_corrente
+            lucro_operacional = receita - manut - gastos_operacionais
+        novos_modulos_comprados = sem_compra
+
+        aporte_mes = aportes[m - 1]
+        caixa += aporte_mes
+        investimento_total += aporte_mes
+
+        juros, amortizacao = financiamentos.pay_month(m)
+        valor_mercado_total = financiamentos.market_value(fator_mensal_terreno)
+        divida_futura_total = financiamentos.future_debt()
+        parcela = juros + amortizacao
+        juros_acumulados += juros
+        amortizacao_acumulada += amortizacao
+        investimento_em_terrenos += amortizacao
+        caixa += lucro_operacional
+        caixa -= parcela
+
+        # Distribuição (Retiradas + Fundo) limitada ao lucro e ao caixa
+        lucro_distribuivel = lucro_operacional - parcela
+        lucro_acumulado_anual += lucro_distribuivel
+        distribui = lucro_distribuivel > 0
+        retirada = np.where(distribui, lucro_distribuivel * pct_retirada[m - 1], 0.0)
+        fundo = np.where(distribui, lucro_distribuivel * pct_fundo[m - 1], 0.0)
+        retirada = np.where(limita_retirada & (retirada > max_withdraw), max_withdraw, retirada)
+        total_distrib = retirada + fundo
+        excede = total_distrib > caixa
+        if excede.any():
+            positivo = excede & (caixa > 0)
+            proporcao = np.divide(caixa, total_distrib, out=np.ones(S), where=positivo)
+            retirada = np.where(excede & ~positivo, 0.0, retirada * proporcao)
+            fundo = np.where(excede & ~positivo, 0.0, fundo * proporcao)
+        # Sem caixa suficiente, nada é descontado
+        total_a_descontar = retirada + fundo
+        pode = caixa >= total_a_descontar
+        retirada = np.where(pode, retirada, 0.0)
+        fundo = np.where(pode, fundo, 0.0)
+        caixa = np.where(pode, caixa - total_a_descontar, caixa)
+        retiradas_ac += retirada
+        fundo_ac += fundo
+        aluguel_acumulado += aluguel_mensal_corrente
+        parcelas_novas_acumuladas += parcelas_terrenos_novos_mensal_corrente
+
+        if m % 12 == 0:
+            caixa_para_reinvestir = np.where(lucro_acumulado_anual > 0, np.maximum(caixa, 0.0), 0.0)
+            lucro_acumulado_anual = np.zeros(S)
+
+            par = (m // 12) % 2 == 0
+            alvo_owned = comprado | (intercalado & par)
+            alvo_rented = alugado | (intercalado & (not par))
+            custo_modulo = custo_modulo_atual_corrigido
+            custo_total_owned_unitario = custo_modulo + entrada_unitaria
+            compra_owned = alvo_owned & (custo_total_owned_unitario > 0)
+            compra_rented = alvo_rented & (custo_modulo > 0)
+            custo_unitario = np.where(compra_owned, custo_total_owned_unitario, np.where(compra_rented, custo_modulo, 1.0))
+            novos_modulos_comprados = np.where(compra_owned | compra_rented, caixa_para_reinvestir // custo_unitario, 0.0)
+            if (novos_modulos_comprados >= 2.0 ** 63).any():
+                raise OverflowError("Quantidade de módulos comprados excede o limite de inteiros de 64 bits.")
+            novos_modulos_comprados = novos_modulos_comprados.astype(np.int64)
+            if novos_modulos_comprados.any():
+                novos_owned = np.where(compra_owned, novos_modulos_comprados, 0)
+                novos_rented = np.where(compra_rented, novos_modulos_comprados, 0)
+
+                caixa -= novos_owned * custo_total_owned_unitario
+                investimento_total += novos_owned * custo_total_owned_unitario
+                historical_value_owned += novos_owned * custo_modulo
+                modules_owned = modules_owned + novos_owned
+                investimento_em_terrenos += novos_owned * entrada_unitaria
+                parcelas_terrenos_novos_mensal_corrente = (parcelas_terrenos_novos_mensal_corrente
+                                                           + novos_owned * parcela_p_novo_terreno_corrigido)
+                k = (novos_owned > 0) & financia_novos
+                if k.any():
+                    financiamentos.add(unidades[k], novos_owned[k], valor_unitario_terreno[k],
+                                       valor_unitario_financiado[k], parcelas[k], taxa_juros_mensal[k], m)
+
+                custo_rented = novos_rented * custo_modulo
+                caixa -= custo_rented
+                investimento_total += custo_rented
+                historical_value_rented += custo_rented
+                modules_rented = modules_rented + novos_rented
+                aluguel_mensal_corrente = aluguel_mensal_corrente + novos_rented * aluguel_p_novo_mod_corrigido
+
+            # Correção anual
+            correction_factor = 1 + correction_rate_pct
+            custo_modulo_atual_corrigido = custo_modulo_atual_corrigido * correction_factor
+            receita_p_mod_corrigida = receita_p_mod_corrigida * correction_factor
+            manut_p_mod_corrigida = manut_p_mod_corrigida * correction_factor
+            aluguel_mensal_corrente = aluguel_mensal_corrente * correction_factor
+            parcelas_terrenos_novos_mensal_corrente = parcelas_terrenos_novos_mensal_corrente * correction_factor
+            aluguel_p_novo_mod_corrigido = aluguel_p_novo_mod_corrigido * correction_factor
+            parcela_p_novo_terreno_corrigido = parcela_p_novo_terreno_corrigido * correction_factor
+            financiamentos.appreciate(1 + land_appreciation_rate_pct)
+
+            valor_mercado_total = financiamentos.market_value(fator_mensal_terreno)
+            divida_futura_total = financiamentos.future_debt()
+
+        linhas_modulos[m - 1] = (modules_owned, modules_rented, novos_modulos_comprados)
+        linhas_serie[m - 1] = (
+            caixa, investimento_total, juros_acumulados, amortizacao_acumulada, investimento_em_terrenos,
+            retiradas_ac, fundo_ac, aluguel_acumulado, parcelas_novas_acumuladas,
+            aporte_mes, juros, amortizacao, retirada, fundo, valor_mercado_total, divida_futura_total,
+            receita, manut, aluguel_mensal_corrente, parcelas_terrenos_novos_mensal_corrente,
+            historical_value_owned + historical_value_rented,
+        )
+
+    contagens = np.empty((len(INT_COLUMNS), S, months), dtype=np.int64)
+    valores = np.empty((len(FLOAT_COLUMNS), S, months), dtype=np.float64)
+    _fill_columns(contagens, valores, linhas_modulos.transpose(1, 2, 0), linhas_serie.transpose(1, 2, 0),
+                  0, investimento_inicial[:, None])
+    columns = dict(zip(INT_COLUMNS, contagens))
+    columns.update(zip(FLOAT_COLUMNS, valores))
+    return {col: columns[col] for col in RESULT_COLUMNS}
+
+class PortfolioResult:
+    """Resultado de `run_portfolio`: colunas por unidade (unidades x meses) e a consolidação."""
+
+    def __init__(self, names, cfgs, columns):
+        self.names = list(names)
+        self.cfgs = list(cfgs)
+        self.columns = columns
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def site_columns(self, site):
+        """Colunas mensais de uma unidade (nome ou posição), como visões sem cópia."""
+        i = self._index[site] if isinstance(site, str) else site
+        return {col: self.columns[col][i] for col in RESULT_COLUMNS}
+
+    def site_frame(self, site):
+        return result_frame(self.site_columns(site))
+
+    def frames(self):
+        """{nome: DataFrame mensal} de todas as unidades."""
+        return {name: self.site_frame(i) for i, name in enumerate(self.names)}
+
+    def consolidated_columns(self):
+        """Colunas do portfólio: soma das unidades em cada mês (Mês/Ano inalterados)."""
+        cols = {"Mês": self.columns["Mês"][0], "Ano": self.columns["Ano"][0]} if self.names else {}
+        cols.update((col, self.columns[col].sum(axis=0)) for col in CONSOLIDATED_COLUMNS)
+        return cols
+
+    def consolidated_frame(self):
+        return result_frame(self.consolidated_columns())
+
+    def summary_frame(self):
+        """Uma linha por unidade (e uma de total) com os KPIs finais."""
+        import pandas as pd
+        rows = []
+        for name, cols in zip(self.names + ["Portfólio"],
+                              [self.site_columns(i) for i in range(len(self))] + [self.consolidated_columns()]):
+            if len(cols.get("Mês", ())) == 0:
+                continue
+            summary = calculate_summary_metrics(cols)
+            rows.append({
+                SITE_COLUMN: name,
+                "Módulos Ativos": int(cols["Módulos Ativos"][-1]),
+                "Patrimônio Líquido Final": float(cols["Patrimônio Líquido"][-1]),
+                "Dívida Futura Total": float(cols["Dívida Futura Total"][-1]),
+                "Investimento Total": summary["total_investment"],
+                "ROI Total (%)": summary["roi_pct"],
+                "Ponto de Equilíbrio": summary["break_even_month"],
+            })
+        return pd.DataFrame(rows)
+
+def run_portfolio(sites, base: dict = None, names=None):
+    """Simula um portfólio de unidades e retorna um `PortfolioResult`.
+
+    `sites` é uma tabela de unidades (ver `site_configs`) ou uma lista de
+    configurações completas (com `names` opcional).
+    """
+    if isinstance(sites, (list, tuple)) and sites and all(isinstance(c, dict) and 'global' in c for c in sites):
+        cfgs = list(sites)
+        names = list(names) if names is not None else [f"{SITE_COLUMN} {i}" for i in range(1, len(cfgs) + 1)]
+    else:
+        names, cfgs = site_configs(sites, base)
+    return PortfolioResult(names, cfgs, simulate_portfolio_columns(cfgs))
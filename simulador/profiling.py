@@ -0,0 +1,102 @@
+"""Perfil de execução do motor (tempo por fase, contagens do laço e alocações).
+
+A instrumentação é opcional: `run_simulation(cfg, profile=SimulationProfile())`
+preenche o perfil passado; sem `profile`, o laço mensal não faz nenhuma chamada
+de relógio. As fases medidas são:
+
+  - preparacao       (leitura da config, cronogramas, carteira inicial)
+  - financiamentos   (receitas do mês e pagamento das parcelas dos terrenos)
+  - distribuicao     (retiradas e fundo limitados ao lucro e ao caixa)
+  - reinvestimento   (compra anual de módulos e correção dos valores)
+  - kpis             (patrimônio, riqueza e gravação da linha do mês)
+  - checkpoints      (cópias de estado para a simulação incremental)
+  - dataframe        (montagem do DataFrame em `run_simulation`)
+  - cache            (consulta ao `ResultCache`, quando usado)
+
+As alocações são medidas pela variação de `sys.getallocatedblocks()` e pelas
+coletas do coletor de lixo durante a execução; com `trace_memory=True` o pico
+de memória também é registrado (via tracemalloc, com custo maior).
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PHASES = ('preparacao', 'financiamentos', 'distribuicao', 'reinvestimento', 'kpis',
+          'checkpoints', 'dataframe', 'cache')
+
+
+def _gc_collections():
+    return sum(s['collections'] for s in gc.get_stats())
+
+class SimulationProfile:
+    """Resultado da instrumentação de uma execução de `run_simulation`."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}          # fase -> segundos
+        self.counters = {}        # nome -> contagem
+        self.active_loans = None  # coortes de financiamento ativas em cada mês (np.ndarray)
+        self.cache_hit = None
+        self.memory_peak = None   # bytes (apenas com trace_memory)
+        self.wall_time = 0.0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    @contextmanager
+    def measure(self):
+        """Mede a execução inteira: tempo total, blocos alocados, coletas e pico de memória."""
+        rastrear = self.trace_memory and not tracemalloc.is_tracing()
+        if rastrear:
+            tracemalloc.start()
+        blocos, coletas = sys.getallocatedblocks(), _gc_collections()
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.wall_time += time.perf_counter() - t0
+            self.count('blocos_alocados', sys.getallocatedblocks() - blocos)
+            self.count('coletas_gc', _gc_collections() - coletas)
+            if rastrear:
+                self.memory_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def phase_frame(self):
+        """Fases em ordem de execução: tempo (ms) e participação no tempo medido."""
+        import pandas as pd
+        total = self.total or 1.0
+        nomes = [p for p in PHASES if p in self.phases] + [p for p in self.phases if p not in PHASES]
+        return pd.DataFrame({
+            "Fase": nomes,
+            "Tempo (ms)": [self.phases[p] * 1000 for p in nomes],
+            "Participação (%)": [self.phases[p] / total * 100 for p in nomes],
+        })
+
+    def to_dict(self):
+        data = {
+            "wall_time": self.wall_time,
+            "phases": dict(self.phases),
+            "counters": dict(self.counters),
+            "cache_hit": self.cache_hit,
+            "memory_peak": self.memory_peak,
+        }
+        if self.active_loans is not None:
+            data["active_loans"] = self.active_loans.tolist()
+        return data
@@ -0,0 +1,111 @@
+"""Cronogramas mensais de aportes, retiradas e fundo de reserva.
+
+As listas da configuração ({'mes', 'valor'} / {'mes', 'percentual'}) são
+compiladas uma única vez em arrays densos indexados por mês (índice 0 = mês 1),
+para que o laço mensal apenas consulte `array[m - 1]`.
+"""
+import csv
+import io
+import os
+import re
+
+import numpy as np
+
+EVENT_KINDS = {
+    'aporte': 'contributions',
+    'retirada': 'withdrawals',
+    'fundo': 'reserve_funds',
+}
+
+
+def contribution_schedule(entries, months):
+    """Valor total dos aportes em cada mês (aportes no mesmo mês são somados)."""
+    out = np.zeros(months)
+    if not entries:
+        return out
+    meses = np.array([a.get('mes', 0) or 0 for a in entries], dtype=np.int64)
+    valores = np.array([a.get('valor', 0.0) for a in entries], dtype=np.float64)
+    dentro = (meses >= 1) & (meses <= months)
+    np.add.at(out, meses[dentro] - 1, valores[dentro])
+    return out
+
+def step_pct_schedule(entries, months):
+    """Fração acumulada vigente em cada mês: cada entrada vale a partir do seu `mes`."""
+    out = np.zeros(months)
+    if not entries:
+        return out
+    meses = np.array([r['mes'] for r in entries], dtype=np.int64)
+    pct = np.array([r['percentual'] for r in entries], dtype=np.float64) / 100.0
+    inicio = np.clip(meses, 1, None)
+    dentro = inicio <= months
+    np.add.at(out, inicio[dentro] - 1, pct[dentro])
+    return np.cumsum(out)
+
+def compile_schedules(cfg_global: dict, months: int):
+    """Retorna (aportes, pct_retirada, pct_fundo) como arrays de tamanho `months`."""
+    return (
+        contribution_schedule(cfg_global.get('contributions', []), months),
+        step_pct_schedule(cfg_global.get('withdrawals', []), months),
+        step_pct_schedule(cfg_global.get('reserve_funds', []), months),
+    )
+
+def load_events_csv(source):
+    """Lê um CSV de eventos e retorna {'contributions', 'withdrawals', 'reserve_funds'}.
+
+    Colunas: `mes`, `valor` e, opcionalmente, `tipo` (aporte, retirada ou fundo;
+    padrão aporte). Para retiradas e fundo, `valor` é o percentual do lucro.
+    Aceita um caminho, um arquivo aberto, texto ou bytes; separador `,` ou `;`.
+    Valores em formato brasileiro ('2.000', '1.234,50') ou americano ('1234.5').
+    Arquivo vazio retorna listas vazias; erros de formato levantam ValueError.
+    """
+    # Texto de uma linha só (ex.: apenas o cabeçalho) também é CSV: caminho só se o arquivo existir
+    if isinstance(source, os.PathLike) or (isinstance(source, str) and '\n' not in source and os.path.exists(source)):
+        with open(source, encoding='utf-8-sig', newline='') as f:
+            text = f.read()
+    else:
+        text = source if isinstance(source, (str, bytes)) else source.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+
+    if not text.strip():
+        return {key: [] for key in EVENT_KINDS.values()}
+    try:
+        dialect = csv.Sniffer().sniff(text.strip().splitlines()[0], delimiters=',;')
+    except csv.Error as e:
+        raise ValueError(f"CSV inválido (separador `,` ou `;` com as colunas 'mes' e 'valor'): {e}") from None
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    reader.fieldnames = [_normalize_header(h) for h in reader.fieldnames or []]
+    if 'mes' not in reader.fieldnames or 'valor' not in reader.fieldnames:
+        raise ValueError("O CSV precisa das colunas 'mes' e 'valor'.")
+
+    events = {key: [] for key in EVENT_KINDS.values()}
+    for line_no, row in enumerate(reader, start=2):
+        tipo = (row.get('tipo') or 'aporte').strip().lower()
+        if tipo not in EVENT_KINDS:
+            raise ValueError(f"Linha {line_no}: tipo desconhecido '{tipo}'.")
+        try:
+            mes = int(float(row['mes']))
+            valor = _parse_number(row['valor'])
+        except (TypeError, ValueError):
+            raise ValueError(f"Linha {line_no}: mes '{row['mes']}' ou valor '{row['valor']}' inválido.") from None
+        if tipo == 'aporte':
+            events['contributions'].append({'mes': mes, 'valor': valor})
+        else:
+            events[EVENT_KINDS[tipo]].append({'mes': mes, 'percentual': valor})
+    return events
+
+def _normalize_header(h):
+    h = (h or '').strip().lower()
+    return {'mês': 'mes', 'percentual': 'valor', 'valor (r$)': 'valor'}.get(h, h)
+
+# Milhar com ponto e sem decimais: '2.000', '1.234.567'
+_THOUSANDS = re.compile(r'^[-+]?\d{1,3}(\.\d{3})+$')
+
+def _parse_number(s):
+    """Aceita '1234.5', '1.234,50', '1234,5' e '2.000' (milhar, = 2000)."""
+    s = str(s).strip().replace('R$', '').strip()
+    if ',' in s:
+        s = s.replace('.', '').replace(',', '.')
+    elif _THOUSANDS.match(s):
+        s = s.replace('.', '')
+    return float(s)
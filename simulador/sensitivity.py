@@ -0,0 +1,109 @@
+"""Análise de sensibilidade (tornado) sobre os campos numéricos da configuração.
+
+Cada campo numérico de global/owned/rented é perturbado em -Δ e +Δ (relativo ao
+valor atual), e todas as configurações resultantes, mais a base, são executadas
+em um único lote via `run_configs` (pool de processos, em lotes). Os workers
+devolvem apenas os valores das métricas pedidas, não as colunas mensais.
+
+    run_sensitivity(cfg, delta=0.10, metrics=("Patrimônio Líquido", "roi_pct"))
+
+Retorna um DataFrame com uma linha por campo, ordenado pela amplitude da
+primeira métrica (ordem do gráfico de tornado).
+"""
+import math
+from copy import deepcopy
+from functools import partial
+
+from .goalseek import metric_value
+from .sweep import get_field, run_configs, set_field
+
+SENSITIVITY_SECTIONS = ('global', 'owned', 'rented')
+# Campos que mudam a estrutura da simulação (horizonte) em vez de um valor
+EXCLUDED_FIELDS = ('global.years',)
+DEFAULT_METRICS = ("Patrimônio Líquido", "roi_pct")
+
+
+def numeric_fields(cfg: dict):
+    """Lista os campos numéricos ("secao.campo") de global/owned/rented."""
+    fields = []
+    for section in SENSITIVITY_SECTIONS:
+        for key, value in cfg.get(section, {}).items():
+            path = f"{section}.{key}"
+            if path in EXCLUDED_FIELDS or isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            fields.append(path)
+    return fields
+
+def perturb(value, delta):
+    """Retorna (valor -Δ, valor +Δ).
+
+    Inteiros (módulos, parcelas) são contagens: variam pelo menos 1 unidade e não
+    descem abaixo de 1.
+    """
+    if isinstance(value, int):
+        passo = max(1, int(round(abs(value) * delta)))
+        return max(value - passo, 1), value + passo
+    return value * (1 - delta), value * (1 + delta)
+
+def _extract_metrics(columns, metrics, month):
+    return tuple(metric_value(columns, m, month) for m in metrics)
+
+def run_sensitivity(cfg: dict, delta=0.10, fields=None, metrics=DEFAULT_METRICS, month=None,
+                    processes=None, chunksize=None):
+    """Executa a base e as perturbações ±`delta` de cada campo em um único lote.
+
+    Colunas do resultado: Campo, Base, Valor -Δ, Valor +Δ, Unilateral e, para cada
+    métrica, "<métrica> -Δ", "<métrica> +Δ", "Amplitude <métrica>" (|y+ - y-|) e
+    "Elasticidade <métrica>" ((Δy / |y|) / (Δx / x), com Δx = valor +Δ - valor -Δ
+    efetivamente simulados). Com |y| o sinal indica se a métrica sobe ou desce
+    com o campo mesmo quando a base é negativa (ex.: ROI < 0). "Unilateral" marca
+    os campos cuja perturbação não é simétrica em torno da base (ex.: contagem
+    limitada a 1): a elasticidade é então uma diferença unilateral, não central.
+    Campos com valor zero não têm perturbação relativa e ficam de fora.
+    """
+    import pandas as pd
+
+    metrics = list(metrics)
+    fields = numeric_fields(cfg) if fields is None else list(fields)
+
+    pontos, cfgs = [], [cfg]
+    for field in fields:
+        base_value = get_field(cfg, field)
+        low, high = perturb(base_value, delta)
+        if base_value == 0 or low == high:
+            continue
+        simulados = []
+        for value in (low, high):
+            trial = deepcopy(cfg)
+            set_field(trial, field, value)
+            cfgs.append(trial)
+            # Valor de fato simulado (set_field converte para o tipo do campo)
+            simulados.append(get_field(trial, field))
+        pontos.append((field, base_value, *simulados))
+
+    results = run_configs(cfgs, processes=processes, chunksize=chunksize,
+                          extract=partial(_extract_metrics, metrics=metrics, month=month))
+    base_metrics = results[0][1]
+
+    rows = []
+    for i, (field, base_value, low, high) in enumerate(pontos):
+        y_low, y_high = results[1 + 2 * i][1], results[2 + 2 * i][1]
+        unilateral = not math.isclose(base_value - low, high - base_value, rel_tol=1e-9, abs_tol=1e-12)
+        row = {"Campo": field, "Base": base_value, "Valor -Δ": low, "Valor +Δ": high, "Unilateral": unilateral}
+        dx = (high - low) / base_value
+        for metric, y0, y_lo, y_hi in zip(metrics, base_metrics, y_low, y_high):
+            row[f"{metric} -Δ"] = y_lo
+            row[f"{metric} +Δ"] = y_hi
+            row[f"Amplitude {metric}"] = abs(y_hi - y_lo)
+            finito = math.isfinite(y0) and math.isfinite(y_lo) and math.isfinite(y_hi)
+            row[f"Elasticidade {metric}"] = ((y_hi - y_lo) / abs(y0)) / dx if finito and y0 != 0 and dx != 0 else math.nan
+        rows.append(row)
+
+    columns = ["Campo", "Base", "Valor -Δ", "Valor +Δ", "Unilateral"]
+    for metric in metrics:
+        columns += [f"{metric} -Δ", f"{metric} +Δ", f"Amplitude {metric}", f"Elasticidade {metric}"]
+    df = pd.DataFrame(rows, columns=columns)
+    df.attrs["base"] = dict(zip(metrics, base_metrics))
+    if metrics and not df.empty:
+        df = df.sort_values(f"Amplitude {metrics[0]}", ascending=False, kind="stable", ignore_index=True)
+    return df
@@ -0,0 +1,266 @@
+"""Serviço HTTP local do simulador (asyncio, apenas biblioteca padrão).
+
+    python -m simulador.server --port 8765 --processes 8 --cache
+
+Rotas:
+
+  - POST /simulate            config (objeto JSON) ou lote (lista JSON / JSONL)
+  - POST /simulate?summary=1  só os KPIs de `calculate_summary_metrics`
+  - GET  /health              versão do motor e contadores do serviço
+
+As configs seguem o esquema de `get_default_config` (campos ausentes recebem os
+valores padrão). Cada config vira um registro {"cache_key", "summary", "columns"},
+como na linha de comando; um lote devolve a lista de registros na mesma ordem.
+
+As simulações rodam num pool de processos; o laço de eventos só lê as
+requisições e junta respostas. Os workers já devolvem os trechos JSON
+(KPIs e colunas mensais) codificados, que ficam num cache LRU em memória
+pela chave da config canônica. Requisições simultâneas da mesma config
+(inclusive dentro de um lote) aguardam uma única execução.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from .engine import ENGINE_VERSION, RESULT_COLUMNS, calculate_summary_metrics, compute_cache_key, simulate_columns
+from .library import canonical_config
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_CACHED = 256
+MAX_BODY_BYTES = 64 * 1024 * 1024
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+_worker_cache = None
+
+
+def _init_worker(cache_dir):
+    global _worker_cache
+    if cache_dir is not None:
+        from .cache import ResultCache
+        _worker_cache = ResultCache(cache_dir or None)
+
+def _simulate_encoded(cfg, with_columns=True):
+    """Executa a config no worker e devolve (KPIs, colunas | None) já em JSON (bytes).
+
+    Codificar as colunas mensais custa várias vezes a simulação; só é feito quando pedido.
+    """
+    cols = _worker_cache.get_or_compute(cfg) if _worker_cache is not None else simulate_columns(cfg)
+    summary = json.dumps(calculate_summary_metrics(cols), ensure_ascii=False).encode("utf-8")
+    if not with_columns:
+        return summary, None
+    columns = json.dumps({c: cols[c].tolist() for c in RESULT_COLUMNS}, ensure_ascii=False).encode("utf-8")
+    return summary, columns
+
+def _parse_body(body: bytes):
+    """Retorna (configs, lote?) de um objeto JSON, uma lista JSON ou JSONL."""
+    text = body.decode("utf-8-sig").strip()
+    if not text:
+        raise ValueError("Corpo da requisição vazio.")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()], True
+    return (data, True) if isinstance(data, list) else ([data], False)
+
+def _flag(query, name):
+    return query.get(name, [""])[-1].lower() in ("1", "true", "sim", "yes")
+
+class SimulationServer:
+    """Despacha configs para o pool, com coalescência por chave e cache das respostas."""
+
+    def __init__(self, processes=None, cache_dir=None, max_cached=DEFAULT_MAX_CACHED, max_body_bytes=MAX_BODY_BYTES):
+        self.processes = processes or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.max_cached = max_cached
+        self.max_body_bytes = max_body_bytes
+        self._pool = None
+        self._responses = OrderedDict()   # chave -> (KPIs, colunas | None) em JSON, ordem LRU
+        self._inflight = {}               # (chave, com colunas?) -> Future da execução em andamento
+        self.requests = 0
+        self.simulations = 0
+        self.hits = 0
+        self.coalesced = 0
+
+    def start(self):
+        if self._pool is None:
+            # "spawn": os workers não herdam o socket do servidor nem o estado do laço de eventos
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(self.cache_dir,))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        return {
+            "engine_version": ENGINE_VERSION,
+            "processes": self.processes,
+            "requests": self.requests,
+            "simulations": self.simulations,
+            "cache_hits": self.hits,
+            "coalesced": self.coalesced,
+            "cached": len(self._responses),
+            "inflight": len(self._inflight),
+        }
+
+    async def encoded(self, cfg, with_columns=True):
+        """(chave, KPIs, colunas | None) da config: do cache, de uma execução em andamento ou do pool."""
+        cfg = canonical_config(cfg)
+        key = compute_cache_key(cfg)
+        cached = self._responses.get(key)
+        if cached is not None and (cached[1] is not None or not with_columns):
+            self._responses.move_to_end(key)
+            self.hits += 1
+            return (key,) + cached
+        # Uma execução com colunas também atende quem só quer os KPIs
+        future = self._inflight.get((key, True)) or (None if with_columns else self._inflight.get((key, False)))
+        if future is not None:
+            self.coalesced += 1
+            return (key,) + await asyncio.shield(future)
+        self.start()
+        future = asyncio.get_running_loop().run_in_executor(self._pool, _simulate_encoded, cfg, with_columns)
+        self._inflight[(key, with_columns)] = future
+        self.simulations += 1
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._inflight.pop((key, with_columns), None)
+        atual = self._responses.get(key)
+        if atual is None or atual[1] is None:
+            self._responses[key] = result
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_cached:
+            self._responses.popitem(last=False)
+        return (key,) + result
+
+    async def record(self, cfg, summary_only=False):
+        """Registro JSON (bytes) de uma config."""
+        if not isinstance(cfg, dict):
+            raise ValueError("Cada configuração deve ser um objeto JSON.")
+        key, summary, columns = await self.encoded(cfg, with_columns=not summary_only)
+        parts = [b'{"cache_key": "', key.encode("ascii"), b'", "summary": ', summary]
+        if not summary_only:
+            parts += [b', "columns": ', columns]
+        parts.append(b"}")
+        return b"".join(parts)
+
+    async def simulate(self, body: bytes, summary_only=False):
+        configs, batch = _parse_body(body)
+        records = await asyncio.gather(*(self.record(cfg, summary_only) for cfg in configs))
+        return b"[" + b", ".join(records) + b"]" if batch else records[0]
+
+    async def respond(self, method, target, body):
+        """Retorna (status, corpo JSON em bytes) da requisição."""
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET."}
+            return 200, {"status": "ok", **self.stats()}
+        if url.path == "/simulate":
+            if method != "POST":
+                return 405, {"error": "Use POST com a configuração (JSON) no corpo."}
+            try:
+                return 200, await self.simulate(body, summary_only=_flag(parse_qs(url.query), "summary"))
+            except (ValueError, KeyError, TypeError, IndexError) as e:
+                return 400, {"error": f"Configuração inválida: {e}"}
+        return 404, {"error": f"Rota desconhecida: {url.path}"}
+
+    async def handle(self, reader, writer):
+        """Atende uma conexão HTTP/1.1 (com keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, 400, {"error": "Requisição malformada."}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._write(writer, 400, {"error": "Content-Length inválido."}, keep_alive=False)
+                    break
+                if length > self.max_body_bytes:
+                    await self._write(writer, 413, {"error": f"Corpo da requisição muito grande (máximo {self.max_body_bytes} bytes)."},
+                                      keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                self.requests += 1
+                try:
+                    status, payload = await self.respond(method.upper(), target, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                await self._write(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer, status, payload, keep_alive):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        # SIGTERM encerra como Ctrl+C: fecha o servidor e o pool (sem deixar workers órfãos)
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass   # Windows: só Ctrl+C
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="simulador.server", description="Serviço HTTP local de simulações.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--processes", type=int, default=None, help="Processos do pool (padrão: núcleos da máquina)")
+    parser.add_argument("--max-cached", type=int, default=DEFAULT_MAX_CACHED, help="Respostas mantidas em memória (LRU)")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="Usa também o cache persistente de resultados (padrão: $SIMULADOR_CACHE_DIR ou ~/.cache/simulador)")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY_BYTES, help="Tamanho máximo do corpo da requisição (bytes)")
+    args = parser.parse_args(argv)
+    server = SimulationServer(processes=args.processes, cache_dir=args.cache, max_cached=args.max_cached,
+                              max_body_bytes=args.max_body)
+    print(f"Simulador em http://{args.host}:{args.port} ({server.processes} processos)", flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
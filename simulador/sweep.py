@@ -0,0 +1,113 @@
+"""Varredura de cenários: executa `simulate_columns` sobre uma grade de configurações.
+
+Os eixos da grade são dados por campo, no formato "secao.campo" ou apenas
+"campo" (procurado em global/owned/rented/strategy):
+
+    run_sweep({"cost_per_module": [60000, 75000], "land_strategy": ["owned", "rented"]})
+
+As simulações são distribuídas em lotes (chunks) por um pool de processos.
+"""
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+
+from .engine import RESULT_COLUMNS, get_default_config, calculate_summary_metrics, simulate_columns
+
+CONFIG_SECTIONS = ('global', 'owned', 'rented', 'strategy')
+
+def resolve_field(cfg: dict, field: str):
+    """Retorna (secao, campo) para "secao.campo" ou para um campo sem seção."""
+    head = field.split('.', 1)[0]
+    if head in CONFIG_SECTIONS and '.' in field:
+        section, key = field.split('.', 1)
+        return section, key
+    for section in CONFIG_SECTIONS:
+        if head in cfg.get(section, {}):
+            return section, field
+    raise KeyError(f"Campo de configuração desconhecido: {field}")
+
+def _walk(cfg: dict, field: str):
+    """Retorna (container, chave) do campo; aceita índices de lista, ex.: "withdrawals.0.percentual"."""
+    section, key = resolve_field(cfg, field)
+    container = cfg[section]
+    parts = key.split('.')
+    for part in parts[:-1]:
+        container = container[int(part)] if isinstance(container, list) else container[part]
+    last = parts[-1]
+    return container, int(last) if isinstance(container, list) else last
+
+def set_field(cfg: dict, field: str, value):
+    container, key = _walk(cfg, field)
+    container[key] = value
+
+def get_field(cfg: dict, field: str):
+    container, key = _walk(cfg, field)
+    return container[key]
+
+def expand_grid(axes: dict, base: dict = None):
+    """Gera (valores, config) para o produto cartesiano dos eixos sobre a config base."""
+    base = base if base is not None else get_default_config()
+    names = list(axes)
+    for values in itertools.product(*(axes[n] for n in names)):
+        cfg = deepcopy(base)
+        for name, value in zip(names, values):
+            set_field(cfg, name, value)
+        yield dict(zip(names, values)), cfg
+
+def _run_chunk(cfgs, keep_frames, extract=None):
+    out = []
+    for cfg in cfgs:
+        cols = simulate_columns(cfg)
+        if extract is not None:
+            out.append((None, extract(cols)))
+        else:
+            out.append((calculate_summary_metrics(cols), cols if keep_frames else None))
+    return out
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def run_configs(cfgs, processes=None, chunksize=None, keep_frames=False, extract=None):
+    """Executa uma lista de configurações e retorna [(summary, colunas | None)] na mesma ordem.
+
+    `processes=1` executa no processo atual (útil para depuração e listas pequenas).
+    `extract` (função de nível de módulo, para poder ser enviada aos workers) é
+    aplicada às colunas dentro do worker; o retorno passa a ser [(None, extract(colunas))],
+    evitando trafegar os resultados mensais completos entre processos.
+    """
+    cfgs = list(cfgs)
+    if not cfgs:
+        return []
+    processes = processes or os.cpu_count() or 1
+    processes = min(processes, len(cfgs))
+    if processes == 1:
+        return _run_chunk(cfgs, keep_frames, extract)
+    # ~4 lotes por worker equilibram a carga sem pagar IPC por simulação
+    chunksize = chunksize or max(1, math.ceil(len(cfgs) / (processes * 4)))
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for part in pool.map(_run_chunk, _chunks(cfgs, chunksize), itertools.repeat(keep_frames), itertools.repeat(extract)):
+            results.extend(part)
+    return results
+
+def run_sweep(axes: dict, base: dict = None, processes=None, chunksize=None, keep_frames=False):
+    """Executa a grade de cenários e retorna um DataFrame com uma linha por configuração.
+
+    As colunas são os eixos seguidos dos campos de `calculate_summary_metrics`.
+    Com `keep_frames=True` retorna também a lista de DataFrames mensais (mesma ordem).
+    """
+    import pandas as pd
+
+    points, cfgs = [], []
+    for values, cfg in expand_grid(axes, base):
+        points.append(values)
+        cfgs.append(cfg)
+    results = run_configs(cfgs, processes=processes, chunksize=chunksize, keep_frames=keep_frames)
+    summary = pd.DataFrame([{**p, **s} for p, (s, _) in zip(points, results)])
+    if not keep_frames:
+        return summary
+    frames = [pd.DataFrame(cols, columns=RESULT_COLUMNS) for _, cols in results]
+    return summary, frames
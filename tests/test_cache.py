@@ -0,0 +1,34 @@
+"""Ida e volta do cache persistente de resultados (`ResultCache`)."""
+import numpy as np
+
+from simulador import ResultCache, simulate_columns
+from simulador.engine import INT_COLUMNS, RESULT_COLUMNS, compute_cache_key
+
+from .test_engine import REFERENCE_CONFIGS
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cfg = REFERENCE_CONFIGS['alternado_eventos']
+    assert cache.get(cfg) is None
+    columns = simulate_columns(cfg)
+    cache.put(cfg, columns)
+    assert compute_cache_key(cfg) in cache
+    lido = ResultCache(str(tmp_path)).get(cfg)
+    for col in RESULT_COLUMNS:
+        np.testing.assert_array_equal(lido[col], columns[col], err_msg=col)
+        assert lido[col].dtype == (np.int64 if col in INT_COLUMNS else np.float64)
+
+def test_get_or_compute_runs_once(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cfg = REFERENCE_CONFIGS['sac']
+    chamadas = []
+
+    def compute(c):
+        chamadas.append(1)
+        return simulate_columns(c)
+
+    primeiro = cache.get_or_compute(cfg, compute=compute)
+    segundo = cache.get_or_compute(cfg, compute=compute)
+    assert len(chamadas) == 1
+    np.testing.assert_array_equal(segundo['Patrimônio Líquido'], primeiro['Patrimônio Líquido'])
@@ -0,0 +1,49 @@
+"""Redução de pontos para gráficos (`simulador.charts`)."""
+import numpy as np
+import pytest
+
+from simulador.charts import decimate, lttb_indices, series_budget, shared_indices
+
+X = np.arange(500)
+Y = np.sin(X / 20.0) * X
+
+
+@pytest.mark.parametrize("n_out", [3, 10, 100, 499])
+def test_lttb_keeps_endpoints_and_size(n_out):
+    idx = lttb_indices(X, Y, n_out)
+    assert len(idx) == n_out and idx[0] == 0 and idx[-1] == len(X) - 1
+    assert np.all(np.diff(idx) > 0)
+
+@pytest.mark.parametrize("n_out", [500, 501, 10_000])
+def test_lttb_passthrough_when_not_reducing(n_out):
+    np.testing.assert_array_equal(lttb_indices(X, Y, n_out), X)
+    assert len(lttb_indices([], [], 5)) == 0
+
+def test_lttb_small_thresholds():
+    np.testing.assert_array_equal(lttb_indices(X, Y, 2), [0, len(X) - 1])
+    for n_out in (1, 0, -3):
+        with pytest.raises(ValueError):
+            lttb_indices(X, Y, n_out)
+
+def test_lttb_keeps_spike():
+    y = np.zeros(1000)
+    y[637] = 50.0
+    assert 637 in lttb_indices(np.arange(1000), y, 20)
+
+def test_decimate():
+    x, y = decimate(X, Y, 50)
+    assert len(x) == len(y) == 50
+    np.testing.assert_array_equal(y, Y[lttb_indices(X, Y, 50)])
+
+def test_shared_indices_align_series():
+    series = [Y, -Y, np.cos(X / 7.0)]
+    idx = shared_indices(X, series, 90)
+    assert idx[0] == 0 and idx[-1] == len(X) - 1 and np.all(np.diff(idx) > 0)
+    # União dos pontos de cada série: todas as séries usam os mesmos x
+    for s in series:
+        assert set(lttb_indices(X, s, 30)) <= set(idx)
+    np.testing.assert_array_equal(shared_indices(X, series, 500), X)
+
+def test_series_budget():
+    assert series_budget(1) == 1000 and series_budget(16) == 500 and series_budget(500) == 100
+    assert series_budget(0) == 1000
@@ -0,0 +1,42 @@
+"""Linha de comando (`python -m simulador` / `python -m simulador.cli`)."""
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from simulador.cli import run
+from simulador.engine import RESULT_COLUMNS, merge_config, read_configs
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_read_configs_json_and_jsonl():
+    assert read_configs(io.StringIO('{"global": {"years": 2}}')) == [{"global": {"years": 2}}]
+    assert read_configs(io.StringIO('[{"a": 1}, {"b": 2}]')) == [{"a": 1}, {"b": 2}]
+    assert read_configs(io.StringIO('{"a": 1}\n\n{"b": 2}\n')) == [{"a": 1}, {"b": 2}]
+    assert read_configs(io.StringIO("  ")) == []
+
+def test_merge_config_fills_defaults():
+    cfg = merge_config({"global": {"years": 2}, "strategy": {"land_strategy": "rented"}})
+    assert cfg["global"]["years"] == 2 and cfg["global"]["cost_per_module"] == 75000.0
+    assert cfg["strategy"]["land_strategy"] == "rented" and "owned" in cfg
+
+def test_run_records():
+    (rec,) = run([{"global": {"years": 2}}])
+    assert set(rec) == {"config", "cache_key", "summary", "columns"}
+    assert list(rec["columns"]) == RESULT_COLUMNS and len(rec["columns"]["Mês"]) == 24
+
+@pytest.mark.parametrize("module", ["simulador", "simulador.cli"])
+def test_module_entry_points(module, tmp_path):
+    entrada = tmp_path / "configs.jsonl"
+    entrada.write_text('{"global": {"years": 2}}\n{"global": {"years": 3}}\n', encoding="utf-8")
+    proc = subprocess.run([sys.executable, "-m", module, str(entrada), "--summary"],
+                          capture_output=True, text=True, cwd=RAIZ, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    # Sem o RuntimeWarning de runpy ('simulador.cli' found in sys.modules ...)
+    assert proc.stderr == ""
+    registros = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert [r["config"] for r in registros] == [0, 1]
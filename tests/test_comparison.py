@@ -0,0 +1,55 @@
+"""Comparativo de estratégias (`ComparisonStore`): inclusão por chave e formato longo."""
+import numpy as np
+
+from simulador import ComparisonStore, simulate_columns
+from simulador.comparison import STRATEGY_COLUMN
+
+from .test_engine import _config
+
+
+def _store(*pairs):
+    store = ComparisonStore()
+    for name, cfg in pairs:
+        store.add(name, cfg, simulate_columns(cfg))
+    return store
+
+def test_add_unchanged_key_is_noop():
+    cfg = _config(years=3)
+    store = _store(("A", cfg))
+    frame, summary = store.frame("A"), store.summary("A")
+    longo = store.long_frame()
+    assert store.add("A", _config(years=3), simulate_columns(cfg)) is False
+    # Nada recalculado: resumo, DataFrame e formato longo são os mesmos objetos
+    assert store.frame("A") is frame and store.summary("A") is summary and store.long_frame() is longo
+
+def test_replace_and_remove():
+    store = _store(("A", _config(years=3)), ("B", _config(years=4)))
+    longo = store.long_frame()
+    outra = _config(years=5)
+    assert store.add("A", outra, simulate_columns(outra)) is True
+    assert store.names() == ["A", "B"] and store.key("A") != store.key("B")
+    assert len(store.columns("A")["Mês"]) == 60 and store.find(store.key("A")) == "A"
+    assert store.long_frame() is not longo and len(store.long_frame()) == 60 + 48
+    store.remove("A")
+    assert "A" not in store and store.names() == ["B"] and len(store.long_frame()) == 48
+    store.remove("inexistente")
+    assert len(store) == 1
+
+def test_long_frame_category_codes():
+    store = _store(("A", _config(years=2)), ("B", _config(years=3)), ("C", _config(years=1)))
+    df = store.long_frame(["Mês", "Patrimônio Líquido"])
+    assert list(df.columns) == ["Mês", "Patrimônio Líquido", STRATEGY_COLUMN]
+    cat = df[STRATEGY_COLUMN].cat
+    assert list(cat.categories) == ["A", "B", "C"]
+    assert cat.codes.dtype == np.int8
+    assert list(cat.codes) == [0] * 24 + [1] * 36 + [2] * 12
+    fatia = df[df[STRATEGY_COLUMN] == "B"]
+    np.testing.assert_array_equal(fatia["Patrimônio Líquido"], store.columns("B")["Patrimônio Líquido"])
+    # Reaproveitado até a próxima alteração
+    assert store.long_frame(["Mês", "Patrimônio Líquido"]) is df
+
+def test_summary_frame():
+    store = _store(("A", _config(years=2)), ("B", _config(years=3)))
+    df = store.summary_frame()
+    assert list(df[STRATEGY_COLUMN]) == ["A", "B"]
+    assert df.loc[1, "final_net_worth"] == store.columns("B")["Patrimônio Líquido"][-1]
@@ -0,0 +1,103 @@
+"""Saída do motor (`simulate_columns`) contra valores de referência fixos.
+
+Duas referências, ambas com a soma de cada coluna e os valores no mês 12 e no
+último mês ({coluna: [soma, mês 12, último mês]}):
+
+  - `original_results.json`: calculada pelo `run_simulation` original (app.py
+    anterior ao motor em `simulador`), para as configs de `ORIGINAL_CONFIGS`
+    (sem os campos de financiamento que ele não conhece). Não é regravada.
+  - `reference_results.json`: instantâneo do motor atual para todas as configs
+    de `REFERENCE_CONFIGS` (alugado, Price, carência, balão). Só detecta mudanças
+    de resultado; regravar apenas quando a mudança for intencional:
+
+        python -m tests.test_engine
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from simulador import get_default_config, iter_simulation, simulate_columns
+from simulador.engine import RESULT_COLUMNS
+
+DATA_DIR = os.path.dirname(__file__)
+ORIGINAL_PATH = os.path.join(DATA_DIR, "original_results.json")
+REFERENCE_PATH = os.path.join(DATA_DIR, "reference_results.json")
+
+
+def _config(years=15, owned=None, strategy='owned', **global_values):
+    cfg = get_default_config()
+    cfg['global']['years'] = years
+    cfg['global'].update(global_values)
+    cfg['owned'].update(owned or {})
+    cfg['strategy']['land_strategy'] = strategy
+    return cfg
+
+_EVENTOS = dict(
+    contributions=[{'mes': 6, 'valor': 50000.0}, {'mes': 100, 'valor': 20000.0}],
+    withdrawals=[{'mes': 60, 'percentual': 20.0}],
+    reserve_funds=[{'mes': 24, 'percentual': 10.0}],
+    max_withdraw_value=3000.0,
+)
+
+REFERENCE_CONFIGS = {
+    'sac': _config(),
+    'proprio_eventos': _config(years=20, modules_init=2, owned={'land_installments': 96}, **_EVENTOS),
+    'alternado_eventos': _config(years=20, strategy='alternate', modules_init=3, owned={'land_installments': 96}, **_EVENTOS),
+    # Eventos no primeiro/último mês dos blocos anuais e horizonte curto
+    'blocos_eventos': _config(
+        years=7, modules_init=2, reinvestment_strategy='alternate',
+        contributions=[{'mes': 1, 'valor': 10000.0}, {'mes': 12, 'valor': 80000.0}, {'mes': 13, 'valor': 5000.0},
+                       {'mes': 84, 'valor': 1000.0}],
+        withdrawals=[{'mes': 12, 'percentual': 30.0}, {'mes': 37, 'percentual': 15.0}],
+        reserve_funds=[{'mes': 13, 'percentual': 5.0}], max_withdraw_value=1500.0,
+    ),
+    'alugando_novos': _config(years=12, reinvestment_strategy='rent', **_EVENTOS),
+    'alugado': _config(strategy='rented', modules_init=2),
+    'price': _config(owned={'land_loan_type': 'price'}),
+    'carencia': _config(owned={'land_grace_months': 12}),
+    'balao': _config(owned={'land_loan_type': 'price', 'land_balloon_pct': 30.0, 'land_installments': 60}),
+    'alternado_carencia': _config(years=20, strategy='alternate', modules_init=3,
+                                  owned={'land_grace_months': 6, 'land_installments': 96}, **_EVENTOS),
+}
+# Configs também conferidas com o `run_simulation` original (que falha com terreno alugado)
+ORIGINAL_CONFIGS = ('sac', 'proprio_eventos', 'alternado_eventos', 'blocos_eventos', 'alugando_novos')
+
+
+def _summary(columns):
+    """{coluna: [soma, mês 12, último mês]}."""
+    return {col: [float(np.sum(columns[col])), float(columns[col][11]), float(columns[col][-1])] for col in RESULT_COLUMNS}
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _assert_matches(columns, esperado):
+    for col, valores in _summary(columns).items():
+        assert valores == pytest.approx(esperado[col], rel=1e-9, abs=1e-6), col
+
+@pytest.mark.parametrize("name", ORIGINAL_CONFIGS)
+def test_simulate_columns_matches_original_app(name):
+    _assert_matches(simulate_columns(REFERENCE_CONFIGS[name]), _load(ORIGINAL_PATH)[name])
+
+@pytest.mark.parametrize("name", sorted(REFERENCE_CONFIGS))
+def test_simulate_columns_matches_reference(name):
+    columns = simulate_columns(REFERENCE_CONFIGS[name])
+    assert len(columns['Mês']) == REFERENCE_CONFIGS[name]['global']['years'] * 12
+    _assert_matches(columns, _load(REFERENCE_PATH)[name])
+
+@pytest.mark.parametrize("name", sorted(REFERENCE_CONFIGS))
+def test_iter_simulation_ends_with_full_run(name):
+    cfg = REFERENCE_CONFIGS[name]
+    parciais = list(iter_simulation(cfg))
+    columns = simulate_columns(cfg)
+    assert [len(p['Mês']) for p in parciais] == list(range(12, len(columns['Mês']) + 1, 12))
+    for col in RESULT_COLUMNS:
+        np.testing.assert_array_equal(parciais[-1][col], columns[col], err_msg=col)
+
+if __name__ == "__main__":
+    with open(REFERENCE_PATH, "w", encoding="utf-8") as f:
+        json.dump({name: _summary(simulate_columns(cfg)) for name, cfg in REFERENCE_CONFIGS.items()},
+                  f, ensure_ascii=False, indent=1)
+        f.write("\n")
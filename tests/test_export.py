@@ -0,0 +1,75 @@
+"""Exportação (`simulador.export`): nomes de abas, pasta do comparativo e cache de bytes."""
+import io
+
+import pytest
+
+from simulador import ComparisonStore, simulate_columns
+from simulador.engine import RESULT_COLUMNS
+from simulador.export import SUMMARY_SHEET, ExportCache, export_comparison, sheet_title
+
+from .test_engine import _config
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _store():
+    store = ComparisonStore()
+    for name, years in (("Própria", 2), ("Alugada: cenário/base", 3)):
+        cfg = _config(years=years)
+        store.add(name, cfg, simulate_columns(cfg))
+    return store
+
+def test_sheet_title_invalid_chars_and_length():
+    assert sheet_title("a/b:c*d?e[f]g\\h") == "a_b_c_d_e_f_g_h"
+    assert sheet_title("'") == "Estrategia"
+    assert len(sheet_title("x" * 40)) == 31
+
+def test_sheet_title_dedupes_long_names_with_shared_prefix():
+    prefixo = "Estratégia de reinvestimento com "
+    used = []
+    for sufixo in ("terreno próprio", "terreno alugado", "blocos"):
+        used.append(sheet_title(prefixo + sufixo, used))
+    assert used == [prefixo[:31], prefixo[:27] + " (2)", prefixo[:27] + " (3)"]
+    assert all(len(t) <= 31 for t in used)
+    # Comparação sem diferenciar maiúsculas, como no Excel
+    assert sheet_title("resumo", ["Resumo"]) == "resumo (2)"
+
+def test_export_comparison_sheets():
+    store = _store()
+    wb = openpyxl.load_workbook(io.BytesIO(export_comparison(store)), read_only=True)
+    assert wb.sheetnames == [SUMMARY_SHEET, "Própria", "Alugada_ cenário_base"]
+    resumo = list(wb[SUMMARY_SHEET].values)
+    assert [r[0] for r in resumo[1:]] == ["Própria", "Alugada: cenário/base"]
+    linhas = list(wb["Alugada_ cenário_base"].values)
+    assert list(linhas[0]) == RESULT_COLUMNS and len(linhas) == 1 + 36
+
+def test_export_comparison_strategy_named_like_summary():
+    store = ComparisonStore()
+    cfg = _config(years=1)
+    store.add("Resumo", cfg, simulate_columns(cfg))
+    wb = openpyxl.load_workbook(io.BytesIO(export_comparison(store)), read_only=True)
+    assert wb.sheetnames == [SUMMARY_SHEET, "Resumo (2)"]
+
+def test_export_cache_hits():
+    store = _store()
+    cache = ExportCache(max_entries=2)
+    primeiro = cache.comparison(store, 'csv')
+    assert cache.comparison(store, 'csv') is primeiro
+    assert (cache.builds, cache.hits) == (1, 1)
+    cfg = _config(years=2)
+    cache.run(cfg, store.columns("Própria"), 'csv')
+    cache.run(_config(years=2), store.columns("Própria"), 'csv')
+    assert (cache.builds, cache.hits) == (2, 2)
+    # Alterar o comparativo muda a chave
+    outra = _config(years=4)
+    store.add("Própria", outra, simulate_columns(outra))
+    assert cache.comparison(store, 'csv') != primeiro
+    assert cache.builds == 3
+
+def test_export_cache_evicts_least_recently_used():
+    cache = ExportCache(max_entries=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_build(key, lambda: key.encode())
+    assert (cache.builds, cache.hits) == (3, 1)
+    assert cache.get_or_build("a", lambda: b"novo") == b"a"
+    assert cache.get_or_build("b", lambda: b"novo") == b"novo"
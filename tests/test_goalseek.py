@@ -0,0 +1,72 @@
+"""Busca de metas (`goal_seek`): convergência, busca inteira e status."""
+import pytest
+
+from simulador import goal_seek, metric_value, set_field, simulate_columns
+from simulador.goalseek import COUNT_FIELD_MINIMUMS
+
+from .test_engine import _config
+
+def _alugado(aluguel=750.0):
+    cfg = _config(years=5, strategy='rented')
+    set_field(cfg, "rent_value", aluguel)
+    return cfg
+
+
+@pytest.mark.parametrize("method", ["bisect", "secant"])
+def test_eq_converges_within_tol(method):
+    # Aluguel acumulado no mês 12 (sem compras no período) é contínuo no aluguel mensal
+    alvo = metric_value(simulate_columns(_alugado(1000.0)), "Aluguel Acumulado", 12)
+    r = goal_seek(_alugado(), "rent_value", "Aluguel Acumulado", alvo, lo=0, hi=5000, month=12,
+                  method=method, tol=1e-9)
+    assert r['status'] == 'found'
+    assert r['value'] == pytest.approx(1000.0, rel=1e-6)
+    assert r['metric'] == pytest.approx(alvo, rel=1e-6)
+    assert r['evaluations'] == len(r['history'])
+
+def test_secant_needs_fewer_evaluations_on_linear_metric():
+    alvo = metric_value(simulate_columns(_alugado(1234.0)), "Aluguel Acumulado", 12)
+    kwargs = dict(lo=0, hi=5000, month=12, tol=1e-9)
+    bissecao = goal_seek(_alugado(), "rent_value", "Aluguel Acumulado", alvo, method="bisect", **kwargs)
+    secante = goal_seek(_alugado(), "rent_value", "Aluguel Acumulado", alvo, method="secant", **kwargs)
+    assert secante['evaluations'] < bissecao['evaluations']
+
+def test_integer_modules_le_finds_boundary():
+    # ROI (negativo em 10 anos) sobe com os módulos iniciais: maior contagem com ROI <= -5%
+    r = goal_seek(_config(years=10), "modules_init", "roi_pct", -5, lo=1, hi=20, condition="le")
+    assert r['status'] == 'found' and isinstance(r['value'], int)
+    assert all(isinstance(x, int) for x, _ in r['history'])
+
+    def roi(n):
+        return metric_value(simulate_columns(_config(years=10, modules_init=n)), "roi_pct")
+
+    assert roi(r['value']) <= -5 < roi(r['value'] + 1)
+    assert r['metric'] == roi(r['value'])
+
+def test_never_and_always():
+    cfg = _config(years=5)
+    assert goal_seek(cfg, "land_interest_rate", "roi_pct", 1e9, lo=0, hi=30)['status'] == 'never'
+    assert goal_seek(cfg, "land_interest_rate", "roi_pct", -1e9, lo=0, hi=30, condition="ge")['status'] == 'always'
+    assert goal_seek(cfg, "land_interest_rate", "roi_pct", 1e9, lo=0, hi=30, condition="ge")['status'] == 'never'
+
+@pytest.mark.parametrize("field", sorted(COUNT_FIELD_MINIMUMS))
+def test_count_fields_clamped_to_minimum(field):
+    r = goal_seek(_config(years=3), field, "roi_pct", -1e9, lo=-5, hi=3, condition="ge")
+    assert r['status'] == 'always'
+    assert min(x for x, _ in r['history']) == COUNT_FIELD_MINIMUMS[field]
+    # Intervalo inteiro abaixo do mínimo: nada a avaliar
+    vazio = goal_seek(_config(years=3), field, "roi_pct", 0, lo=-5, hi=0)
+    assert vazio['status'] == 'never' and vazio['evaluations'] == 0
+
+def test_engine_error_status():
+    def runner(cfg):
+        if cfg['global']['cost_per_module'] > 80000:
+            raise ZeroDivisionError("division by zero")
+        return simulate_columns(cfg)
+
+    r = goal_seek(_config(years=3), "cost_per_module", "roi_pct", 0, lo=50000, hi=90000, runner=runner)
+    assert r['status'] == 'error' and r['value'] is None
+    assert "cost_per_module = 90000.0" in r['error'] and "ZeroDivisionError" in r['error']
+
+def test_invalid_condition():
+    with pytest.raises(ValueError):
+        goal_seek(_config(), "rent_value", "roi_pct", 0, lo=0, hi=1, condition="gt")
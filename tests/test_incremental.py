@@ -0,0 +1,43 @@
+"""Execuções retomadas de checkpoint (`IncrementalSimulator`) iguais à execução completa."""
+import copy
+
+import numpy as np
+import pytest
+
+from simulador import IncrementalSimulator, simulate_columns
+from simulador.engine import RESULT_COLUMNS
+
+from .test_engine import REFERENCE_CONFIGS
+
+
+def _assert_same(columns, esperado):
+    for col in RESULT_COLUMNS:
+        np.testing.assert_array_equal(columns[col], esperado[col], err_msg=col)
+
+def _late_edit(cfg):
+    """A config com um aporte perto do fim do horizonte (retoma de um checkpoint tardio)."""
+    editado = copy.deepcopy(cfg)
+    meses = editado['global']['years'] * 12
+    editado['global']['contributions'] = editado['global']['contributions'] + [{'mes': meses - 20, 'valor': 12345.0}]
+    return editado
+
+@pytest.mark.parametrize("name", sorted(REFERENCE_CONFIGS))
+def test_resume_equals_full_run(name):
+    sim = IncrementalSimulator()
+    sim.run(REFERENCE_CONFIGS[name])
+    editado = _late_edit(REFERENCE_CONFIGS[name])
+    _assert_same(sim.run(editado), simulate_columns(editado))
+    stats = sim.stats()
+    assert stats['full_runs'] == 1 and stats['resumed_runs'] == 1
+    assert stats['months_reused'] > 0
+
+def test_streamed_resume_equals_full_run():
+    cfg = REFERENCE_CONFIGS['balao']
+    sim = IncrementalSimulator()
+    sim.run(cfg)
+    editado = _late_edit(cfg)
+    parciais = list(sim.iter_run(editado))
+    _assert_same(parciais[-1], simulate_columns(editado))
+    assert sim.stats()['resumed_runs'] == 1
+    # A execução transmitida também grava checkpoints para as próximas edições
+    _assert_same(sim.run(editado), parciais[-1])
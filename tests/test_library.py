@@ -0,0 +1,80 @@
+"""Biblioteca de cenários (`ScenarioLibrary`) e importação em lote (`read_scenarios`)."""
+import json
+
+import pytest
+
+from simulador import ComparisonStore, ResultCache, ScenarioLibrary, canonical_config, read_scenarios
+from simulador.engine import compute_cache_key
+
+
+@pytest.fixture
+def library(tmp_path):
+    return ScenarioLibrary(str(tmp_path / "cenarios.sqlite"))
+
+def test_canonical_config_unifies_equivalent_configs():
+    a = canonical_config({'global': {'cost_per_module': 75000, 'years': 10}})
+    b = canonical_config({'global': {'cost_per_module': 75000.0}})
+    assert a == b and compute_cache_key(a) == compute_cache_key(b)
+    assert isinstance(a['global']['cost_per_module'], float) and isinstance(a['global']['years'], int)
+
+def test_add_many_dedups_and_names(library):
+    r = library.add_many(
+        [None, "Caro", None, "Duplicado"],
+        [{'global': {'cost_per_module': 60000}}, {'global': {'cost_per_module': 90000.0}},
+         {'global': {'cost_per_module': 70000.0}}, {'global': {'cost_per_module': 60000.0}}],
+    )
+    assert r == {'added': 3, 'duplicates': 1, 'names': ["Cenário 1", "Caro", "Cenário 2", "Cenário 1"]}
+    assert library.names() == ["Cenário 1", "Caro", "Cenário 2"]
+    # Config já salva: nada é gravado e o nome existente volta
+    assert library.save("Outro", {'global': {'cost_per_module': 90000}}) == "Caro"
+    assert len(library) == 3
+    assert library.find(compute_cache_key(canonical_config({'global': {'cost_per_module': 70000}}))) == "Cenário 2"
+
+def test_name_reuse_replaces_config(library):
+    library.save("Base", {'global': {'cost_per_module': 60000.0}})
+    library.save("Base", {'global': {'cost_per_module': 80000.0}})
+    assert library.names() == ["Base"]
+    assert library.load("Base")['global']['cost_per_module'] == 80000.0
+    # Dentro do mesmo lote, o último uso do nome vence
+    r = library.add_many(["X", "X"], [{'global': {'years': 5}}, {'global': {'years': 6}}])
+    assert r['added'] == 1 and library.load("X")['global']['years'] == 6
+    library.remove("X")
+    assert "X" not in library and "Base" in library
+    with pytest.raises(KeyError):
+        library.load("X")
+
+def test_read_scenarios_csv_and_jsonl(tmp_path):
+    names, cfgs = read_scenarios("nome;cost_per_module;land_strategy\nBase;75.000;owned\n;68000;rented\n")
+    assert names == ["Base", None]
+    assert cfgs[0]['global']['cost_per_module'] == 75000.0
+    assert cfgs[1]['strategy']['land_strategy'] == "rented"
+
+    jsonl = "\n".join([
+        json.dumps({"nome": "A", "config": {"global": {"years": 5}}}),
+        json.dumps({"global": {"years": 7}}),
+    ])
+    names, cfgs = read_scenarios(jsonl)
+    assert names == ["A", None] and cfgs == [{"global": {"years": 5}}, {"global": {"years": 7}}]
+
+    arquivo = tmp_path / "cenarios.json"
+    arquivo.write_text(json.dumps([{"nome": "B", "global": {"years": 3}}]), encoding="utf-8")
+    assert read_scenarios(str(arquivo)) == (["B"], [{"global": {"years": 3}}])
+    assert read_scenarios("") == ([], [])
+
+def test_export_import_round_trip(library, tmp_path):
+    library.add_many(["A", "B"], [{'global': {'years': 3}}, {'global': {'years': 4}}])
+    outra = ScenarioLibrary(str(tmp_path / "outra.sqlite"))
+    r = outra.import_file(library.export_jsonl(), fmt="json")
+    assert r['names'] == ["A", "B"]
+    assert outra.entries() == library.entries()
+
+def test_run_pending(library, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    library.add_many(["A", "B", "C"], [{'global': {'years': n}} for n in (2, 3, 4)])
+    assert library.pending(cache) == ["A", "B", "C"]
+    assert library.run_pending(cache, names=["A", "C"], processes=1) == ["A", "C"]
+    assert library.pending(cache) == ["B"]
+    store = ComparisonStore()
+    assert library.run_pending(cache, processes=1, store=store) == ["B"]
+    assert list(store) == ["A", "B", "C"] and library.pending(cache) == []
+    assert library.run_pending(cache, processes=1) == []
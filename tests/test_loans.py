@@ -0,0 +1,44 @@
+"""Propriedades das tabelas de amortização (SAC, Price, carência e balão)."""
+import numpy as np
+import pytest
+
+from simulador.loans import amortization_table, loan_table
+
+TAXA = 0.08 / 12
+
+
+@pytest.mark.parametrize("tipo", ["sac", "price"])
+@pytest.mark.parametrize("carencia,balao", [(0, 0.0), (12, 0.0), (0, 0.3), (6, 0.25)])
+def test_amortizes_whole_principal(tipo, carencia, balao):
+    t = amortization_table(tipo, 60, TAXA, carencia, balao)
+    assert len(t) == carencia + 60
+    assert t.amortizacao.sum() == pytest.approx(1.0)
+    assert t.saldo[0] == 1.0 and t.saldo[-1] == 0.0
+    np.testing.assert_allclose(t.juros[:len(t)], TAXA * t.saldo[:len(t)])
+    np.testing.assert_allclose(t.saldo[1:], t.saldo[:-1] - t.amortizacao[:-1], atol=1e-12)
+
+def test_sac_constant_amortization():
+    t = amortization_table("sac", 120, TAXA)
+    np.testing.assert_allclose(t.amortizacao[:120], 1 / 120)
+
+def test_price_constant_payment():
+    t = amortization_table("price", 120, TAXA)
+    pmt = TAXA / (1 - (1 + TAXA) ** -120)
+    np.testing.assert_allclose(t.parcela(), pmt)
+
+def test_grace_pays_only_interest():
+    t = amortization_table("price", 48, TAXA, carencia=12)
+    np.testing.assert_allclose(t.amortizacao[:12], 0.0)
+    np.testing.assert_allclose(t.parcela()[:12], TAXA)
+    np.testing.assert_allclose(t.parcela()[12:], t.parcela()[12])
+
+@pytest.mark.parametrize("tipo", ["sac", "price"])
+def test_balloon_paid_with_last_installment(tipo):
+    t = amortization_table(tipo, 60, TAXA, balao=0.3)
+    assert t.saldo[59] > 0.3 - 1e-12
+    assert t.amortizacao[59] == pytest.approx(t.saldo[59])
+
+def test_plain_sac_uses_running_totals():
+    owned = {'land_loan_type': 'sac', 'land_grace_months': 0, 'land_balloon_pct': 0.0}
+    assert loan_table(owned, 120, TAXA) is None
+    assert loan_table(dict(owned, land_loan_type='price'), 120, TAXA) is not None
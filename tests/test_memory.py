@@ -0,0 +1,61 @@
+"""Tipos compactos (`compact_columns`) e contabilidade de memória (`memory_report`)."""
+import numpy as np
+
+from simulador import simulate_columns
+from simulador.engine import COUNT_COLS, MONEY_COLS, RESULT_COLUMNS, compact_columns, result_frame
+from simulador.memory import frame_memory, memory_report, nbytes
+
+from .test_engine import _config
+
+
+def test_counts_downcast_without_changing_values():
+    cols = simulate_columns(_config(years=15))
+    compact = compact_columns(cols)
+    for col in RESULT_COLUMNS:
+        np.testing.assert_array_equal(compact[col], cols[col])
+        if col in COUNT_COLS:
+            assert compact[col].dtype == np.int16
+        else:
+            assert compact[col] is cols[col]
+
+def test_counts_above_int16_range():
+    grandes = {
+        "Mês": np.arange(1, 4, dtype=np.int64),
+        "Módulos Ativos": np.array([1, 40_000, 7], dtype=np.int64),
+        "Módulos Próprios": np.array([-40_000, 0, 1], dtype=np.int64),
+        "Terrenos Adquiridos": np.array([0, 3_000_000_000, 1], dtype=np.int64),
+        "Ano": np.array([], dtype=np.int64),
+    }
+    compact = compact_columns(grandes)
+    assert [compact[c].dtype for c in grandes] == [np.int16, np.int32, np.int32, np.int64, np.int16]
+    for col, arr in grandes.items():
+        np.testing.assert_array_equal(compact[col], arr)
+
+def test_float32_only_touches_money_columns():
+    cols = simulate_columns(_config(years=5))
+    compact = compact_columns(cols, float32=True)
+    for col in RESULT_COLUMNS:
+        if col in MONEY_COLS:
+            assert compact[col].dtype == np.float32
+            np.testing.assert_allclose(compact[col], cols[col], rtol=1e-6)
+        elif col in COUNT_COLS:
+            assert compact[col].dtype.kind == 'i'
+        else:
+            assert compact[col] is cols[col]
+    assert compact_columns(cols)["Patrimônio Líquido"].dtype == np.float64
+    assert result_frame(cols, float32=True)["Receita"].dtype == np.float32
+
+def test_memory_report_sorted_by_size():
+    grande, pequeno = np.zeros(1000), np.zeros(10)
+    df = result_frame(simulate_columns(_config(years=2)))
+    report = memory_report({"pequeno": pequeno, "df": df, "grande": grande, "nada": None})
+    assert list(report.columns) == ["Item", "Tipo", "Bytes"]
+    assert list(report["Bytes"]) == sorted(report["Bytes"], reverse=True)
+    linhas = report.set_index("Item")
+    assert linhas.loc["grande", "Bytes"] == 8000 and linhas.loc["pequeno", "Bytes"] == 80
+    assert linhas.loc["df", "Tipo"] == f"DataFrame 24x{len(RESULT_COLUMNS)}"
+    assert frame_memory(df)["Bytes"].sum() == df.memory_usage(deep=True).sum()
+
+def test_nbytes_counts_shared_objects_once():
+    arr = np.zeros(100)
+    assert nbytes({"a": arr, "b": arr}) < nbytes({"a": arr, "b": np.zeros(100)})
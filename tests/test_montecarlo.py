@@ -0,0 +1,56 @@
+"""Modo Monte Carlo (`run_monte_carlo`): caso determinístico, semente e validação."""
+import numpy as np
+import pytest
+
+from simulador import bands_to_frame, run_monte_carlo, simulate_columns
+
+from .test_engine import REFERENCE_CONFIGS
+
+COLUNAS = ("Patrimônio Líquido", "Caixa (Final Mês)")
+INCERTEZA = {
+    'general_correction_rate': {'dist': 'normal', 'mean': 3.0, 'std': 1.0},
+    'land_appreciation_rate': {'dist': 'uniform', 'low': 1.0, 'high': 5.0},
+    'revenue_per_module': {'dist': 'triangular', 'low': -10.0, 'mode': 0.0, 'high': 5.0},
+}
+
+
+def _fixas(cfg):
+    g = cfg['global']
+    return {
+        'general_correction_rate': {'dist': 'fixed', 'value': g['general_correction_rate']},
+        'land_appreciation_rate': {'dist': 'fixed', 'value': g['land_appreciation_rate']},
+        'revenue_per_module': {'dist': 'fixed', 'value': 0.0},
+    }
+
+@pytest.mark.parametrize("name", sorted(REFERENCE_CONFIGS))
+def test_fixed_distributions_reproduce_simulate_columns(name):
+    cfg = REFERENCE_CONFIGS[name]
+    esperado = simulate_columns(cfg)
+    result = run_monte_carlo(cfg, _fixas(cfg), n_paths=3, seed=1, keep_paths=True)
+    for col in COLUNAS:
+        for caminho in result['paths'][col].T:
+            np.testing.assert_allclose(caminho, esperado[col], rtol=1e-12, atol=1e-6, err_msg=col)
+        for faixa in result['bands'][col]:
+            np.testing.assert_allclose(faixa, esperado[col], rtol=1e-12, atol=1e-6, err_msg=col)
+
+def test_same_seed_same_bands():
+    cfg = REFERENCE_CONFIGS['alternado_carencia']
+    a = run_monte_carlo(cfg, INCERTEZA, n_paths=200, seed=7)
+    b = run_monte_carlo(cfg, INCERTEZA, n_paths=200, seed=7)
+    c = run_monte_carlo(cfg, INCERTEZA, n_paths=200, seed=8)
+    for col in COLUNAS:
+        np.testing.assert_array_equal(a['bands'][col], b['bands'][col])
+    np.testing.assert_array_equal(a['break_even']['months'], b['break_even']['months'])
+    assert not np.array_equal(a['bands']["Patrimônio Líquido"], c['bands']["Patrimônio Líquido"])
+    # Percentis em ordem crescente em todos os meses
+    assert np.all(np.diff(a['bands']["Patrimônio Líquido"], axis=0) >= 0)
+    assert list(bands_to_frame(a, "Patrimônio Líquido").columns) == ["Mês", "P5", "P25", "P50", "P75", "P95"]
+
+@pytest.mark.parametrize("n_paths", [0, -5])
+def test_n_paths_must_be_positive(n_paths):
+    with pytest.raises(ValueError, match="n_paths"):
+        run_monte_carlo(REFERENCE_CONFIGS['sac'], n_paths=n_paths)
+
+def test_unknown_field_rejected():
+    with pytest.raises(KeyError):
+        run_monte_carlo(REFERENCE_CONFIGS['sac'], {'cost_per_module': {'dist': 'fixed', 'value': 1.0}}, n_paths=1)
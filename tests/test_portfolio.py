@@ -0,0 +1,50 @@
+"""Portfólio vetorizado entre unidades (`run_portfolio`) contra a simulação individual."""
+import numpy as np
+import pytest
+
+from simulador import run_portfolio, simulate_columns, site_configs
+from simulador.engine import RESULT_COLUMNS
+
+from .test_engine import _EVENTOS, _config
+
+SITES = [
+    _config(),
+    _config(owned={'land_loan_type': 'price', 'land_installments': 60}, modules_init=2),
+    _config(owned={'land_grace_months': 12}, strategy='alternate', **_EVENTOS),
+    _config(owned={'land_loan_type': 'price', 'land_balloon_pct': 30.0, 'land_grace_months': 6},
+            reinvestment_strategy='alternate'),
+    _config(strategy='rented', modules_init=3, cost_per_module=68000.0),
+    _config(strategy='alternate', reinvestment_strategy='rent', revenue_per_module=3900.0),
+    _config(owned={'land_loan_type': 'sac', 'land_balloon_pct': 20.0}, strategy='rented', **_EVENTOS),
+]
+
+
+def test_sites_match_individual_runs():
+    result = run_portfolio(SITES)
+    assert len(result) == len(SITES)
+    for i, cfg in enumerate(SITES):
+        esperado = simulate_columns(cfg)
+        site = result.site_columns(i)
+        for col in RESULT_COLUMNS:
+            np.testing.assert_array_equal(site[col], esperado[col], err_msg=f"unidade {i}: {col}")
+
+def test_consolidated_is_sum_of_sites():
+    result = run_portfolio(SITES[:3], names=["A", "B", "C"])
+    total = result.consolidated_columns()
+    np.testing.assert_array_equal(total["Mês"], np.arange(1, 15 * 12 + 1))
+    np.testing.assert_allclose(total["Patrimônio Líquido"],
+                               sum(result.site_columns(n)["Patrimônio Líquido"] for n in "ABC"))
+    assert list(result.summary_frame()["Unidade"]) == ["A", "B", "C", "Portfólio"]
+
+def test_different_years_are_rejected():
+    with pytest.raises(ValueError, match="mesmo horizonte"):
+        run_portfolio([_config(years=10), _config(years=12)])
+
+def test_site_table_from_csv():
+    names, cfgs = site_configs("nome;cost_per_module;land_strategy\nCentro;68000;owned\nNorte;;rented\n")
+    assert names == ["Centro", "Norte"]
+    assert cfgs[0]['global']['cost_per_module'] == 68000.0
+    assert cfgs[1]['global']['cost_per_module'] == 75000.0
+    assert cfgs[1]['strategy']['land_strategy'] == "rented"
+    with pytest.raises(ValueError, match="únicos"):
+        site_configs([{"nome": "A"}, {"nome": "A"}])
@@ -0,0 +1,64 @@
+"""Importação de eventos (`load_events_csv`) e cronogramas compilados."""
+import numpy as np
+import pytest
+
+from simulador import compile_schedules, load_events_csv
+
+
+@pytest.mark.parametrize("texto,valor", [
+    ("mes;valor\n24;2.000\n", 2000.0),
+    ("mes;valor\n24;1.234.567\n", 1234567.0),
+    ("mes;valor\n24;1.234,50\n", 1234.5),
+    ("mes;valor\n24;1234,5\n", 1234.5),
+    ("mes;valor\n24;R$ 2.500,00\n", 2500.0),
+    ("mes,valor\n24,1234.5\n", 1234.5),
+    ("mes,valor\n24,2000\n", 2000.0),
+    ('mes,valor\n24,"1.234,50"\n', 1234.5),
+])
+def test_number_formats_and_delimiters(texto, valor):
+    eventos = load_events_csv(texto)
+    assert eventos['contributions'] == [{'mes': 24, 'valor': valor}]
+
+def test_event_kinds_and_headers():
+    texto = "Tipo;Mês;Valor (R$)\naporte;3;1.000\nretirada;12;20\nfundo;24;5,5\n"
+    eventos = load_events_csv(texto.encode("utf-8-sig"))
+    assert eventos == {
+        'contributions': [{'mes': 3, 'valor': 1000.0}],
+        'withdrawals': [{'mes': 12, 'percentual': 20.0}],
+        'reserve_funds': [{'mes': 24, 'percentual': 5.5}],
+    }
+
+def test_header_only_text_is_not_a_path():
+    assert load_events_csv("mes;valor") == {'contributions': [], 'withdrawals': [], 'reserve_funds': []}
+
+def test_reads_path(tmp_path):
+    arquivo = tmp_path / "eventos.csv"
+    arquivo.write_text("mes;valor\n6;500\n", encoding="utf-8")
+    assert load_events_csv(str(arquivo))['contributions'] == [{'mes': 6, 'valor': 500.0}]
+    assert load_events_csv(arquivo)['contributions'] == [{'mes': 6, 'valor': 500.0}]
+
+@pytest.mark.parametrize("vazio", ["", "\n\n", b""])
+def test_empty_file_has_no_events(vazio):
+    assert load_events_csv(vazio) == {'contributions': [], 'withdrawals': [], 'reserve_funds': []}
+
+@pytest.mark.parametrize("texto,mensagem", [
+    ("mes\n12\n", "CSV inválido"),
+    ("mes;quantia\n12;100\n", "colunas 'mes' e 'valor'"),
+    ("mes;valor\n12;100\ndoze;100\n", "Linha 3"),
+    ("mes;valor\n12;abc\n", "Linha 2"),
+    ("mes;valor\n12\n", "Linha 2"),
+    ("tipo;mes;valor\nbonus;12;100\n", "Linha 2"),
+])
+def test_bad_files_raise_value_error(texto, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        load_events_csv(texto)
+
+def test_compile_schedules():
+    aportes, retirada, fundo = compile_schedules({
+        'contributions': [{'mes': 2, 'valor': 100.0}, {'mes': 2, 'valor': 50.0}, {'mes': 99, 'valor': 1.0}],
+        'withdrawals': [{'mes': 3, 'percentual': 10.0}, {'mes': 4, 'percentual': 5.0}],
+        'reserve_funds': [],
+    }, 5)
+    np.testing.assert_array_equal(aportes, [0, 150, 0, 0, 0])
+    np.testing.assert_allclose(retirada, [0, 0, 0.10, 0.15, 0.15])
+    np.testing.assert_array_equal(fundo, np.zeros(5))
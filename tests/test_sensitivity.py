@@ -0,0 +1,59 @@
+"""Análise de sensibilidade (`run_sensitivity`): perturbações e elasticidade."""
+import math
+
+import pytest
+
+from simulador import metric_value, numeric_fields, run_sensitivity, set_field, simulate_columns
+from simulador.sensitivity import perturb
+
+from .test_engine import _config
+
+
+def _metrica(cfg, field, value, metric):
+    trial = _config(years=10)
+    set_field(trial, field, value)
+    return metric_value(simulate_columns(trial), metric)
+
+def test_perturb():
+    assert perturb(100.0, 0.1) == pytest.approx((90.0, 110.0))
+    assert perturb(120, 0.1) == (108, 132)
+    # Contagens: pelo menos 1 unidade, nunca abaixo de 1
+    assert perturb(3, 0.1) == (2, 4)
+    assert perturb(1, 0.1) == (1, 2)
+
+def test_numeric_fields_skip_years_and_non_numeric():
+    fields = numeric_fields(_config())
+    assert "global.cost_per_module" in fields and "owned.land_installments" in fields
+    assert "global.years" not in fields
+    assert "global.reinvestment_strategy" not in fields and "owned.land_loan_type" not in fields
+
+def test_rows_match_individual_runs_and_sign_follows_metric():
+    cfg = _config(years=10)
+    fields = ["global.modules_init", "global.cost_per_module", "global.revenue_per_module"]
+    df = run_sensitivity(cfg, delta=0.10, fields=fields, metrics=("roi_pct",), processes=1)
+    assert set(df["Campo"]) == set(fields)
+    base = df.attrs["base"]["roi_pct"]
+    assert base < 0    # ROI negativo em 10 anos: o sinal da elasticidade não pode inverter
+    for _, row in df.iterrows():
+        y_lo = _metrica(cfg, row["Campo"], row["Valor -Δ"], "roi_pct")
+        y_hi = _metrica(cfg, row["Campo"], row["Valor +Δ"], "roi_pct")
+        assert row["roi_pct -Δ"] == pytest.approx(y_lo) and row["roi_pct +Δ"] == pytest.approx(y_hi)
+        elasticidade = row["Elasticidade roi_pct"]
+        dx = (row["Valor +Δ"] - row["Valor -Δ"]) / row["Base"]
+        assert elasticidade == pytest.approx((y_hi - y_lo) / abs(base) / dx)
+        assert math.copysign(1, elasticidade) == math.copysign(1, y_hi - y_lo)
+    # ROI de -15% sobe para -12% com 2 módulos iniciais: elasticidade positiva
+    assert df.set_index("Campo").loc["global.modules_init", "Elasticidade roi_pct"] > 0
+    # Ordenado pela amplitude (tornado)
+    assert list(df["Amplitude roi_pct"]) == sorted(df["Amplitude roi_pct"], reverse=True)
+
+def test_clamped_count_is_one_sided():
+    df = run_sensitivity(_config(years=10), delta=0.10, fields=["global.modules_init", "global.cost_per_module"],
+                         metrics=("roi_pct",), processes=1).set_index("Campo")
+    assert df.loc["global.modules_init", "Unilateral"]
+    assert (df.loc["global.modules_init", "Valor -Δ"], df.loc["global.modules_init", "Valor +Δ"]) == (1, 2)
+    assert not df.loc["global.cost_per_module", "Unilateral"]
+
+def test_zero_fields_left_out():
+    df = run_sensitivity(_config(years=5), fields=["global.max_withdraw_value", "global.cost_per_module"], processes=1)
+    assert list(df["Campo"]) == ["global.cost_per_module"]
@@ -0,0 +1,105 @@
+"""Serviço HTTP (`SimulationServer`): rotas, lotes, coalescência e limites da requisição."""
+import asyncio
+import json
+
+import pytest
+
+from simulador import calculate_summary_metrics, canonical_config, compute_cache_key, simulate_columns
+from simulador.server import SimulationServer
+
+CFG_A = {"global": {"years": 2}}
+CFG_B = {"global": {"years": 3, "modules_init": 2}}
+
+
+def _json(body):
+    return json.loads(body) if isinstance(body, bytes) else body
+
+def _with_server(coro, **kwargs):
+    """Executa `coro(server)` com um servidor de 1 processo, fechando o pool no fim."""
+    async def main():
+        server = SimulationServer(processes=1, **kwargs)
+        try:
+            return server, await coro(server)
+        finally:
+            server.close()
+    return asyncio.run(main())
+
+def test_batch_keeps_input_order():
+    corpo = json.dumps([CFG_B, CFG_A, CFG_B]).encode()
+    server, (status, body) = _with_server(lambda s: s.respond("POST", "/simulate", corpo))
+    assert status == 200
+    registros = _json(body)
+    chaves = [compute_cache_key(canonical_config(c)) for c in (CFG_B, CFG_A, CFG_B)]
+    assert [r["cache_key"] for r in registros] == chaves
+    assert [len(r["columns"]["Mês"]) for r in registros] == [36, 24, 36]
+    assert registros[1]["summary"] == calculate_summary_metrics(simulate_columns(canonical_config(CFG_A)))
+    assert server.simulations == 2
+
+def test_summary_only_and_jsonl():
+    corpo = (json.dumps(CFG_A) + "\n" + json.dumps(CFG_B) + "\n").encode()
+    _, (status, body) = _with_server(lambda s: s.respond("POST", "/simulate?summary=1", corpo))
+    assert status == 200
+    assert [set(r) for r in _json(body)] == [{"cache_key", "summary"}] * 2
+    _, (status, body) = _with_server(lambda s: s.respond("POST", "/simulate?summary=1", json.dumps(CFG_A).encode()))
+    assert set(_json(body)) == {"cache_key", "summary"}
+
+def test_identical_concurrent_configs_coalesce():
+    async def duas(server):
+        corpo = json.dumps(CFG_A).encode()
+        # A mesma config com e sem campos padrão explícitos tem a mesma chave canônica
+        explicito = json.dumps({"global": {"years": 2, "cost_per_module": 75000}}).encode()
+        respostas = await asyncio.gather(server.respond("POST", "/simulate", corpo),
+                                         server.respond("POST", "/simulate", explicito))
+        depois = await server.respond("POST", "/simulate", corpo)
+        return respostas, depois
+
+    server, (respostas, depois) = _with_server(duas)
+    assert [s for s, _ in respostas] == [200, 200]
+    assert _json(respostas[0][1]) == _json(respostas[1][1]) == _json(depois[1])
+    assert server.simulations == 1 and server.coalesced == 1 and server.hits == 1
+
+@pytest.mark.parametrize("corpo", [b"", b"{nao json", b"[1, 2]", b'{"global": {"years": "dez"}}'])
+def test_invalid_config_is_400(corpo):
+    _, (status, body) = _with_server(lambda s: s.respond("POST", "/simulate", corpo))
+    assert status == 400 and "error" in body
+
+def test_routes_and_methods():
+    async def rotas(server):
+        return [await server.respond(m, t, b"") for m, t in (("GET", "/health"), ("POST", "/health"),
+                                                              ("GET", "/simulate"), ("GET", "/outra"))]
+    _, respostas = _with_server(rotas)
+    assert [s for s, _ in respostas] == [200, 405, 405, 404]
+    assert respostas[0][1]["status"] == "ok"
+
+async def _raw(server, request):
+    """Envia `request` (bytes) a `handle` por um socket local; retorna (status, corpo JSON)."""
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        data = await reader.read()
+        writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body), head
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1.5"])
+def test_bad_content_length_is_400(length):
+    _, (status, body, head) = _with_server(
+        lambda s: _raw(s, b"POST /simulate HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"))
+    assert status == 400 and "Content-Length" in body["error"]
+    assert b"Connection: close" in head
+
+def test_oversized_body_is_413():
+    server, (status, body, head) = _with_server(
+        lambda s: _raw(s, b"POST /simulate HTTP/1.1\r\nContent-Length: 5000\r\n\r\n"), max_body_bytes=1000)
+    assert status == 413 and "1000" in body["error"]
+    assert server.requests == 0
+
+def test_handle_serves_request():
+    corpo = json.dumps(CFG_A).encode()
+    request = (b"POST /simulate?summary=1 HTTP/1.1\r\nContent-Length: " + str(len(corpo)).encode()
+               + b"\r\nConnection: close\r\n\r\n" + corpo)
+    _, (status, body, _) = _with_server(lambda s: _raw(s, request))
+    assert status == 200 and set(body) == {"cache_key", "summary"}
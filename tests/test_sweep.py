@@ -0,0 +1,68 @@
+"""Varredura de cenários: campos, grade e execução em paralelo."""
+import numpy as np
+import pytest
+
+from simulador import calculate_summary_metrics, expand_grid, get_field, run_configs, run_sweep, set_field, simulate_columns
+from simulador.engine import RESULT_COLUMNS
+from simulador.goalseek import metric_value
+
+from .test_engine import REFERENCE_CONFIGS, _EVENTOS, _config
+
+
+def test_get_and_set_field():
+    cfg = _config(**_EVENTOS)
+    assert get_field(cfg, "cost_per_module") == 75000.0
+    assert get_field(cfg, "global.cost_per_module") == 75000.0
+    assert get_field(cfg, "land_strategy") == "owned"
+    assert get_field(cfg, "withdrawals.0.percentual") == 20.0
+    assert get_field(cfg, "global.contributions.1.valor") == 20000.0
+    set_field(cfg, "rent_value", 900.0)
+    set_field(cfg, "withdrawals.0.percentual", 35.0)
+    set_field(cfg, "owned.land_installments", 60)
+    assert cfg['rented']['rent_value'] == 900.0
+    assert cfg['global']['withdrawals'][0] == {'mes': 60, 'percentual': 35.0}
+    assert cfg['owned']['land_installments'] == 60
+
+@pytest.mark.parametrize("field", ["nao_existe", "global.withdrawals.5.percentual"])
+def test_unknown_field(field):
+    with pytest.raises((KeyError, IndexError)):
+        get_field(_config(**_EVENTOS), field)
+
+def test_expand_grid_is_cartesian_and_copies_base():
+    base = _config()
+    grid = list(expand_grid({"cost_per_module": [60000.0, 75000.0], "land_strategy": ["owned", "rented", "alternate"]}, base))
+    assert [v for v, _ in grid] == [
+        {"cost_per_module": c, "land_strategy": s} for c in (60000.0, 75000.0) for s in ("owned", "rented", "alternate")
+    ]
+    for values, cfg in grid:
+        assert cfg['global']['cost_per_module'] == values["cost_per_module"]
+        assert cfg['strategy']['land_strategy'] == values["land_strategy"]
+    assert base['strategy']['land_strategy'] == "owned"
+
+def _roi(columns):
+    return metric_value(columns, "roi_pct")
+
+def test_run_configs_serial_equals_parallel():
+    cfgs = [REFERENCE_CONFIGS[n] for n in sorted(REFERENCE_CONFIGS)]
+    serial = run_configs(cfgs, processes=1, keep_frames=True)
+    paralelo = run_configs(cfgs, processes=2, chunksize=3, keep_frames=True)
+    assert len(serial) == len(paralelo) == len(cfgs)
+    for cfg, (s1, c1), (s2, c2) in zip(cfgs, serial, paralelo):
+        assert s1 == s2 == calculate_summary_metrics(simulate_columns(cfg))
+        for col in RESULT_COLUMNS:
+            np.testing.assert_array_equal(c1[col], c2[col], err_msg=col)
+    extraidos = run_configs(cfgs, processes=2, extract=_roi)
+    assert [r for _, r in extraidos] == [_roi(c) for _, c in serial]
+    assert all(s is None for s, _ in extraidos)
+    assert run_configs([], processes=2) == []
+
+def test_run_sweep_frame():
+    axes = {"modules_init": [1, 2], "land_strategy": ["owned", "rented"]}
+    summary = run_sweep(axes, base=_config(years=5), processes=1)
+    assert list(summary.columns[:2]) == ["modules_init", "land_strategy"]
+    assert set(calculate_summary_metrics(simulate_columns(_config(years=5)))) <= set(summary.columns)
+    assert len(summary) == 4
+    summary2, frames = run_sweep(axes, base=_config(years=5), processes=2, keep_frames=True)
+    assert summary2.equals(summary)
+    assert [list(f.columns) for f in frames] == [RESULT_COLUMNS] * 4
+    assert all(len(f) == 60 for f in frames)